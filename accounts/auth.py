@@ -1,10 +1,33 @@
 from authbroker_client.backends import AuthbrokerBackend
-from django.contrib.auth import get_user_model
+from django.contrib.auth import backends, get_user_model
 
 UserModel = get_user_model()
 
 
-class CustomAuthbrokerBackend(AuthbrokerBackend):
+class UserWithDepartmentMixin:
+    """Load the user of a request with their department, in one query
+
+    `AuthenticationMiddleware` loads the user with the backend's `get_user()`, and almost
+    every view goes on to look at `request.user.gov_department`.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related("gov_department").get(
+                pk=user_id
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user
+
+
+class ModelBackend(UserWithDepartmentMixin, backends.ModelBackend):
+    def get_user(self, user_id):
+        user = super().get_user(user_id)
+        return user if user and self.user_can_authenticate(user) else None
+
+
+class CustomAuthbrokerBackend(UserWithDepartmentMixin, AuthbrokerBackend):
     def get_or_create_user(self, profile):
         id_key = self.get_profile_id_name()
         try:
@@ -1,11 +1,16 @@
 from unittest import mock
 
 import pytest
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth import get_user
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.test import RequestFactory
 
 from accounts.models import GovDepartment
-from accounts.test.factories import GovDepartmentFactory
+from accounts.test.factories import GovDepartmentFactory, UserFactory
 from accounts.auth import (
     CustomAuthbrokerBackend,
+    ModelBackend,
 )
 
 
@@ -86,3 +91,46 @@ def test_two_departments_with_same_email_domain_prevents_login():
     auth_backend = CustomAuthbrokerBackend()
     with pytest.raises(GovDepartment.MultipleObjectsReturned):
         new_profile = auth_backend.create_user(mock_profile)
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("backend_class", [ModelBackend, CustomAuthbrokerBackend])
+def test_backend_get_user_loads_department(backend_class, django_assert_num_queries):
+    user = UserFactory()
+    with django_assert_num_queries(1):
+        loaded_user = backend_class().get_user(user.pk)
+        assert loaded_user.gov_department == user.gov_department
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("backend_class", [ModelBackend, CustomAuthbrokerBackend])
+def test_backend_get_user_returns_none_for_unknown_user(backend_class):
+    assert backend_class().get_user(0) is None
+
+
+@pytest.mark.django_db()
+def test_model_backend_get_user_returns_none_for_inactive_user():
+    user = UserFactory(is_active=False)
+    assert ModelBackend().get_user(user.pk) is None
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("backend_class", [ModelBackend, CustomAuthbrokerBackend])
+def test_signed_cookie_session_loads_user_in_one_query(
+    backend_class, django_assert_num_queries
+):
+    user = UserFactory()
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[
+        BACKEND_SESSION_KEY
+    ] = f"{backend_class.__module__}.{backend_class.__qualname__}"
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    request = RequestFactory().get("/")
+    request.session = SessionStore(session_key=session.session_key)
+
+    with django_assert_num_queries(1):
+        request_user = get_user(request)
+        assert request_user == user
+        assert request_user.gov_department == user.gov_department
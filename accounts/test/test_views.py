@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth import SESSION_KEY
+from django.http import Http404
+from django.test import Client, RequestFactory, override_settings
+
+from accounts.test.factories import UserFactory
+from accounts.views import LoadTestLoginView
+
+pytestmark = pytest.mark.django_db
+
+LOGIN_URL = "/load-test/login/"
+
+
+@override_settings(ROOT_URLCONF="config.local_urls", LOAD_TEST_LOGIN=True)
+def test_load_test_login_logs_in_the_user_with_the_email():
+    UserFactory(email="someone.else@email.gov.uk")  # /PS-IGNORE
+    user = UserFactory(email="load.test@email.gov.uk")  # /PS-IGNORE
+    client = Client()
+
+    response = client.get(
+        LOGIN_URL,
+        {"email": "load.test@email.gov.uk", "next": "/supply-chains/"},  # /PS-IGNORE
+    )
+
+    assert response.status_code == 302
+    assert response.url == "/supply-chains/"
+    assert client.session[SESSION_KEY] == str(user.pk)
+
+
+@override_settings(ROOT_URLCONF="config.local_urls", LOAD_TEST_LOGIN=True)
+def test_load_test_login_picks_a_user_without_an_email():
+    user = UserFactory()
+    client = Client()
+
+    response = client.get(LOGIN_URL)
+
+    assert response.status_code == 302
+    assert response.url == "/"
+    assert client.session[SESSION_KEY] == str(user.pk)
+
+
+@override_settings(ROOT_URLCONF="config.local_urls", LOAD_TEST_LOGIN=True)
+def test_load_test_login_does_not_redirect_off_site():
+    UserFactory()
+
+    response = Client().get(LOGIN_URL, {"next": "https://example.com/"})
+
+    assert response.url == "/"
+
+
+# the 404 page needs a logged in user, so these call the view directly
+
+
+@override_settings(LOAD_TEST_LOGIN=True)
+def test_load_test_login_refuses_inactive_users():
+    UserFactory(email="load.test@email.gov.uk", is_active=False)  # /PS-IGNORE
+    request = RequestFactory().get(
+        LOGIN_URL, {"email": "load.test@email.gov.uk"}  # /PS-IGNORE
+    )
+
+    with pytest.raises(Http404):
+        LoadTestLoginView.as_view()(request)
+
+
+@override_settings(LOAD_TEST_LOGIN=False)
+def test_load_test_login_is_off_unless_enabled():
+    UserFactory()
+    request = RequestFactory().get(LOGIN_URL)
+
+    with pytest.raises(Http404):
+        LoadTestLoginView.as_view()(request)
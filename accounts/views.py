@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth import login
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.generic import View
+
+from accounts.models import User
+
+
+class LoadTestLoginView(View):
+    """Log in as a local user without going through Staff SSO, for load tests
+
+    Only routed in the local URLconf, and only answers when `LOAD_TEST_LOGIN` is set.
+    `?email=` picks the user, otherwise an active user is chosen at random, so that many
+    virtual users are spread across the departments. `?next=` is where to go afterwards.
+    """
+
+    backend = "accounts.auth.ModelBackend"
+
+    def get_user(self, request):
+        users = User.objects.filter(is_active=True, gov_department__isnull=False)
+        email = request.GET.get("email")
+        if email:
+            return users.filter(email=email).first()
+        return users.order_by("?").first()
+
+    def get(self, request, **kwargs):
+        if not settings.LOAD_TEST_LOGIN:
+            raise Http404()
+        user = self.get_user(request)
+        if user is None:
+            raise Http404("No such user")
+        login(request, user, backend=self.backend)
+        next_url = request.GET.get("next", "/")
+        if not url_has_allowed_host_and_scheme(
+            next_url, allowed_hosts={request.get_host()}
+        ):
+            next_url = "/"
+        return redirect(next_url)
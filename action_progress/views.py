@@ -11,7 +11,7 @@ from accounts.models import GovDepartment
 from action_progress.forms import SAPForm
 from action_progress.mixins import DeptAuthRequiredMixin
 from supply_chains.models import StrategicAction, StrategicActionUpdate, SupplyChain
-from supply_chains.mixins import PaginationMixin
+from supply_chains.mixins import ConcurrentContextMixin, PaginationMixin
 
 
 class ActionProgressView(LoginRequiredMixin, FormView):
@@ -136,9 +136,27 @@ class ActionProgressListView(PaginationMixin, ActionProgressDeptView):
         return context
 
 
-class ActionProgressDetailView(DeptAuthRequiredMixin, TemplateView):
+class ActionProgressDetailView(
+    DeptAuthRequiredMixin, ConcurrentContextMixin, TemplateView
+):
     template_name = "action_progress_details.html"
 
+    def get_context_loaders(self):
+        return {"action": self.get_action, "update": self.get_update}
+
+    def get_action(self):
+        return get_object_or_404(
+            StrategicAction,
+            slug=self.kwargs.get("action_slug"),
+            supply_chain__slug=self.kwargs.get("supply_chain_slug"),
+        )
+
+    def get_update(self):
+        return StrategicActionUpdate.objects.filter(
+            supply_chain__slug=self.kwargs.get("supply_chain_slug"),
+            strategic_action__slug=self.kwargs.get("action_slug"),
+        ).last_month()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
@@ -146,15 +164,4 @@ class ActionProgressDetailView(DeptAuthRequiredMixin, TemplateView):
         context["sc_slug"] = self.kwargs.get("supply_chain_slug", None)
         context["sa_slug"] = self.kwargs.get("action_slug", None)
 
-        context["action"] = get_object_or_404(
-            StrategicAction,
-            slug=context["sa_slug"],
-            supply_chain__slug=context["sc_slug"],
-        )
-
-        context["update"] = StrategicActionUpdate.objects.filter(
-            supply_chain__slug=context["sc_slug"],
-            strategic_action__slug=context["sa_slug"],
-        ).last_month()
-
         return context
@@ -137,11 +137,13 @@ def bit_of_everything_queryset(
                     supply_chain=supply_chain_in_use
                 )
                 continue
+            # one update per strategic action per month
             StrategicActionUpdateFactory(
                 supply_chain=supply_chain_in_use,
                 strategic_action=strategic_action_in_use,
                 user=user,
                 status=StrategicActionUpdate.Status.SUBMITTED,
+                date_created=datetime.date.today() - relativedelta(months=i),
             )
 
 
@@ -4,7 +4,16 @@ from django.urls import reverse
 
 from accounts.models import GovDepartment
 from accounts.test.factories import GovDepartmentFactory, UserFactory
-from supply_chains.test.factories import SupplyChainFactory, ScenarioAssessmentFactory
+from supply_chains.test.factories import (
+    SupplyChainFactory,
+    ScenarioAssessmentFactory,
+    VulnerabilityAssessmentFactory,
+    VulAssessmentSupplyStageFactory,
+    VulAssessmentReceiveStageFactory,
+    VulAssessmentMakeStageFactory,
+    VulAssessmentStoreStageFactory,
+    VulAssessmentDeliverStageFactory,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -114,3 +123,38 @@ class TestSCDInfo:
         # Assert
         assert resp.status_code == 200
         assert not hasattr(resp.context["sc"], "scenario_assessment")
+
+    def test_vulnerability_stages_read_from_assessment(
+        self, logged_in_ogd, django_assert_max_num_queries
+    ):
+        # Arrange
+        dept = GovDepartment.objects.first()
+        sc = SupplyChainFactory.create(gov_department=dept)
+        vul = VulnerabilityAssessmentFactory.create(supply_chain=sc)
+        VulAssessmentSupplyStageFactory.create(
+            vulnerability=vul, supply_stage_summary_1="Supply summary"
+        )
+        for factory in [
+            VulAssessmentReceiveStageFactory,
+            VulAssessmentMakeStageFactory,
+            VulAssessmentStoreStageFactory,
+            VulAssessmentDeliverStageFactory,
+        ]:
+            factory.create(vulnerability=vul)
+        url = reverse(
+            "chain-details-info",
+            kwargs={"dept": dept.name, "supply_chain_slug": sc.slug},
+        )
+        logged_in_ogd.get(url)
+
+        # Act
+        with django_assert_max_num_queries(20) as captured:
+            resp = logged_in_ogd.get(url)
+
+        # Assert
+        assert resp.status_code == 200
+        assert "Supply summary" in resp.content.decode()
+        assert not any(
+            "supply_chains_vulassessment" in query["sql"]
+            for query in captured.captured_queries
+        )
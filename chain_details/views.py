@@ -8,7 +8,7 @@ from django.views.generic import FormView, DetailView
 
 from chain_details.forms import SCDForm
 from accounts.models import GovDepartment
-from supply_chains.mixins import PaginationMixin
+from supply_chains.mixins import ConcurrentContextMixin, PaginationMixin, fetched
 from supply_chains.models import (
     ScenarioAssessment,
     SupplyChain,
@@ -34,7 +34,7 @@ class ChainDetailsView(LoginRequiredMixin, FormView):
         )
 
 
-class ChainDetailsListView(PaginationMixin, ChainDetailsView):
+class ChainDetailsListView(ConcurrentContextMixin, PaginationMixin, ChainDetailsView):
     template_name = "chain_details_list.html"
 
     def get_initial(self):
@@ -46,21 +46,28 @@ class ChainDetailsListView(PaginationMixin, ChainDetailsView):
 
         return form_value
 
+    def get_context_loaders(self):
+        return {"chains": self.get_chains}
+
+    def get_chains(self):
+        return fetched(
+            self.paginate(
+                SupplyChain.objects.filter(gov_department__name=self.kwargs.get("dept"))
+                .order_by("name")
+                .values("name", "slug", "description"),
+                5,
+            )
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         context["dept"] = self.kwargs.get("dept", None)
-        context["chains"] = self.paginate(
-            SupplyChain.objects.filter(gov_department__name=context["dept"])
-            .order_by("name")
-            .values("name", "slug", "description"),
-            5,
-        )
 
         return context
 
 
-class ChainDetailsInfoView(LoginRequiredMixin, TemplateView):
+class ChainDetailsInfoView(LoginRequiredMixin, ConcurrentContextMixin, TemplateView):
     template_name = "chain_details_info.html"
     VUL_STAGE_TITLES = [
         None,
@@ -144,18 +151,47 @@ class ChainDetailsInfoView(LoginRequiredMixin, TemplateView):
             critical_scenario_paragraphs.append(f"{field_text}: {scenario}")
         return critical_scenario_paragraphs
 
+    def get_context_loaders(self):
+        return {
+            "sc": self.get_supply_chain,
+            "stages": self.get_stages,
+            "stage_notes": self.get_stage_notes,
+        }
+
+    def get_supply_chain(self):
+        return get_object_or_404(
+            SupplyChain.objects.select_related(
+                "scenario_assessment",
+                "vulnerability_assessment",
+                "criticality",
+                "maturity",
+            ),
+            slug=self.kwargs.get("supply_chain_slug"),
+        )
+
+    def get_stages(self):
+        return list(
+            SupplyChainStage.objects.filter(
+                supply_chain__slug=self.kwargs.get("supply_chain_slug")
+            ).order_by("order")
+        )
+
+    def get_stage_notes(self):
+        return (
+            SupplyChainStage.objects.filter(
+                supply_chain__slug=self.kwargs.get("supply_chain_slug")
+            )
+            .order_by("-gsc_updated_on")
+            .first()
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
         context["dept"] = self.kwargs.get("dept", None)
         context["sc_slug"] = self.kwargs.get("supply_chain_slug", None)
 
-        supply_chain = get_object_or_404(
-            SupplyChain,
-            slug=context["sc_slug"],
-        )
-
-        context["sc"] = supply_chain
+        supply_chain = context["sc"]
         if hasattr(supply_chain, "scenario_assessment"):
             context["scenario_assessment_sections"] = self.scenario_assessment_sections(
                 supply_chain.scenario_assessment
@@ -163,19 +199,16 @@ class ChainDetailsInfoView(LoginRequiredMixin, TemplateView):
             context["critical_scenario_paragraphs"] = self.critical_scenario_paragraphs(
                 supply_chain.scenario_assessment
             )
-        context["stages"] = SupplyChainStage.objects.filter(
-            supply_chain=context["sc"]
-        ).order_by("order")
-        context["stage_notes"] = context["stages"].order_by("-gsc_updated_on").first()
 
         if hasattr(supply_chain, "vulnerability_assessment"):
             vul = supply_chain.vulnerability_assessment
             context["vul"] = vul
-            context["vul_supply"] = vul.vulnerability_supply_stage
-            context["vul_receive"] = vul.vulnerability_receive_stage
-            context["vul_make"] = vul.vulnerability_make_stage
-            context["vul_store"] = vul.vulnerability_store_stage
-            context["vul_deliver"] = vul.vulnerability_deliver_stage
+            # read from the assessment's document rather than a query per stage
+            context["vul_supply"] = vul.stage("supply")
+            context["vul_receive"] = vul.stage("receive")
+            context["vul_make"] = vul.stage("make")
+            context["vul_store"] = vul.stage("store")
+            context["vul_deliver"] = vul.stage("deliver")
 
             context["vul_title_list"] = self.VUL_STAGE_TITLES
 
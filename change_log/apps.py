@@ -0,0 +1,12 @@
+from django.apps import AppConfig, apps
+from django.conf import settings
+
+
+class ChangeLogConfig(AppConfig):
+    name = "change_log"
+
+    def ready(self):
+        from change_log.tracking import register
+
+        for model_label in getattr(settings, "CHANGE_LOG_MODELS", []):
+            register(apps.get_model(model_label))
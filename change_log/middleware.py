@@ -0,0 +1,19 @@
+from change_log.tracking import batched, current_user
+
+
+def change_log_user_middleware(get_response):
+    """Attribute changes made while handling a request to the requesting user
+
+    The entries committed while handling the request are inserted together at its end.
+    The user is kept lazy, so the session and user are only loaded if a change is logged.
+    """
+
+    def middleware(request):
+        token = current_user.set(getattr(request, "user", None))
+        try:
+            with batched():
+                return get_response(request)
+        finally:
+            current_user.reset(token)
+
+    return middleware
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("change_log", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="changelogentry",
+            name="comment",
+            field=models.TextField(blank=True),
+        ),
+    ]
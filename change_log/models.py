@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class ChangeLogEntry(models.Model):
+    """One change to one object, recording only the fields that changed
+
+    `changes` maps each changed field's attname to a pair of its old and new values.
+    A creation has None as every old value and a deletion has None as every new value,
+    so the log can be replayed in either direction; see `change_log.reader`.
+    `comment` says why, where the code making the change gave a reason.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = ("create", "Created")
+        UPDATE = ("update", "Updated")
+        DELETE = ("delete", "Deleted")
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=6, choices=Action.choices)
+    changes = models.JSONField(encoder=DjangoJSONEncoder)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    comment = models.TextField(blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Change log entries"
+        ordering = ("timestamp", "id")
+        indexes = [
+            models.Index(
+                fields=["content_type", "object_id", "timestamp"],
+                name="change_log_object_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.content_type.model} {self.object_id}"
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils.encoding import force_str
+
+from change_log.models import ChangeLogEntry
+from change_log.tracking import _logged_fields
+
+
+def entries_for(model, pk):
+    """All logged changes to one object, oldest first"""
+    return ChangeLogEntry.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id=force_str(pk),
+    )
+
+
+def _to_python(field, value):
+    return None if value is None else field.to_python(value)
+
+
+def state_at(model, pk, when: datetime) -> Optional[Dict]:
+    """The logged field values of an object as they were at `when`
+
+    This starts from the object as it is now, or as it was when deleted,
+    and undoes each logged change made after `when`.
+    Returns None if the object didn't exist at that time.
+    """
+    fields = {field.attname: field for field in _logged_fields(model)}
+    state = model._base_manager.filter(pk=pk).values(*fields).first()
+    for entry in entries_for(model, pk).filter(timestamp__gt=when).reverse():
+        if entry.action == ChangeLogEntry.Action.CREATE:
+            return None
+        if entry.action == ChangeLogEntry.Action.DELETE:
+            state = {}
+        for attname, (old_value, _) in entry.changes.items():
+            if attname in fields:
+                state[attname] = _to_python(fields[attname], old_value)
+    return state
+
+
+def instance_at(model, pk, when: datetime):
+    """An unsaved instance of the object as it was at `when`, or None if it didn't exist"""
+    state = state_at(model, pk, when)
+    if state is None:
+        return None
+    return model(**state)
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+from django.test import TestCase
+from django.utils import timezone
+
+from change_log.reader import instance_at, state_at
+from supply_chains.models import StrategicAction, SupplyChain
+from supply_chains.test.factories import StrategicActionFactory, SupplyChainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def committing():
+    return TestCase.captureOnCommitCallbacks(execute=True)
+
+
+class TestStateReconstruction:
+    def test_state_before_update(self):
+        before_creation = timezone.now()
+        with committing():
+            supply_chain = SupplyChainFactory(name="Ceramics")
+        supply_chain = SupplyChain.objects.get(pk=supply_chain.pk)
+        before_update = timezone.now()
+        with committing():
+            supply_chain.name = "Glassware"
+            supply_chain.last_submission_date = date(year=2021, month=5, day=1)
+            supply_chain.save()
+
+        state = state_at(SupplyChain, supply_chain.pk, before_update)
+
+        assert state["name"] == "Ceramics"
+        assert state["last_submission_date"] != date(year=2021, month=5, day=1)
+        assert state_at(SupplyChain, supply_chain.pk, timezone.now())["name"] == (
+            "Glassware"
+        )
+        assert state_at(SupplyChain, supply_chain.pk, before_creation) is None
+
+    def test_state_of_deleted_object(self):
+        with committing():
+            strategic_action = StrategicActionFactory(
+                name="Stockpile", target_completion_date=date(year=2022, month=1, day=1)
+            )
+        strategic_action_pk = strategic_action.pk
+        before_deletion = timezone.now()
+        with committing():
+            strategic_action.delete()
+
+        reconstructed = instance_at(
+            StrategicAction, strategic_action_pk, before_deletion
+        )
+
+        assert reconstructed.name == "Stockpile"
+        assert reconstructed.target_completion_date == date(year=2022, month=1, day=1)
+        assert reconstructed.supply_chain_id == strategic_action.supply_chain_id
+        assert state_at(StrategicAction, strategic_action_pk, timezone.now()) is None
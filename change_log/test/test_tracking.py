@@ -0,0 +1,281 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.utils.functional import SimpleLazyObject
+from django.db import transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from change_log.middleware import change_log_user_middleware
+from change_log.models import ChangeLogEntry
+from change_log.reader import entries_for
+from change_log.tracking import (
+    batched,
+    current_user,
+    record_create,
+    record_update,
+    recording,
+)
+from supply_chains.models import SupplyChain, StrategicAction
+from supply_chains.test.factories import StrategicActionFactory, SupplyChainFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def committing():
+    """Run on-commit callbacks at the end of the block, as the test's transaction never commits"""
+    return TestCase.captureOnCommitCallbacks(execute=True)
+
+
+class TestChangeTracking:
+    def test_creation_records_all_fields(self):
+        with committing():
+            supply_chain = SupplyChainFactory(name="Ceramics")
+
+        entry = entries_for(SupplyChain, supply_chain.pk).get()
+        assert entry.action == ChangeLogEntry.Action.CREATE
+        assert entry.changes["name"] == [None, "Ceramics"]
+        assert entry.changes["gov_department_id"] == [
+            None,
+            str(supply_chain.gov_department_id),
+        ]
+        assert "last_modified" not in entry.changes
+
+    def test_update_records_only_changed_fields(self):
+        supply_chain = SupplyChainFactory(name="Ceramics")
+        supply_chain = SupplyChain.objects.get(pk=supply_chain.pk)
+
+        with committing():
+            supply_chain.name = "Glassware"
+            supply_chain.save()
+
+        entry = entries_for(SupplyChain, supply_chain.pk).last()
+        assert entry.action == ChangeLogEntry.Action.UPDATE
+        assert entry.changes == {"name": ["Ceramics", "Glassware"]}
+
+    def test_unchanged_save_records_nothing(self):
+        supply_chain = SupplyChainFactory()
+        entries = entries_for(SupplyChain, supply_chain.pk).count()
+
+        with committing():
+            SupplyChain.objects.get(pk=supply_chain.pk).save()
+
+        assert entries_for(SupplyChain, supply_chain.pk).count() == entries
+
+    def test_instances_remember_the_values_they_were_loaded_with(self):
+        supply_chain = SupplyChainFactory(name="Ceramics")
+
+        loaded = SupplyChain.objects.get(pk=supply_chain.pk)
+
+        assert loaded._change_log_values["name"] == "Ceramics"
+        assert not hasattr(SupplyChain(name="Unsaved"), "_change_log_values")
+
+    def test_update_of_an_instance_not_loaded_from_the_db_records_changes(self):
+        supply_chain = SupplyChainFactory(name="Ceramics")
+        replacement = SupplyChain.objects.get(pk=supply_chain.pk)
+        del replacement._change_log_values
+
+        with committing():
+            replacement.name = "Glassware"
+            replacement.save()
+
+        assert entries_for(SupplyChain, supply_chain.pk).last().changes == {
+            "name": ["Ceramics", "Glassware"]
+        }
+
+    def test_entries_are_written_in_one_query_at_the_end_of_a_batch(self):
+        supply_chain = SupplyChainFactory()
+        strategic_actions = list(
+            StrategicAction.objects.filter(
+                pk__in=[
+                    strategic_action.pk
+                    for strategic_action in StrategicActionFactory.create_batch(
+                        5, supply_chain=supply_chain
+                    )
+                ]
+            )
+        )
+
+        with CaptureQueriesContext(connection) as captured:
+            with batched():
+                with committing():
+                    with transaction.atomic():
+                        for strategic_action in strategic_actions:
+                            strategic_action.description = "Changed"
+                            strategic_action.save()
+                logged_before_batch_end = ChangeLogEntry.objects.filter(
+                    changes__has_key="description"
+                ).count()
+
+        assert logged_before_batch_end == 0
+        inserts = [
+            query["sql"]
+            for query in captured.captured_queries
+            if query["sql"].startswith('INSERT INTO "change_log_changelogentry"')
+        ]
+        assert len(inserts) == 1
+        assert (
+            ChangeLogEntry.objects.filter(changes__has_key="description").count() == 5
+        )
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory(name="One").pk)
+        other_supply_chain = SupplyChain.objects.get(
+            pk=SupplyChainFactory(name="Two").pk
+        )
+
+        with committing():
+            with transaction.atomic():
+                supply_chain.name = "One changed"
+                supply_chain.save()
+                try:
+                    with transaction.atomic():
+                        other_supply_chain.name = "Two changed"
+                        other_supply_chain.save()
+                        raise RuntimeError()
+                except RuntimeError:
+                    pass
+
+        assert entries_for(SupplyChain, supply_chain.pk).last().changes == {
+            "name": ["One", "One changed"]
+        }
+        assert not entries_for(SupplyChain, other_supply_chain.pk).exists()
+
+    def test_deletion_records_last_values(self):
+        supply_chain = SupplyChainFactory(name="Ceramics")
+        strategic_action = StrategicActionFactory(supply_chain=supply_chain)
+        strategic_action_pk = strategic_action.pk
+
+        with committing():
+            strategic_action.delete()
+
+        entry = entries_for(StrategicAction, strategic_action_pk).last()
+        assert entry.action == ChangeLogEntry.Action.DELETE
+        assert entry.changes["name"] == [strategic_action.name, None]
+
+    def test_changes_are_attributed_to_current_user(self, test_user):
+        token = current_user.set(test_user)
+        try:
+            with committing():
+                supply_chain = SupplyChainFactory()
+        finally:
+            current_user.reset(token)
+
+        assert entries_for(SupplyChain, supply_chain.pk).get().user == test_user
+
+    def test_recording_sets_the_comment_and_user(self, test_user):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory().pk)
+
+        with committing(), recording(comment="Renamed", user=test_user):
+            supply_chain.name = "Glassware"
+            supply_chain.save()
+
+        entry = entries_for(SupplyChain, supply_chain.pk).last()
+        assert entry.comment == "Renamed"
+        assert entry.user == test_user
+        assert current_user.get() is None
+
+    def test_excluded_fields_are_not_logged(self):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory().pk)
+
+        with committing():
+            supply_chain.active_strategic_action_count += 1
+            supply_chain.save()
+
+        assert "active_strategic_action_count" not in supply_chain._change_log_values
+        assert not entries_for(SupplyChain, supply_chain.pk).filter(
+            changes__has_key="active_strategic_action_count"
+        )
+
+    def test_bulk_writes_are_recorded_with_record_create_and_record_update(self):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory().pk)
+        strategic_action = StrategicActionFactory.build(supply_chain=supply_chain)
+
+        with committing():
+            StrategicAction.objects.bulk_create([strategic_action])
+            record_create(strategic_action)
+            strategic_action.name = "Renamed"
+            strategic_action.description = "Not written"
+            StrategicAction.objects.bulk_update([strategic_action], ["name"])
+            record_update(strategic_action, ["name"])
+
+        create, update = entries_for(StrategicAction, strategic_action.pk)
+        assert create.action == ChangeLogEntry.Action.CREATE
+        assert update.changes == {"name": [create.changes["name"][1], "Renamed"]}
+
+
+class TestChangeLogUserMiddleware:
+    def request(self, get_user):
+        request = RequestFactory().get("/")
+        request.user = SimpleLazyObject(get_user)
+        return request
+
+    def test_leaves_the_user_unloaded_when_nothing_changes(self):
+        def get_user():
+            raise AssertionError("the user was loaded")
+
+        response = change_log_user_middleware(lambda request: "response")(
+            self.request(get_user)
+        )
+
+        assert response == "response"
+
+    def test_attributes_changes_to_the_requesting_user(self, test_user):
+        def view(request):
+            return SupplyChainFactory()
+
+        with committing():
+            supply_chain = change_log_user_middleware(view)(
+                self.request(lambda: test_user)
+            )
+
+        assert entries_for(SupplyChain, supply_chain.pk).get().user == test_user
+
+    def test_recording_sets_the_comment_and_user(self, test_user):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory().pk)
+
+        with committing(), recording(comment="Renamed", user=test_user):
+            supply_chain.name = "Glassware"
+            supply_chain.save()
+
+        entry = entries_for(SupplyChain, supply_chain.pk).last()
+        assert entry.comment == "Renamed"
+        assert entry.user == test_user
+        assert current_user.get() is None
+
+    def test_excluded_fields_are_not_logged(self):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory().pk)
+
+        with committing():
+            supply_chain.active_strategic_action_count += 1
+            supply_chain.save()
+
+        assert "active_strategic_action_count" not in supply_chain._change_log_values
+        assert not entries_for(SupplyChain, supply_chain.pk).filter(
+            changes__has_key="active_strategic_action_count"
+        )
+
+    def test_bulk_writes_are_recorded_with_record_create_and_record_update(self):
+        supply_chain = SupplyChain.objects.get(pk=SupplyChainFactory().pk)
+        strategic_action = StrategicActionFactory.build(supply_chain=supply_chain)
+
+        with committing():
+            StrategicAction.objects.bulk_create([strategic_action])
+            record_create(strategic_action)
+            strategic_action.name = "Renamed"
+            strategic_action.description = "Not written"
+            StrategicAction.objects.bulk_update([strategic_action], ["name"])
+            record_update(strategic_action, ["name"])
+
+        create, update = entries_for(StrategicAction, strategic_action.pk)
+        assert create.action == ChangeLogEntry.Action.CREATE
+        assert update.changes == {"name": [create.changes["name"][1], "Renamed"]}
+
+    def test_does_not_attribute_changes_to_anonymous_users(self):
+        with committing():
+            supply_chain = change_log_user_middleware(
+                lambda request: SupplyChainFactory()
+            )(self.request(AnonymousUser))
+
+        assert entries_for(SupplyChain, supply_chain.pk).get().user is None
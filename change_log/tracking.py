@@ -0,0 +1,233 @@
+import copy
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils.encoding import force_str
+
+from change_log.models import ChangeLogEntry
+
+# The user changes are attributed to, set per request by `change_log_user_middleware`.
+# It may be the request's lazy user, which is only resolved when a change is logged.
+current_user = ContextVar("change_log_user", default=None)
+# Why the changes are being made, set by `recording()`
+current_comment = ContextVar("change_log_comment", default="")
+# The entries committed in the current `batched()` block, waiting to be inserted
+_batch = ContextVar("change_log_batch", default=None)
+
+_registered_models = set()
+
+
+class ChangeLogMixin:
+    """Remember the logged field values an instance was loaded with
+
+    The change log diffs a save against these, so it needs no query to tell what changed.
+    Fields named in `change_log_excluded_fields` aren't logged.
+    """
+
+    change_log_excluded_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if cls in _registered_models:
+            logged = _logged_attnames(cls)
+            instance._change_log_values = {
+                attname: _copied(value)
+                for attname, value in zip(field_names, values)
+                if attname in logged
+            }
+        return instance
+
+
+def register(model):
+    """Record changes to instances of `model` in the change log
+
+    Only changes made through `save()` and `delete()` are seen;
+    `QuerySet.update()` and the bulk methods don't send the signals this relies on,
+    so use `record_create()` and `record_update()` alongside those.
+    """
+    if not issubclass(model, ChangeLogMixin):
+        raise ImproperlyConfigured(
+            f"{model.__name__} needs ChangeLogMixin to be in the change log"
+        )
+    if model in _registered_models:
+        return
+    _registered_models.add(model)
+    pre_save.connect(_fetch_values, sender=model, dispatch_uid="change_log")
+    post_save.connect(_record_save, sender=model, dispatch_uid="change_log")
+    post_delete.connect(_record_delete, sender=model, dispatch_uid="change_log")
+
+
+def is_registered(model):
+    return model in _registered_models
+
+
+def _logged_fields(model):
+    # auto_now timestamps change on every save and the entry has its own timestamp
+    excluded = getattr(model, "change_log_excluded_fields", ())
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if not getattr(field, "auto_now", False) and field.name not in excluded
+    ]
+
+
+def _logged_attnames(model):
+    return {field.attname for field in _logged_fields(model)}
+
+
+def _copied(value):
+    # array and JSON values can be changed in place, so keep a copy of them
+    return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+
+
+def _current_values(instance):
+    deferred = instance.get_deferred_fields()
+    return {
+        field.attname: _copied(getattr(instance, field.attname))
+        for field in _logged_fields(instance.__class__)
+        if field.attname not in deferred
+    }
+
+
+def _fetch_values(sender, instance, raw, using, **kwargs):
+    """Fetch what an instance that wasn't loaded from the db is replacing"""
+    if raw or instance._state.adding or hasattr(instance, "_change_log_values"):
+        return
+    instance._change_log_values = (
+        sender._base_manager.using(using)
+        .filter(pk=instance.pk)
+        .values(*_logged_attnames(sender))
+        .first()
+        or {}
+    )
+
+
+def _changes(instance, fields=None):
+    """The logged fields that changed since the instance was loaded, as [old, new] pairs"""
+    values = _current_values(instance)
+    if fields is not None:
+        values = {attname: values[attname] for attname in fields if attname in values}
+    previous_values = getattr(instance, "_change_log_values", {})
+    changes = {
+        attname: [previous_values[attname], value]
+        for attname, value in values.items()
+        # a field deferred when the instance was loaded can't be compared
+        if attname in previous_values and previous_values[attname] != value
+    }
+    instance._change_log_values = {**previous_values, **values}
+    return changes
+
+
+def _record_save(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    if created:
+        values = _current_values(instance)
+        instance._change_log_values = values
+        action = ChangeLogEntry.Action.CREATE
+        changes = {attname: [None, value] for attname, value in values.items()}
+    else:
+        action = ChangeLogEntry.Action.UPDATE
+        changes = _changes(instance)
+    if changes:
+        _enqueue(instance, action, changes, using)
+
+
+def _record_delete(sender, instance, using, **kwargs):
+    changes = {
+        attname: [value, None] for attname, value in _current_values(instance).items()
+    }
+    _enqueue(instance, ChangeLogEntry.Action.DELETE, changes, using)
+
+
+def record_create(instance, using=None):
+    """Record the creation of an instance that a bulk create wrote"""
+    values = _current_values(instance)
+    instance._change_log_values = values
+    _enqueue(
+        instance,
+        ChangeLogEntry.Action.CREATE,
+        {attname: [None, value] for attname, value in values.items()},
+        using or instance._state.db,
+    )
+
+
+def record_update(instance, fields, using=None):
+    """Record the changes to `fields` that a bulk update wrote, given the instance written"""
+    changes = _changes(
+        instance, [instance._meta.get_field(field).attname for field in fields]
+    )
+    if changes:
+        _enqueue(
+            instance,
+            ChangeLogEntry.Action.UPDATE,
+            changes,
+            using or instance._state.db,
+        )
+
+
+@contextmanager
+def recording(comment="", user=None):
+    """Give the changes made in the block a comment, and a user other than the current one"""
+    comment_token = current_comment.set(comment or "")
+    user_token = current_user.set(user) if user is not None else None
+    try:
+        yield
+    finally:
+        current_comment.reset(comment_token)
+        if user_token is not None:
+            current_user.reset(user_token)
+
+
+@contextmanager
+def batched():
+    """Insert the entries committed in the block together, when it ends
+
+    Outside a batch each entry is inserted as its transaction commits.
+    """
+    entries = []
+    token = _batch.set(entries)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+        by_db = {}
+        for using, entry in entries:
+            by_db.setdefault(using, []).append(entry)
+        for using, db_entries in by_db.items():
+            ChangeLogEntry.objects.using(using).bulk_create(db_entries)
+
+
+def _user():
+    user = current_user.get()
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+def _enqueue(instance, action, changes, using):
+    entry = ChangeLogEntry(
+        content_type=ContentType.objects.db_manager(using).get_for_model(
+            instance.__class__
+        ),
+        object_id=force_str(instance.pk),
+        action=action,
+        changes=changes,
+        user=_user(),
+        comment=current_comment.get(),
+    )
+
+    # Entries made in a savepoint that is rolled back are dropped along with this callback
+    def committed():
+        batch = _batch.get()
+        if batch is None:
+            entry.save(using=using)
+        else:
+            batch.append((using, entry))
+
+    transaction.on_commit(committed, using=using)
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.env")
+# the views that can run async only do so when served from here
+os.environ.setdefault("SERVER_MODE", "asgi")
+
+from django.core.asgi import get_asgi_application  # noqa: E402
 
 application = get_asgi_application()
+
+from config.boot import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,112 @@
+"""What an instance needs to do when it starts, and what it can skip
+
+`prepare_boot` only runs `migrate` when there are migrations on disk that haven't been
+applied, and only runs `collectstatic` when the static files it would collect differ from
+the ones it collected last time. `warm_up()` imports the modules a first request would, so
+a gunicorn master that preloads the app forks workers that are ready to serve.
+"""
+import hashlib
+import os
+import pkgutil
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.urls import get_resolver
+
+# written next to the manifest in STATIC_ROOT by `prepare_boot`
+STATIC_FINGERPRINT_FILE = ".static-fingerprint"
+STATIC_MANIFEST_FILE = "staticfiles.json"
+# the patterns collectstatic ignores by default
+STATIC_IGNORE_PATTERNS = ["CVS", ".*", "*~"]
+
+WARM_MODULES = [
+    "supply_chains.models",
+    "supply_chains.forms",
+    "supply_chains.admin",
+    "rest_framework.views",
+    "rest_framework.serializers",
+    "change_log.tracking",
+]
+
+
+def migrations_on_disk():
+    """The (app label, migration name) of every migration file, without importing them
+
+    Migrations are found the way `MigrationLoader` finds them.
+    """
+    found = set()
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError:
+            continue
+        if not hasattr(module, "__path__"):
+            continue
+        found.update(
+            (app_config.label, name)
+            for _, name, is_pkg in pkgutil.iter_modules(module.__path__)
+            if not is_pkg and name[0] not in "_~"
+        )
+    return found
+
+
+def unapplied_migrations(database=DEFAULT_DB_ALIAS):
+    """The migrations on disk the database has no record of applying, in name order"""
+    recorder = MigrationRecorder(connections[database])
+    applied = set(recorder.applied_migrations()) if recorder.has_table() else set()
+    return sorted(migrations_on_disk() - applied)
+
+
+def static_fingerprint():
+    """A hash of the name and contents of every file collectstatic would collect"""
+    found = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(STATIC_IGNORE_PATTERNS):
+            prefix = getattr(storage, "prefix", None) or ""
+            found.append((os.path.join(prefix, path), storage.path(path)))
+    digest = hashlib.sha256(settings.STATICFILES_STORAGE.encode())
+    for name, full_path in sorted(found):
+        digest.update(name.encode())
+        with open(full_path, "rb") as static_file:
+            digest.update(hashlib.sha256(static_file.read()).digest())
+    return digest.hexdigest()
+
+
+def _fingerprint_path():
+    return os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT_FILE)
+
+
+def static_is_collected(fingerprint):
+    """Whether STATIC_ROOT has a manifest collected from files with this fingerprint"""
+    if not os.path.exists(os.path.join(settings.STATIC_ROOT, STATIC_MANIFEST_FILE)):
+        return False
+    try:
+        with open(_fingerprint_path()) as fingerprint_file:
+            return fingerprint_file.read().strip() == fingerprint
+    except FileNotFoundError:
+        return False
+
+
+def record_static_fingerprint(fingerprint):
+    with open(_fingerprint_path(), "w") as fingerprint_file:
+        fingerprint_file.write(fingerprint)
+
+
+def warm_up():
+    """Import what the first request would, then close any connections that opened
+
+    Connections made before gunicorn forks its workers would be shared between them.
+    """
+    for module_name in WARM_MODULES:
+        import_module(module_name)
+    # resolving the URLconf imports every view, and the forms and serializers they use
+    get_resolver().url_patterns
+    connections.close_all()
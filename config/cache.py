@@ -0,0 +1,265 @@
+"""A two tier cache: a small in-process LRU in front of a cache every worker shares
+
+Configured as a `CACHES` entry whose `SHARED` option is the alias of the shared cache:
+
+    CACHES = {
+        "default": {
+            "BACKEND": "config.cache.TieredCache",
+            "OPTIONS": {"SHARED": "shared", "LOCAL_MAX_ENTRIES": 1000, "LOCAL_TIMEOUT": 5},
+        },
+        "shared": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "django_cache",
+        },
+    }
+
+Writes go to both tiers. A local copy is kept for at most `LOCAL_TIMEOUT` seconds, so a
+change made by another worker is seen within that time. `add()`, `incr()` and `decr()`
+go straight to the shared cache, so they stay atomic across workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+# Cache instances are made per thread, so the local tier and its statistics are kept
+# here, by location, for every thread in the process to share, as LocMemCache does.
+_local_entries = {}
+_local_stats = {}
+_local_locks = {}
+
+_MISSING = object()
+
+
+class TierStats:
+    """Hits, misses and the time spent looking entries up in one tier"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0
+
+    def record(self, hits, misses, seconds):
+        self.hits += hits
+        self.misses += misses
+        self.seconds += seconds
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "mean_latency_ms": self.seconds * 1000 / lookups if lookups else 0.0,
+        }
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._shared_alias = options["SHARED"]
+        self._local_max_entries = int(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self._local_timeout = float(options.get("LOCAL_TIMEOUT", 5))
+        self._entries = _local_entries.setdefault(location, OrderedDict())
+        self._stats = _local_stats.setdefault(
+            location, {"local": TierStats(), "shared": TierStats()}
+        )
+        self._lock = _local_locks.setdefault(location, threading.Lock())
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # The local tier, by full key
+
+    def _local_get_many(self, keys):
+        started = time.perf_counter()
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires, value = entry
+                if expires <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+            self._stats["local"].record(
+                len(found), len(keys) - len(found), time.perf_counter() - started
+            )
+        return found
+
+    def _local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        local_timeout = self._local_timeout
+        expires_at = self.get_backend_timeout(timeout)
+        if expires_at is not None:
+            local_timeout = min(local_timeout, expires_at - time.time())
+        if local_timeout <= 0:
+            self._local_delete(key)
+            return
+        expires = time.monotonic() + local_timeout
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._local_max_entries:
+                self._entries.popitem(last=False)
+
+    def _local_delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    # The shared tier, by full key
+
+    def _shared_get_many(self, keys):
+        started = time.perf_counter()
+        found = self.shared.get_many(keys)
+        self._stats["shared"].record(
+            len(found), len(keys) - len(found), time.perf_counter() - started
+        )
+        return found
+
+    def _full_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    # BaseCache
+
+    def get(self, key, default=None, version=None):
+        key = self._full_key(key, version)
+        found = self._get_many_by_full_key([key])
+        return found.get(key, default)
+
+    def _get_many_by_full_key(self, keys):
+        found = self._local_get_many(keys)
+        missed = [key for key in keys if key not in found]
+        if missed:
+            from_shared = self._shared_get_many(missed)
+            for key, value in from_shared.items():
+                self._local_set(key, value)
+            found.update(from_shared)
+        return found
+
+    def get_many(self, keys, version=None):
+        full_keys = {self._full_key(key, version): key for key in keys}
+        found = self._get_many_by_full_key(list(full_keys))
+        return {full_keys[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._full_key(key, version)
+        self.shared.set(key, value, timeout)
+        self._local_set(key, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        full_keys = {self._full_key(key, version): key for key in data}
+        failed = self.shared.set_many(
+            {key: data[original] for key, original in full_keys.items()}, timeout
+        )
+        for key, original in full_keys.items():
+            if key not in failed:
+                self._local_set(key, data[original], timeout)
+        return [full_keys[key] for key in failed]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._full_key(key, version)
+        added = self.shared.add(key, value, timeout)
+        if added:
+            self._local_set(key, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(self._full_key(key, version), timeout)
+
+    def delete(self, key, version=None):
+        key = self._full_key(key, version)
+        self._local_delete(key)
+        return self.shared.delete(key)
+
+    def delete_many(self, keys, version=None):
+        full_keys = [self._full_key(key, version) for key in keys]
+        self._local_delete(*full_keys)
+        self.shared.delete_many(full_keys)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._full_key(key, version)
+        self._local_delete(key)
+        return self.shared.incr(key, delta)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.shared.clear()
+
+    # Tags
+
+    def _tag_key(self, tag):
+        return self._full_key(f"tag:{tag}", None)
+
+    def _tag_versions(self, tags):
+        tag_keys = {self._tag_key(tag): tag for tag in tags}
+        found = self._get_many_by_full_key(list(tag_keys))
+        return {tag: found.get(key, 0) for key, tag in tag_keys.items()}
+
+    def set_tagged(self, key, value, tags, timeout=DEFAULT_TIMEOUT, version=None):
+        """Set a value that `invalidate_tags()` with any of the given tags will expire"""
+        self.set(key, (self._tag_versions(tags), value), timeout, version)
+
+    def get_tagged(self, key, default=None, version=None):
+        entry = self.get(key, _MISSING, version)
+        if entry is _MISSING:
+            return default
+        tag_versions, value = entry
+        if self._tag_versions(tag_versions) != tag_versions:
+            return default
+        return value
+
+    def invalidate_tags(self, *tags):
+        """Expire every value set with any of the tags, in every worker
+
+        Other workers can still read a value from their local tier for up to
+        `LOCAL_TIMEOUT` seconds.
+        """
+        for tag in tags:
+            key = self._tag_key(tag)
+            self._local_delete(key)
+            try:
+                self.shared.incr(key)
+            except ValueError:
+                # another worker may have added it in the meantime
+                if not self.shared.add(key, 1, None):
+                    self.shared.incr(key)
+
+    def stats(self):
+        """Hit rates and lookup latencies of each tier, in this process"""
+        with self._lock:
+            return {tier: stats.as_dict() for tier, stats in self._stats.items()}
+
+
+def invalidate_on_save(model, get_tags, alias=DEFAULT_CACHE_ALIAS):
+    """Invalidate the tags `get_tags(instance)` returns when `model` is saved or deleted
+
+    The tags are invalidated once the transaction commits, so another request can't cache
+    the data as it was before the change in the meantime.
+    """
+
+    def invalidate(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        tags = list(get_tags(instance))
+        transaction.on_commit(lambda: caches[alias].invalidate_tags(*tags))
+
+    dispatch_uid = f"invalidate_on_save:{alias}:{model._meta.label}"
+    post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=dispatch_uid)
+    post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=dispatch_uid)
@@ -0,0 +1,215 @@
+"""A connection pool that greenlets and threads can share
+
+Waiting for a free connection uses `threading.Condition`, which gevent's monkey patching
+makes cooperative, so a greenlet waiting for a connection lets the others run.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+# this process's pools, by alias and connection parameters
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout"""
+
+
+class PoolStats:
+    def __init__(self):
+        self.created = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.wait_seconds = 0.0
+
+
+class ConnectionPool:
+    """Up to `max_size` connections, handed out most recently returned first
+
+    A connection that has been idle for longer than `max_idle` seconds is closed rather
+    than reused, and one idle for longer than `check_after` seconds is checked with a
+    trivial query first, so connections dropped by the server or a proxy aren't handed out.
+    """
+
+    def __init__(
+        self,
+        alias="",
+        database="",
+        max_size=10,
+        timeout=10.0,
+        max_idle=300.0,
+        check_after=30.0,
+    ):
+        self.alias = alias
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.stats = PoolStats()
+        self.pid = os.getpid()
+        self._condition = threading.Condition()
+        # (connection, time it was returned) pairs
+        self._idle = deque()
+        self._size = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def get(self, connect):
+        """Check out a connection, waiting up to `timeout` seconds for one to be free
+
+        `connect()` is called to open a new connection when none are idle and the pool
+        isn't full.
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats.timeouts += 1
+                        raise PoolTimeout(
+                            f"No connection free after {self.timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    if not waited:
+                        waited = True
+                        self.stats.waits += 1
+                        wait_started = time.monotonic()
+                    self._condition.wait(remaining)
+                if waited:
+                    self.stats.wait_seconds += time.monotonic() - wait_started
+                    waited = False
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    connection, returned_at = None, None
+                    self._size += 1
+
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self._forget()
+                    raise
+                self.stats.created += 1
+            elif not self._usable(connection, time.monotonic() - returned_at):
+                self._discard(connection)
+                continue
+            self.stats.checkouts += 1
+            return connection
+
+    def put(self, connection):
+        """Return a checked out connection, rolling back anything left uncommitted"""
+        if not self._reset(connection):
+            self._discard(connection)
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close(self):
+        """Close the idle connections; checked out ones are closed when returned"""
+        with self._condition:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def _usable(self, connection, idle_for):
+        if connection.closed or idle_for > self.max_idle:
+            return False
+        if idle_for <= self.check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    def _reset(self, connection):
+        if connection.closed:
+            return False
+        try:
+            if not connection.autocommit:
+                connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        self.stats.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def as_dict(self):
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **vars(self.stats),
+            }
+
+
+def get_pool(alias, database, conn_params, pool_settings):
+    """The pool for the connection parameters, made the first time it's needed
+
+    A pool inherited from a parent process is left alone, as its connections belong to
+    the parent, and a new one is made.
+    """
+    key = (
+        alias,
+        tuple(sorted((name, repr(value)) for name, value in conn_params.items())),
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[key] = ConnectionPool(
+                alias=alias,
+                database=database,
+                max_size=pool_settings.get("MAX_SIZE", 10),
+                timeout=pool_settings.get("TIMEOUT", 10),
+                max_idle=pool_settings.get("MAX_IDLE", 300),
+                check_after=pool_settings.get("CHECK_AFTER", 30),
+            )
+        return pool
+
+
+def close_pools(database=None):
+    """Close the idle connections of every pool, or those for one database"""
+    with _pools_lock:
+        pools = [
+            pool
+            for pool in _pools.values()
+            if pool.pid == os.getpid() and database in (None, pool.database)
+        ]
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """Each of this process's pools' size, use and counters, by alias and database"""
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if pool.pid == os.getpid()]
+    return {f"{pool.alias}:{pool.database}": pool.as_dict() for pool in pools}
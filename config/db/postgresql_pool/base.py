@@ -0,0 +1,41 @@
+"""The PostgreSQL backend, with connections kept in a pool per worker process
+
+Use it as the `ENGINE` of a database, with the pool configured by a `POOL` entry:
+
+    "default": {
+        "ENGINE": "config.db.postgresql_pool",
+        ...
+        "POOL": {"MAX_SIZE": 10, "TIMEOUT": 10, "MAX_IDLE": 300, "CHECK_AFTER": 30},
+    }
+
+Closing a connection, which Django does at the end of each request when
+`CONN_MAX_AGE` is 0, returns it to the pool instead.
+"""
+from django.db.backends.postgresql import base
+
+from config.db.pool import get_pool
+from config.db.postgresql_pool.creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias,
+            conn_params.get("database"),
+            conn_params,
+            self.settings_dict.get("POOL", {}),
+        )
+        connection = self.pool.get(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.put(self.connection)
@@ -0,0 +1,19 @@
+from django.db.backends.postgresql import creation
+
+from config.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Close pooled connections before dropping or copying a test database
+
+    Postgres won't do either while anything is connected to the database.
+    """
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        self.connection.close()
+        close_pools(self.connection.settings_dict["NAME"])
+        super()._clone_test_db(suffix, verbosity, keepdb)
@@ -1,6 +1,46 @@
-from psycogreen.gevent import patch_psycopg
+import os
+import shutil
+
+# "wsgi" serves config.wsgi from gevent workers, "asgi" serves config.asgi from uvicorn
+# workers. The Procfile picks the app module the same way.
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+if SERVER_MODE == "asgi":
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    # The app is preloaded in the master, which imports ssl and the like before the gevent
+    # worker would patch them, so patch everything first.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+    worker_class = "gevent"
+    worker_connections = 1000
+
+# Load the app once in the master so that workers fork with it ready to serve, rather
+# than each importing it. Set GUNICORN_PRELOAD=0 to load it in each worker instead.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").lower() not in ("0", "false", "")
 
 
 def post_fork(server, worker):
+    if SERVER_MODE == "asgi":
+        return
+    from psycogreen.gevent import patch_psycopg
+
     patch_psycopg()
     worker.log.info("Enabled async Psycopg2")
+
+
+def on_starting(server):
+    # the counts in METRICS_DIR are this server's workers', so start it empty
+    metrics_dir = os.environ.get("METRICS_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+
+def worker_exit(server, worker):
+    # keep the requests the worker answered since its last snapshot in the totals
+    from healthcheck import metrics
+
+    metrics.flush(force=True)
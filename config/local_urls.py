@@ -1,7 +1,9 @@
 import debug_toolbar
 
+from accounts.views import LoadTestLoginView
 from config.urls import *
 
 urlpatterns += [
     path("__debug__/", include(debug_toolbar.urls)),
+    path("load-test/login/", LoadTestLoginView.as_view(), name="load-test-login"),
 ]
@@ -43,20 +43,23 @@ INSTALLED_APPS = [
     "activity_stream",
     "rest_framework",
     "rest_framework.authtoken",
+    # no longer written to, but its tables hold the history from before the change log
     "reversion",
     "webpack_loader",
     "django.forms",
     "action_progress",
     "chain_details",
-    "simple_history",
+    "change_log",
 ]
 
 # Elastic APM middleware automatically added to trace django requests
 # https://www.elastic.co/guide/en/apm/agent/python/current/configuration.html#config-django-autoinsert-middleware
 
 MIDDLEWARE = [
+    "healthcheck.middleware.ProbeMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "healthcheck.middleware.StatsMiddleware",
     "config.middleware.add_cache_control_header_middleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -64,8 +67,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "reversion.middleware.RevisionMiddleware",
-    "simple_history.middleware.HistoryRequestMiddleware",
+    "change_log.middleware.change_log_user_middleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -101,6 +103,34 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 DATABASES = {"default": env.db()}
 
+# Each worker keeps its database connections in a pool, rather than opening one for every
+# request. MAX_SIZE connections per worker process are shared by its greenlets.
+if env.bool("DATABASE_POOL", default=True):
+    DATABASES["default"]["ENGINE"] = "config.db.postgresql_pool"
+    DATABASES["default"]["POOL"] = {
+        "MAX_SIZE": env.int("DATABASE_POOL_MAX_SIZE", default=10),
+        "TIMEOUT": env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+        "MAX_IDLE": env.float("DATABASE_POOL_MAX_IDLE", default=300.0),
+        "CHECK_AFTER": env.float("DATABASE_POOL_CHECK_AFTER", default=30.0),
+    }
+
+# A small per-process cache in front of one every worker shares, by default a database
+# table (run `createcachetable` to create it). CACHE_URL can point the shared tier
+# elsewhere, e.g. locmemcache:// for a single local process.
+CACHES = {
+    "default": {
+        "BACKEND": "config.cache.TieredCache",
+        "LOCATION": "tiered",
+        "VERSION": env.int("CACHE_VERSION", default=1),
+        "OPTIONS": {
+            "SHARED": "shared",
+            "LOCAL_MAX_ENTRIES": env.int("CACHE_LOCAL_MAX_ENTRIES", default=1000),
+            "LOCAL_TIMEOUT": env.int("CACHE_LOCAL_TIMEOUT", default=5),
+        },
+    },
+    "shared": env.cache_url("CACHE_URL", default="dbcache://django_cache"),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -120,7 +150,7 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
+    "accounts.auth.ModelBackend",
     "accounts.auth.CustomAuthbrokerBackend",
 ]
 
@@ -250,6 +280,21 @@ CSRF_COOKIE_HTTPONLY = env("CSRF_COOKIE_HTTPONLY", default=True)
 SESSION_COOKIE_SECURE = env("SESSION_COOKIE_SECURE", default=True)
 SESSION_COOKIE_AGE = env("SESSION_COOKIE_AGE", default=60 * 60 * 10)
 
+# When CACHE_URL points the shared cache at something other than the database, sessions
+# are read from it, falling back to the database. The shared cache is used rather than the
+# tiered default so that a logout is seen by every worker at once. A shared cache in the
+# database would only put a cache query in front of the session query, so then sessions
+# are read from the database directly. Set SESSION_ENGINE to
+# "django.contrib.sessions.backends.signed_cookies" to keep the session in the cookie and
+# not look it up at all.
+SESSION_ENGINE = env(
+    "SESSION_ENGINE",
+    default="django.contrib.sessions.backends.db"
+    if CACHES["shared"]["BACKEND"] == "django.core.cache.backends.db.DatabaseCache"
+    else "django.contrib.sessions.backends.cached_db",
+)
+SESSION_CACHE_ALIAS = "shared"
+
 # Settings for application performance monitoring
 ELASTIC_APM = {
     "SERVICE_NAME": "update-supply-chain-information",
@@ -259,6 +304,38 @@ ELASTIC_APM = {
     "SERVER_TIMEOUT": env("APM_SERVER_TIMEOUT", default=""),
 }
 
+# Models whose saves are recorded as field-level diffs by the change_log app, which keeps
+# their history in place of django-reversion and django-simple-history
+CHANGE_LOG_MODELS = [
+    "supply_chains.SupplyChain",
+    "supply_chains.StrategicAction",
+    "supply_chains.ScenarioAssessment",
+]
+
+# "wsgi" serves config.wsgi from gevent workers, "asgi" serves config.asgi from uvicorn
+# workers, where the read-only views that load their context concurrently are async
+SERVER_MODE = env("SERVER_MODE", default="wsgi")
+ASYNC_VIEWS = SERVER_MODE == "asgi"
+
+# How long, in seconds, the readiness probe at /readyz reuses each check's result, the
+# share of a connection pool in use at which it reports the worker as not ready, and
+# the cache it checks
+READINESS_DB_TTL = env.float("READINESS_DB_TTL", default=10.0)
+READINESS_CACHE_TTL = env.float("READINESS_CACHE_TTL", default=30.0)
+READINESS_POOL_SATURATION = env.float("READINESS_POOL_SATURATION", default=1.0)
+READINESS_CACHE_ALIAS = "default"
+
+# Bearer token a metrics scraper sends to read /metrics/; staff users can always read it
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+# A directory every worker can write to, ideally in memory, where each keeps a snapshot of
+# its metrics so that /metrics/ reports all the workers' together. Without it each worker
+# reports only its own.
+METRICS_DIR = env("METRICS_DIR", default="")
+
+# Lets load tests log in as local users without Staff SSO. Never set it in a deployed
+# environment; the login URL is only routed by config.local_urls in any case.
+LOAD_TEST_LOGIN = env.bool("LOAD_TEST_LOGIN", default=False)
+
 # Settings for Activity Stream
 
 ACTIVITY_STREAM_APPS = [
@@ -0,0 +1,127 @@
+import time
+import uuid
+from unittest import mock
+
+import pytest
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.test import TestCase, override_settings
+
+from accounts.models import GovDepartment
+from config.cache import TieredCache, invalidate_on_save
+
+
+@pytest.fixture
+def tiered_cache():
+    """A tiered cache in front of a local memory cache, with its own local tier"""
+    location = str(uuid.uuid4())
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "config.cache.TieredCache",
+                "LOCATION": location,
+                "OPTIONS": {
+                    "SHARED": "shared",
+                    "LOCAL_MAX_ENTRIES": 2,
+                    "LOCAL_TIMEOUT": 5,
+                },
+            },
+            "shared": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": location,
+            },
+        }
+    ):
+        yield caches["default"]
+
+
+def later(seconds):
+    """Move the local tier's clock on"""
+    return mock.patch(
+        "config.cache.time.monotonic",
+        mock.Mock(return_value=time.monotonic() + seconds),
+    )
+
+
+def test_default_cache_is_tiered():
+    assert isinstance(caches["default"], TieredCache)
+
+
+def test_reads_are_served_locally(tiered_cache):
+    tiered_cache.set("key", "value")
+
+    assert tiered_cache.get("key") == "value"
+    assert tiered_cache.stats()["local"]["hits"] == 1
+    assert tiered_cache.stats()["shared"]["hits"] == 0
+
+
+def test_misses_are_filled_from_the_shared_tier(tiered_cache):
+    tiered_cache.shared.set(tiered_cache.make_key("key"), "value")
+
+    assert tiered_cache.get("key") == "value"
+    assert tiered_cache.get("key") == "value"
+    stats = tiered_cache.stats()
+    assert (stats["local"]["hits"], stats["local"]["misses"]) == (1, 1)
+    assert (stats["shared"]["hits"], stats["shared"]["misses"]) == (1, 0)
+    assert stats["local"]["hit_rate"] == 0.5
+
+
+def test_other_workers_changes_seen_after_local_timeout(tiered_cache):
+    tiered_cache.set("key", "old")
+    # as another worker would
+    tiered_cache.shared.set(tiered_cache.make_key("key"), "new")
+
+    assert tiered_cache.get("key") == "old"
+    with later(6):
+        assert tiered_cache.get("key") == "new"
+
+
+def test_local_tier_is_bounded(tiered_cache):
+    tiered_cache.set_many({"a": 1, "b": 2, "c": 3})
+
+    assert tiered_cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2, "c": 3}
+    # "a" was evicted locally, so had to come from the shared tier
+    assert tiered_cache.stats()["shared"]["hits"] == 1
+
+
+def test_add_is_decided_by_the_shared_tier(tiered_cache):
+    assert tiered_cache.add("nonce", True)
+    with later(6):
+        assert not tiered_cache.add("nonce", True)
+
+
+def test_versions_are_separate(tiered_cache):
+    tiered_cache.set("key", "one", version=1)
+    tiered_cache.set("key", "two", version=2)
+
+    assert tiered_cache.get("key", version=1) == "one"
+    assert tiered_cache.get("key", version=2) == "two"
+
+
+def test_invalidated_tags_expire_tagged_values(tiered_cache):
+    tiered_cache.set_tagged("summary", "value", ["supply_chain:1"])
+    tiered_cache.set_tagged("other", "value", ["supply_chain:2"])
+
+    tiered_cache.invalidate_tags("supply_chain:1")
+
+    assert tiered_cache.get_tagged("summary", "default") == "default"
+    assert tiered_cache.get_tagged("other") == "value"
+
+
+@pytest.mark.django_db
+def test_invalidate_on_save(tiered_cache):
+    invalidate_on_save(GovDepartment, lambda department: [f"dept:{department.pk}"])
+    try:
+        department = GovDepartment.objects.create(
+            name="Cache department", email_domains=["cache.gov.uk"]
+        )
+        tiered_cache.set_tagged("dept", "value", [f"dept:{department.pk}"])
+
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            department.save()
+
+        assert tiered_cache.get_tagged("dept") is None
+    finally:
+        dispatch_uid = "invalidate_on_save:default:accounts.GovDepartment"
+        post_save.disconnect(sender=GovDepartment, dispatch_uid=dispatch_uid)
+        post_delete.disconnect(sender=GovDepartment, dispatch_uid=dispatch_uid)
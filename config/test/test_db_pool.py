@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.db import connections
+from django.db.utils import load_backend
+
+from config.db.pool import ConnectionPool, PoolTimeout, pool_stats
+
+
+class FakeConnection:
+    def __init__(self, usable=True):
+        self.closed = 0
+        self.autocommit = True
+        self.usable = usable
+        self.rollbacks = 0
+
+    def cursor(self):
+        if not self.usable:
+            raise Exception("server closed the connection unexpectedly")
+        return mock.MagicMock()
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+def later(seconds):
+    """Move the pool's clock on"""
+    now = time.monotonic()
+    return mock.patch(
+        "config.db.pool.time.monotonic", mock.Mock(return_value=now + seconds)
+    )
+
+
+class TestConnectionPool:
+    def test_returned_connections_are_reused(self):
+        pool = ConnectionPool(max_size=2)
+        first = pool.get(FakeConnection)
+        pool.put(first)
+
+        assert pool.get(FakeConnection) is first
+        assert pool.as_dict()["created"] == 1
+        assert pool.as_dict()["checkouts"] == 2
+
+    def test_checkout_times_out_when_full(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.get(FakeConnection)
+
+        with pytest.raises(PoolTimeout):
+            pool.get(FakeConnection)
+        assert pool.as_dict()["timeouts"] == 1
+
+    def test_waiting_checkout_gets_returned_connection(self):
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.get(FakeConnection)
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.get(FakeConnection)))
+        waiter.start()
+
+        pool.put(connection)
+        waiter.join(5)
+
+        assert got == [connection]
+        assert pool.as_dict()["waits"] == 1
+
+    def test_idle_connection_checked_before_reuse(self):
+        pool = ConnectionPool(max_size=1, check_after=30)
+        broken = FakeConnection(usable=False)
+        pool.put(pool.get(lambda: broken))
+
+        with later(60):
+            connection = pool.get(FakeConnection)
+
+        assert connection is not broken
+        assert broken.closed
+        assert pool.as_dict()["discarded"] == 1
+        assert pool.size == 1
+
+    def test_long_idle_connection_closed(self):
+        pool = ConnectionPool(max_size=1, max_idle=300)
+        stale = pool.get(FakeConnection)
+        pool.put(stale)
+
+        with later(600):
+            assert pool.get(FakeConnection) is not stale
+        assert stale.closed
+
+    def test_uncommitted_work_rolled_back_on_return(self):
+        pool = ConnectionPool()
+        connection = pool.get(FakeConnection)
+        connection.autocommit = False
+
+        pool.put(connection)
+
+        assert connection.rollbacks == 1
+        assert pool.idle == 1
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        with pytest.raises(ConnectionError):
+            pool.get(mock.Mock(side_effect=ConnectionError))
+        assert pool.get(FakeConnection)
+
+
+@pytest.mark.django_db
+def test_django_connections_are_pooled():
+    # a second connection to the test database, alongside the test's own
+    settings_dict = connections["default"].settings_dict.copy()
+    backend = load_backend(settings_dict["ENGINE"])
+    wrapper = backend.DatabaseWrapper(settings_dict)
+    try:
+        wrapper.ensure_connection()
+        raw_connection = wrapper.connection
+        created = wrapper.pool.as_dict()["created"]
+        wrapper.close()
+        wrapper.ensure_connection()
+
+        assert wrapper.connection is raw_connection
+        assert wrapper.pool.as_dict()["created"] == created
+        assert f"default:{settings_dict['NAME']}" in pool_stats()
+    finally:
+        wrapper.close()
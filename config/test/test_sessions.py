@@ -0,0 +1,60 @@
+from importlib import import_module
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+pytestmark = pytest.mark.django_db
+
+DATABASE_CACHE = {
+    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+    "LOCATION": "django_cache",
+}
+MEMORY_CACHE = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "sessions",
+}
+
+
+def session_queries(engine, shared_cache, django_assert_num_queries, queries):
+    """Save a session, then assert the queries it takes to read it back"""
+    with override_settings(
+        SESSION_ENGINE=engine,
+        CACHES={**settings.CACHES, "shared": shared_cache},
+    ):
+        SessionStore = import_module(engine).SessionStore
+        session = SessionStore()
+        session["user"] = "someone"
+        session.save()
+
+        with django_assert_num_queries(queries):
+            assert SessionStore(session.session_key)["user"] == "someone"
+
+
+def test_the_database_engine_reads_a_session_in_one_query(django_assert_num_queries):
+    session_queries(
+        "django.contrib.sessions.backends.db",
+        DATABASE_CACHE,
+        django_assert_num_queries,
+        1,
+    )
+
+
+def test_a_cache_outside_the_database_reads_a_session_without_a_query(
+    django_assert_num_queries,
+):
+    session_queries(
+        "django.contrib.sessions.backends.cached_db",
+        MEMORY_CACHE,
+        django_assert_num_queries,
+        0,
+    )
+
+
+def test_a_cache_in_the_database_saves_no_queries(django_assert_num_queries):
+    session_queries(
+        "django.contrib.sessions.backends.cached_db",
+        DATABASE_CACHE,
+        django_assert_num_queries,
+        1,
+    )
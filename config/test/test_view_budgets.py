@@ -0,0 +1,358 @@
+"""Query and time budgets for every view, over a dataset big enough to show N+1 queries
+
+Each view is requested twice, and the queries the second request made and the time it
+took are compared with the view's budget. A view making a query per row would
+go over its budget by at least the number of rows.
+
+Set VIEW_BUDGET_REPORT to a path to write the measurements there as JSON, to compare
+between commits.
+"""
+import json
+import os
+import time
+from datetime import date
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+from accounts.test.factories import UserFactory
+from activity_stream.test.util.hawk import get_hawk_header
+from config import urls
+from supply_chains.admin import admin_site
+from supply_chains.models import StrategicActionUpdate
+from supply_chains.test.factories import (
+    ScenarioAssessmentFactory,
+    StrategicActionFactory,
+    StrategicActionUpdateFactory,
+    SupplyChainFactory,
+    SupplyChainStageFactory,
+    SupplyChainStageSectionFactory,
+    SupplyChainUmbrellaFactory,
+    VulAssessmentDeliverStageFactory,
+    VulAssessmentMakeStageFactory,
+    VulAssessmentReceiveStageFactory,
+    VulAssessmentStoreStageFactory,
+    VulAssessmentSupplyStageFactory,
+    VulnerabilityAssessmentFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+Status = StrategicActionUpdate.Status
+
+SUPPLY_CHAINS = 8
+UMBRELLA_SUPPLY_CHAINS = 3
+STRATEGIC_ACTIONS = 5
+MONTHS_OF_UPDATES = 3
+
+STAGE_FACTORIES = [
+    VulAssessmentSupplyStageFactory,
+    VulAssessmentReceiveStageFactory,
+    VulAssessmentMakeStageFactory,
+    VulAssessmentStoreStageFactory,
+    VulAssessmentDeliverStageFactory,
+]
+
+# generous, so that only a view that has become much slower fails
+SECONDS_BUDGET = 2.0
+
+# The most queries each view may make, by the label of its case in `VIEW_CASES`. Lower
+# a budget when a view gets cheaper, so that it can't creep back up.
+QUERY_BUDGETS = {
+    "action-progress": 4,
+    "action-progress-department": 7,
+    "action-progress-detail": 7,
+    "action-progress-list": 12,
+    "activity-stream-list": 8,
+    "admin:index": 3,
+    "chain-details": 4,
+    "chain-details-info": 7,
+    "chain-details-list": 7,
+    "department-summary": 4,
+    "healthcheck": 3,
+    "index": 3,
+    "metrics": 2,
+    "monthly-update-create": 8,
+    "monthly-update-info-edit": 11,
+    "monthly-update-review": 7,
+    "monthly-update-revised-timing-edit": 10,
+    "monthly-update-status-edit": 11,
+    "monthly-update-summary": 10,
+    "monthly-update-timing-edit": 10,
+    "privacy": 3,
+    "sc-home": 7,
+    "strategic-action-summary": 8,
+    "supply-chain-summary": 5,
+    "supply-chain-summary (supply chain)": 5,
+    # a query per strategic action, in `SCTaskListView._get_sa_update_list()`
+    "supply-chain-task-list": 15,
+    "supply-chain-task-list (umbrella)": 35,
+    "supply-chain-update-complete": 7,
+    "admin:accounts_govdepartment_changelist": 5,
+    "admin:accounts_user_changelist": 5,
+    "admin:supply_chains_country_changelist": 5,
+    "admin:supply_chains_countrydependency_changelist": 7,
+    "admin:supply_chains_scenarioassessment_changelist": 15,
+    "admin:supply_chains_strategicaction_changelist": 7,
+    # a query per update for its strategic action and supply chain
+    "admin:supply_chains_strategicactionupdate_changelist": 47,
+    "admin:supply_chains_supplychain_changelist": 5,
+    "admin:supply_chains_supplychaincriticality_changelist": 5,
+    "admin:supply_chains_supplychainmaturity_changelist": 5,
+    "admin:supply_chains_supplychainstage_changelist": 6,
+    "admin:supply_chains_supplychainumbrella_changelist": 7,
+    "admin:supply_chains_vulnerabilityassessment_changelist": 15,
+}
+
+# the URLs of `config.urls` not requested, by name
+UNBUDGETED_URLS = {
+    # Hawk authenticated requests have no user, so IsAuthenticated always refuses them
+    "api-root",
+    # only routed by `config.local_urls`, for load tests to log in with
+    "load-test-login",
+}
+
+
+def seed(user):
+    """Supply chains for the user's department, some under an umbrella, with months of updates"""
+    today = date.today()
+    # mid-month, so no update falls after its month's last working day and into the
+    # next month's reporting period
+    mid_month = today.replace(day=15)
+    department = user.gov_department
+    umbrella = SupplyChainUmbrellaFactory(gov_department=department)
+    supply_chains = []
+    for i in range(SUPPLY_CHAINS):
+        supply_chain = SupplyChainFactory(
+            gov_department=department,
+            supply_chain_umbrella=umbrella if i < UMBRELLA_SUPPLY_CHAINS else None,
+        )
+        supply_chains.append(supply_chain)
+        ScenarioAssessmentFactory(supply_chain=supply_chain)
+        vulnerability = VulnerabilityAssessmentFactory(supply_chain=supply_chain)
+        for stage_factory in STAGE_FACTORIES:
+            stage_factory(vulnerability=vulnerability)
+        SupplyChainStageSectionFactory(
+            chain_stage=SupplyChainStageFactory(supply_chain=supply_chain)
+        )
+        for _ in range(STRATEGIC_ACTIONS):
+            strategic_action = StrategicActionFactory(supply_chain=supply_chain)
+            for month in range(1, MONTHS_OF_UPDATES + 1):
+                date_created = mid_month - relativedelta(months=month)
+                StrategicActionUpdateFactory(
+                    strategic_action=strategic_action,
+                    supply_chain=supply_chain,
+                    user=user,
+                    status=Status.SUBMITTED,
+                    date_created=date_created,
+                    submission_date=date_created,
+                )
+
+    # one action with an update being written this month and one with it submitted
+    supply_chain = supply_chains[-1]
+    in_progress, submitted = supply_chain.strategic_actions.all()[:2]
+    in_progress_update = StrategicActionUpdateFactory(
+        strategic_action=in_progress,
+        supply_chain=supply_chain,
+        user=user,
+        status=Status.IN_PROGRESS,
+        submission_date=None,
+    )
+    submitted_update = StrategicActionUpdateFactory(
+        strategic_action=submitted,
+        supply_chain=supply_chain,
+        user=user,
+        status=Status.SUBMITTED,
+        submission_date=today,
+    )
+    return {
+        "dept": department.name,
+        "umbrella": umbrella.slug,
+        "supply_chain": supply_chain.slug,
+        "in_progress_action": in_progress.slug,
+        "in_progress_update": in_progress_update.slug,
+        "submitted_action": submitted.slug,
+        "submitted_update": submitted_update.slug,
+    }
+
+
+SUPPLY_CHAIN = {"supply_chain_slug": "supply_chain"}
+IN_PROGRESS_UPDATE = {
+    "supply_chain_slug": "supply_chain",
+    "action_slug": "in_progress_action",
+    "update_slug": "in_progress_update",
+}
+
+# the label, URL name and URL kwargs of each request, with the kwargs naming values
+# returned by `seed()`
+VIEW_CASES = [
+    ("index", "index", {}),
+    ("privacy", "privacy", {}),
+    ("healthcheck", "healthcheck", {}),
+    ("metrics", "metrics", {}),
+    ("activity-stream-list", "activity-stream-list", {}),
+    ("sc-home", "sc-home", {}),
+    ("supply-chain-summary", "supply-chain-summary", {}),
+    ("supply-chain-summary (supply chain)", "supply-chain-summary", SUPPLY_CHAIN),
+    ("department-summary", "department-summary", {}),
+    ("supply-chain-task-list", "supply-chain-task-list", SUPPLY_CHAIN),
+    (
+        "supply-chain-task-list (umbrella)",
+        "supply-chain-task-list",
+        {"supply_chain_slug": "umbrella"},
+    ),
+    ("supply-chain-update-complete", "supply-chain-update-complete", SUPPLY_CHAIN),
+    ("strategic-action-summary", "strategic-action-summary", SUPPLY_CHAIN),
+    (
+        "monthly-update-create",
+        "monthly-update-create",
+        {"supply_chain_slug": "supply_chain", "action_slug": "in_progress_action"},
+    ),
+    ("monthly-update-info-edit", "monthly-update-info-edit", IN_PROGRESS_UPDATE),
+    ("monthly-update-timing-edit", "monthly-update-timing-edit", IN_PROGRESS_UPDATE),
+    ("monthly-update-status-edit", "monthly-update-status-edit", IN_PROGRESS_UPDATE),
+    (
+        "monthly-update-revised-timing-edit",
+        "monthly-update-revised-timing-edit",
+        IN_PROGRESS_UPDATE,
+    ),
+    ("monthly-update-summary", "monthly-update-summary", IN_PROGRESS_UPDATE),
+    (
+        "monthly-update-review",
+        "monthly-update-review",
+        {
+            "supply_chain_slug": "supply_chain",
+            "action_slug": "submitted_action",
+            "update_slug": "submitted_update",
+        },
+    ),
+    ("action-progress", "action-progress", {}),
+    ("action-progress-department", "action-progress-department", {"dept": "dept"}),
+    (
+        "action-progress-list",
+        "action-progress-list",
+        {"dept": "dept", "supply_chain_slug": "supply_chain"},
+    ),
+    (
+        "action-progress-detail",
+        "action-progress-detail",
+        {
+            "dept": "dept",
+            "supply_chain_slug": "supply_chain",
+            "action_slug": "in_progress_action",
+        },
+    ),
+    ("chain-details", "chain-details", {}),
+    ("chain-details-list", "chain-details-list", {"dept": "dept"}),
+    (
+        "chain-details-info",
+        "chain-details-info",
+        {"dept": "dept", "supply_chain_slug": "supply_chain"},
+    ),
+    ("admin:index", "admin:index", {}),
+    *(
+        (name, name, {})
+        for name in (
+            f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist"
+            for model in admin_site._registry
+        )
+    ),
+]
+
+
+# the login and admin URLs belong to other URLconfs, and `config.local_urls` adds the
+# debug toolbar's and the load test login to `config.urls.urlpatterns` when it is imported
+EXCLUDED_PREFIXES = ("auth/", "admin/", "__debug__/")
+
+
+def url_names(patterns, excluded_prefixes=EXCLUDED_PREFIXES):
+    """The names of the URLs in the patterns, leaving out those under the prefixes"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if str(pattern.pattern) not in excluded_prefixes:
+                yield from url_names(pattern.url_patterns, excluded_prefixes)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.name
+
+
+def request_headers(path):
+    # the API only accepts Hawk authenticated requests
+    if path.startswith("/api/"):
+        return {
+            "HTTP_AUTHORIZATION": get_hawk_header(
+                access_key_id="xxx",
+                secret_access_key="xxx",
+                method="GET",
+                host="testserver",
+                port="80",
+                path=path,
+                content_type=b"",
+                content=b"",
+            )
+        }
+    return {}
+
+
+def measure(client, path):
+    # the first request fills the caches, so that the second shows the steady state
+    client.get(path, **request_headers(path))
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(path, **request_headers(path))
+        seconds = time.perf_counter() - started
+    return {
+        "status": response.status_code,
+        "queries": len(queries),
+        "seconds": round(seconds, 4),
+    }
+
+
+def write_report(results):
+    report_path = os.environ.get("VIEW_BUDGET_REPORT")
+    if not report_path:
+        return
+    with open(report_path, "w") as report:
+        json.dump(results, report, indent=2, sort_keys=True)
+        report.write("\n")
+
+
+def test_every_url_has_a_budget():
+    requested = {url_name for _, url_name, _ in VIEW_CASES}
+    missing = set(url_names(urls.urlpatterns)) - requested - UNBUDGETED_URLS
+    assert missing == set()
+    assert set(QUERY_BUDGETS) == {label for label, _, _ in VIEW_CASES}
+
+
+def test_views_stay_within_budgets():
+    user = UserFactory(is_staff=True, is_superuser=True)
+    data = seed(user)
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    over_budget = []
+    for label, url_name, kwargs in VIEW_CASES:
+        path = reverse(
+            url_name, kwargs={kwarg: data[key] for kwarg, key in kwargs.items()}
+        )
+        result = measure(client, path)
+        result["query_budget"] = QUERY_BUDGETS.get(label)
+        result["seconds_budget"] = SECONDS_BUDGET
+        results[label] = result
+        if result["status"] >= 400:
+            over_budget.append(f"{label}: responded {result['status']}")
+        if result["query_budget"] is None or result["queries"] > result["query_budget"]:
+            over_budget.append(
+                f"{label}: {result['queries']} queries, budget {result['query_budget']}"
+            )
+        if result["seconds"] > SECONDS_BUDGET:
+            over_budget.append(
+                f"{label}: {result['seconds']:.2f}s, budget {SECONDS_BUDGET:.2f}s"
+            )
+    write_report(results)
+
+    assert over_budget == []
@@ -1,9 +1,7 @@
 from django.urls import path, include
-from django.utils.decorators import decorator_from_middleware
 from rest_framework import routers
 
-from healthcheck.middleware import StatsMiddleware
-from healthcheck.views import HealthCheckView
+from healthcheck.views import HealthCheckView, MetricsView
 from supply_chains.admin import admin_site
 from supply_chains.views import (
     HomePageView,
@@ -12,6 +10,7 @@ from supply_chains.views import (
     SCCompleteView,
     SASummaryView,
     SCSummary,
+    DepartmentSummaryView,
     SAUReview,
     MonthlyUpdateInfoCreateView,
     MonthlyUpdateInfoEditView,
@@ -97,6 +96,11 @@ strategic_action_urlpatterns = [
 supply_chain_urlpatterns = [
     path("", SCHomePageView.as_view(), name="sc-home"),
     path("summary/", SCSummary.as_view(), name="supply-chain-summary"),
+    path(
+        "department-summary/",
+        DepartmentSummaryView.as_view(),
+        name="department-summary",
+    ),
     path(
         "<slug:supply_chain_slug>/",
         include(
@@ -115,11 +119,8 @@ supply_chain_urlpatterns = [
 ]
 
 healthcheck_urlpatterns = [
-    path(
-        "healthcheck/",
-        decorator_from_middleware(StatsMiddleware)(HealthCheckView.as_view()),
-        name="healthcheck",
-    )
+    path("healthcheck/", HealthCheckView.as_view(), name="healthcheck"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
 
 action_progress_urlpatterns = [
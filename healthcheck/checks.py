@@ -1,8 +1,20 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
 from sentry_sdk import capture_exception
 
 from healthcheck.constants import HealthStatus
 from healthcheck.models import HealthCheck
 
+READINESS_CACHE_KEY = "healthcheck:readiness"
+
+# the latest result of each check, by name, kept for its TTL
+_results = {}
+_results_lock = threading.Lock()
+
 
 def db_check():
     """
@@ -15,3 +27,71 @@ def db_check():
     except Exception as e:
         capture_exception(e)
         return HealthStatus.FAIL
+
+
+def cached_check(name, ttl, check):
+    """The result of `check()`, run at most once every `ttl` seconds in this process"""
+    now = time.monotonic()
+    with _results_lock:
+        result = _results.get(name)
+    if result is not None and result[0] > now:
+        return result[1]
+    status = check()
+    with _results_lock:
+        _results[name] = (now + ttl, status)
+    return status
+
+
+def clear_cached_checks():
+    with _results_lock:
+        _results.clear()
+
+
+def database_check():
+    """Whether every database answers a query"""
+    try:
+        for connection in connections.all():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        return HealthStatus.OK
+    except Exception as e:
+        capture_exception(e)
+        return HealthStatus.FAIL
+
+
+def pool_check():
+    """Whether every connection pool still has a connection to give, or room for one"""
+    # the pools are only there when the pooled database backend is configured
+    from config.db.pool import pool_stats
+
+    for stats in pool_stats().values():
+        if stats["in_use"] >= stats["max_size"] * settings.READINESS_POOL_SATURATION:
+            return HealthStatus.FAIL
+    return HealthStatus.OK
+
+
+def cache_check():
+    """Whether a value can be written to the cache and read back"""
+    try:
+        cache = caches[settings.READINESS_CACHE_ALIAS]
+        value = time.time()
+        cache.set(READINESS_CACHE_KEY, value, 60)
+        if cache.get(READINESS_CACHE_KEY) != value:
+            return HealthStatus.FAIL
+        return HealthStatus.OK
+    except Exception as e:
+        capture_exception(e)
+        return HealthStatus.FAIL
+
+
+def readiness():
+    """The status of each thing a worker needs to serve requests, by name
+
+    The database and cache checks are cached for `READINESS_DB_TTL` and
+    `READINESS_CACHE_TTL` seconds, so frequent probes don't each make queries.
+    """
+    return {
+        "database": cached_check("database", settings.READINESS_DB_TTL, database_check),
+        "pool": pool_check(),
+        "cache": cached_check("cache", settings.READINESS_CACHE_TTL, cache_check),
+    }
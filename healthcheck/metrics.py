@@ -0,0 +1,288 @@
+"""Request metrics, rendered in the Prometheus text format
+
+Each gunicorn worker keeps its own. With `METRICS_DIR` set, every worker writes a snapshot
+of them to a file there, and a scrape answered by any worker adds up the snapshots of them
+all. Without it a scrape sees only the worker that answered it, so every series is
+labelled with that worker's pid.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+
+# seconds, from 5ms to 10s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, for each combination of labels"""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "sum": 0,
+                    "count": 0,
+                }
+            series["buckets"][bucket] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """A copy of every series, by label values"""
+        with self._lock:
+            return {
+                key: {**value, "buckets": list(value["buckets"])}
+                for key, value in self._series.items()
+            }
+
+    def collect(self, series=None, extra_labels=()):
+        """The histogram's samples, from `series` when given, or else this process's"""
+        if series is None:
+            series = self.snapshot()
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for key, value in sorted(series.items()):
+            labels = [*zip(self.labelnames, key), *extra_labels]
+            cumulative = 0
+            for upper, count in zip((*self.buckets, float("inf")), value["buckets"]):
+                cumulative += count
+                bucket_labels = _format_labels([*labels, ("le", _format_value(upper))])
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}"
+            yield f"{self.name}_count{_format_labels(labels)} {value['count']}"
+
+
+def _samples(name, metric_type, documentation, samples):
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {metric_type}"
+    for labels, value in samples:
+        yield f"{name}{_format_labels(labels)} {_format_value(value)}"
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time taken to respond to a request, by view",
+    ["view", "method", "status"],
+    LATENCY_BUCKETS,
+)
+request_db_queries = Histogram(
+    "http_request_db_queries",
+    "Database queries made in responding to a request, by view",
+    ["view"],
+    QUERY_COUNT_BUCKETS,
+)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries in responding to a request, by view",
+    ["view"],
+    LATENCY_BUCKETS,
+)
+response_size = Histogram(
+    "http_response_size_bytes",
+    "Size of the response body, by view",
+    ["view"],
+    SIZE_BUCKETS,
+)
+HISTOGRAMS = [request_duration, request_db_queries, request_db_duration, response_size]
+
+POOL_METRICS = [
+    ("size", "gauge", "Connections open in the pool"),
+    ("in_use", "gauge", "Connections checked out of the pool"),
+    ("idle", "gauge", "Connections waiting in the pool to be used"),
+    ("waits", "counter", "Times a connection was waited for"),
+    ("timeouts", "counter", "Times no connection became free in time"),
+]
+
+
+def _cache_samples():
+    for alias in caches:
+        stats = getattr(caches[alias], "stats", None)
+        if stats is None:
+            continue
+        for tier, tier_stats in stats().items():
+            yield alias, tier, tier_stats
+
+
+def _pool_samples():
+    # the pools are only there when the pooled database backend is configured
+    from config.db.pool import pool_stats
+
+    for pool, stats in pool_stats().items():
+        yield pool, stats
+
+
+def _snapshot():
+    """This process's metrics, as a document other workers can read"""
+    return {
+        "pid": os.getpid(),
+        "histograms": {
+            histogram.name: [
+                [list(key), value] for key, value in histogram.snapshot().items()
+            ]
+            for histogram in HISTOGRAMS
+        },
+        "caches": [
+            [alias, tier, {"hits": stats["hits"], "misses": stats["misses"]}]
+            for alias, tier, stats in _cache_samples()
+        ],
+        "pools": [[pool, stats] for pool, stats in _pool_samples()],
+    }
+
+
+_flushed = {"at": 0.0}
+
+
+def flush(force=False):
+    """Write this process's snapshot to `METRICS_DIR`, at most once a second unless forced"""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _flushed["at"] < 1:
+        return
+    _flushed["at"] = now
+    path = Path(directory) / f"{os.getpid()}.json"
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(_snapshot()))
+    # replaced in one step, so a reader never sees half a snapshot
+    os.replace(temporary, path)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _snapshots():
+    flush(force=True)
+    snapshots = []
+    for path in Path(settings.METRICS_DIR).glob("*.json"):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # the worker's file went, or the worker was killed as it wrote it
+            continue
+    return snapshots
+
+
+def _merged(snapshots):
+    """The snapshots' histograms and cache counters added up across workers
+
+    The counts of workers that have since exited are kept, so the totals never go down,
+    but their connection pools are gone, so only running workers' pools are reported.
+    """
+    histograms = {histogram.name: {} for histogram in HISTOGRAMS}
+    cache_stats = {}
+    pools = []
+    for snapshot in snapshots:
+        for name, series in snapshot["histograms"].items():
+            merged = histograms.setdefault(name, {})
+            for key, value in series:
+                total = merged.setdefault(
+                    tuple(key),
+                    {"buckets": [0] * len(value["buckets"]), "sum": 0, "count": 0},
+                )
+                total["buckets"] = [
+                    count + added
+                    for count, added in zip(total["buckets"], value["buckets"])
+                ]
+                total["sum"] += value["sum"]
+                total["count"] += value["count"]
+        for alias, tier, stats in snapshot["caches"]:
+            total = cache_stats.setdefault((alias, tier), {"hits": 0, "misses": 0})
+            total["hits"] += stats["hits"]
+            total["misses"] += stats["misses"]
+        if _is_running(snapshot["pid"]):
+            pools.extend(
+                (str(snapshot["pid"]), pool, stats) for pool, stats in snapshot["pools"]
+            )
+    return histograms, cache_stats, pools
+
+
+def collect():
+    """Every metric, in the Prometheus text exposition format"""
+    if settings.METRICS_DIR:
+        histograms, cache_stats, pools = _merged(_snapshots())
+        worker_labels = []
+    else:
+        histograms = {histogram.name: None for histogram in HISTOGRAMS}
+        cache_stats = {(alias, tier): stats for alias, tier, stats in _cache_samples()}
+        pools = [(str(os.getpid()), pool, stats) for pool, stats in _pool_samples()]
+        worker_labels = [("worker", str(os.getpid()))]
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.collect(histograms[histogram.name], worker_labels))
+
+    for stat in ["hits", "misses"]:
+        lines.extend(
+            _samples(
+                f"cache_{stat}_total",
+                "counter",
+                f"Cache {stat}, by cache and tier",
+                [
+                    ([("cache", alias), ("tier", tier), *worker_labels], stats[stat])
+                    for (alias, tier), stats in cache_stats.items()
+                ],
+            )
+        )
+
+    # a pool belongs to one worker, so each worker's is reported on its own
+    for stat, metric_type, documentation in POOL_METRICS:
+        lines.extend(
+            _samples(
+                f"db_pool_{stat}",
+                metric_type,
+                documentation,
+                [
+                    ([("pool", pool), ("worker", worker)], stats[stat])
+                    for worker, pool, stats in pools
+                ],
+            )
+        )
+    return "\n".join(lines) + "\n"
@@ -1,10 +1,190 @@
+import asyncio
+import json
+import threading
 import time
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+from healthcheck import metrics
+from healthcheck.checks import readiness
+from healthcheck.constants import HealthStatus
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# The stats of the request being handled. Context variables follow the request into the
+# threads `sync_to_async` runs its work on, such as the loaders of an async view, each of
+# which has database connections of its own.
+current_query_stats = ContextVar("query_stats", default=None)
+
+
+class QueryStats:
+    """The number of queries a request made and the time they took"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+
+
+def count_queries(execute, sql, params, many, context):
+    """An execute wrapper adding each query to the current request's `QueryStats`"""
+    queries = current_query_stats.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.record(time.perf_counter() - started)
+
+
+def counted(connection, **kwargs):
+    """Have `count_queries` wrap the connection's queries, once"""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+# a thread's connections are made when it first queries, so this catches those of threads
+# started for the request
+connection_created.connect(counted, dispatch_uid="healthcheck_count_queries")
+
+
+def async_capable(middleware):
+    """Mark a middleware instance as a coroutine function when the rest of the stack is async
+
+    Django 3.2 has no `markcoroutinefunction`; this is what its `MiddlewareMixin` does.
+    """
+    if asyncio.iscoroutinefunction(middleware.get_response):
+        middleware._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+def view_name(request):
+    """The dotted path of the view that handled the request"""
+    resolver_match = getattr(request, "resolver_match", None)
+    if resolver_match is None:
+        return "unresolved"
+    return resolver_match._func_path
 
 
 class StatsMiddleware:
+    """Time each request, and record its latency, queries and response size by view
+
+    `request.start_time` is set for the health check to report its response time.
+    Queries are counted on whichever thread makes them, so those made by an async view's
+    concurrent loaders are included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        async_capable(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        for connection in connections.all():
+            counted(connection)
+        started, queries, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, started, queries)
+        return response
 
-    def process_request(self, request):
-        """Start time at request coming in"""
+    async def __acall__(self, request):
+        started, queries, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, started, queries)
+        return response
+
+    def start(self, request):
         request.start_time = time.time()
+        queries = QueryStats()
+        return time.perf_counter(), queries, current_query_stats.set(queries)
+
+    def record(self, request, response, started, queries):
+        duration = time.perf_counter() - started
+        view = view_name(request)
+        method = request.method if request.method in METHODS else "other"
+        metrics.request_duration.observe(
+            duration, view=view, method=method, status=str(response.status_code)
+        )
+        metrics.request_db_queries.observe(queries.count, view=view)
+        metrics.request_db_duration.observe(queries.seconds, view=view)
+        if not response.streaming:
+            metrics.response_size.observe(len(response.content), view=view)
+        metrics.flush()
+
+
+def probe_response(content, status, content_type):
+    response = HttpResponse(content, status=status, content_type=content_type)
+    response["Cache-Control"] = "no-cache, no-store, must-revalidate"
+    return response
+
+
+def live_response():
+    return probe_response(HealthStatus.OK, 200, "text/plain")
+
+
+def ready_response(checks):
+    ready = all(status == HealthStatus.OK for status in checks.values())
+    return probe_response(
+        json.dumps(
+            {
+                "status": HealthStatus.OK if ready else HealthStatus.FAIL,
+                "checks": checks,
+            }
+        ),
+        200 if ready else 503,
+        "application/json",
+    )
+
+
+class ProbeMiddleware:
+    """Answer the platform's liveness and readiness probes before any other middleware
+
+    `/livez` says the process is serving requests, touching neither the database nor the
+    cache. `/readyz` says whether it can serve them: the databases answer, the connection
+    pools aren't saturated and the cache works. Neither goes through sessions, CSRF,
+    the change log or the request metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        async_capable(self)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        path = request.path_info.rstrip("/")
+        if path == "/livez":
+            return live_response()
+        if path == "/readyz":
+            return ready_response(readiness())
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        path = request.path_info.rstrip("/")
+        if path == "/livez":
+            return live_response()
+        if path == "/readyz":
+            return ready_response(await sync_to_async(readiness)())
+        return await self.get_response(request)
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotFound
+from django.test import AsyncClient, Client, RequestFactory
+from django.urls import reverse
+
+from accounts.test.factories import UserFactory
+from healthcheck import metrics
+from healthcheck.middleware import StatsMiddleware
+from healthcheck.models import HealthCheck
+
+HEALTHCHECK_VIEW = 'view="healthcheck.views.HealthCheckView"'
+WORKER = f'worker="{os.getpid()}"'
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    for histogram in metrics.HISTOGRAMS:
+        histogram.clear()
+    yield
+
+
+@pytest.fixture
+def metrics_token(settings):
+    settings.METRICS_TOKEN = "scraper-token"
+    yield "scraper-token"
+
+
+def get_metrics(client=None, **headers):
+    client = client or Client()
+    return client.get(reverse("metrics"), **headers)
+
+
+class TestHistogram:
+    def test_renders_cumulative_buckets(self):
+        histogram = metrics.Histogram("test_seconds", "A test", ["view"], [1, 5])
+        histogram.observe(0.5, view="a")
+        histogram.observe(3, view="a")
+        histogram.observe(10, view="a")
+
+        assert list(histogram.collect()) == [
+            "# HELP test_seconds A test",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{view="a",le="1"} 1',
+            'test_seconds_bucket{view="a",le="5"} 2',
+            'test_seconds_bucket{view="a",le="+Inf"} 3',
+            'test_seconds_sum{view="a"} 13.5',
+            'test_seconds_count{view="a"} 3',
+        ]
+
+    def test_escapes_label_values(self):
+        histogram = metrics.Histogram("test_seconds", "A test", ["view"], [1])
+        histogram.observe(1, view='say "hi"\n')
+
+        assert 'test_seconds_count{view="say \\"hi\\"\\n"} 1' in list(
+            histogram.collect()
+        )
+
+
+@pytest.mark.django_db()
+class TestStatsMiddleware:
+    def test_records_latency_queries_and_size_by_view(self, metrics_token):
+        HealthCheck.objects.create(health_check_field=True)
+        response = Client().get(reverse("healthcheck"))
+
+        res = get_metrics(HTTP_AUTHORIZATION=f"Bearer {metrics_token}").content.decode()
+
+        labels = f'{{{HEALTHCHECK_VIEW},method="GET",status="200",{WORKER}}}'
+        assert f"http_request_duration_seconds_count{labels} 1" in res
+        assert f"http_request_db_queries_sum{{{HEALTHCHECK_VIEW},{WORKER}}} 1" in res
+        assert (
+            f"http_request_db_duration_seconds_count{{{HEALTHCHECK_VIEW},{WORKER}}} 1"
+            in res
+        )
+        assert (
+            f"http_response_size_bytes_sum{{{HEALTHCHECK_VIEW},{WORKER}}} "
+            f"{len(response.content)}" in res
+        )
+
+    def test_records_unresolved_requests(self):
+        middleware = StatsMiddleware(lambda request: HttpResponseNotFound())
+
+        middleware(RequestFactory().get("/no-such-page/"))
+
+        assert (
+            'http_request_duration_seconds_count{view="unresolved",method="GET",'
+            f'status="404",{WORKER}}} 1' in metrics.collect()
+        )
+
+    def test_records_requests_served_over_asgi(self, metrics_token):
+        async def get():
+            return await AsyncClient().get(reverse("healthcheck"))
+
+        async_to_sync(get)()
+
+        res = get_metrics(HTTP_AUTHORIZATION=f"Bearer {metrics_token}").content.decode()
+
+        assert f"http_request_db_queries_sum{{{HEALTHCHECK_VIEW},{WORKER}}} 1" in res
+
+
+# the queries are made on connections of their own, so they need the test data committed
+@pytest.mark.django_db(transaction=True)
+def test_counts_queries_made_on_other_threads():
+    def query():
+        try:
+            return HealthCheck.objects.count()
+        finally:
+            connections.close_all()
+
+    async def view(request):
+        await asyncio.gather(
+            *(sync_to_async(query, thread_sensitive=False)() for _ in range(2))
+        )
+        return HttpResponse()
+
+    middleware = StatsMiddleware(view)
+
+    assert asyncio.iscoroutinefunction(middleware)
+
+    async def request():
+        return await middleware(RequestFactory().get("/no-such-page/"))
+
+    async_to_sync(request)()
+
+    assert (
+        f'http_request_db_queries_sum{{view="unresolved",{WORKER}}} 2'
+        in metrics.collect()
+    )
+
+
+@pytest.mark.django_db()
+class TestMetricsView:
+    def test_forbidden_without_token(self, metrics_token):
+        assert get_metrics().status_code == 403
+
+    def test_forbidden_with_wrong_token(self, metrics_token):
+        response = get_metrics(HTTP_AUTHORIZATION="Bearer wrong")
+        assert response.status_code == 403
+
+    def test_forbidden_when_no_token_is_configured(self, settings):
+        settings.METRICS_TOKEN = ""
+        assert get_metrics(HTTP_AUTHORIZATION="Bearer ").status_code == 403
+
+    def test_forbidden_for_non_staff_users(self, logged_in_client):
+        assert get_metrics(logged_in_client).status_code == 403
+
+    def test_open_to_staff_users(self):
+        client = Client()
+        client.force_login(UserFactory(is_staff=True))
+
+        response = get_metrics(client)
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+
+    def test_includes_cache_stats(self, metrics_token):
+        res = get_metrics(HTTP_AUTHORIZATION=f"Bearer {metrics_token}").content.decode()
+
+        assert f'cache_hits_total{{cache="default",tier="local",{WORKER}}}' in res
+        assert "# TYPE db_pool_in_use gauge" in res
+
+
+class TestWorkersTogether:
+    @pytest.fixture(autouse=True)
+    def metrics_dir(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        yield tmp_path
+
+    def exited_worker(self, metrics_dir):
+        snapshot = {
+            "pid": 2**22 + 1,
+            "histograms": {
+                "http_response_size_bytes": [
+                    [
+                        ["unresolved"],
+                        {"buckets": [1] + [0] * 8, "sum": 100, "count": 1},
+                    ]
+                ]
+            },
+            "caches": [["default", "local", {"hits": 5, "misses": 1}]],
+            "pools": [["default:db", {stat: 1 for stat, _, _ in metrics.POOL_METRICS}]],
+        }
+        (metrics_dir / f"{snapshot['pid']}.json").write_text(json.dumps(snapshot))
+
+    def test_adds_up_every_workers_requests(self, metrics_dir):
+        self.exited_worker(metrics_dir)
+        metrics.response_size.observe(200, view="unresolved")
+
+        res = metrics.collect()
+
+        assert 'http_response_size_bytes_count{view="unresolved"} 2' in res
+        assert 'http_response_size_bytes_sum{view="unresolved"} 300' in res
+        assert 'http_response_size_bytes_bucket{view="unresolved",le="256"} 2' in res
+        assert 'cache_hits_total{cache="default",tier="local"}' in res
+        assert "worker=" not in res.split("# HELP db_pool_size")[0]
+
+    def test_reports_only_running_workers_pools(self, metrics_dir):
+        self.exited_worker(metrics_dir)
+
+        res = metrics.collect()
+
+        assert f'worker="{2**22 + 1}"' not in res
+
+    def test_writes_at_most_a_snapshot_a_second(self, metrics_dir):
+        metrics.flush(force=True)
+        metrics.response_size.observe(200, view="unresolved")
+
+        metrics.flush()
+
+        snapshot = json.loads((metrics_dir / f"{os.getpid()}.json").read_text())
+        assert snapshot["histograms"]["http_response_size_bytes"] == []
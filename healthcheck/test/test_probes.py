@@ -0,0 +1,135 @@
+from unittest import mock
+
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import OperationalError
+from django.test import AsyncClient, Client, RequestFactory, override_settings
+
+from healthcheck import checks
+from healthcheck.constants import HealthStatus
+from healthcheck.middleware import ProbeMiddleware
+
+
+@pytest.fixture(autouse=True)
+def clear_cached_checks():
+    checks.clear_cached_checks()
+    yield
+    checks.clear_cached_checks()
+
+
+def saturated_pool(in_use):
+    return {
+        "default:db": {
+            "max_size": 10,
+            "size": 10,
+            "idle": 10 - in_use,
+            "in_use": in_use,
+        }
+    }
+
+
+class TestLiveness:
+    def test_is_ok_without_the_database(self):
+        # no django_db mark, so touching the database would raise
+        response = Client().get("/livez")
+
+        assert response.status_code == 200
+        assert response.content == b"OK"
+        assert response["Cache-Control"] == "no-cache, no-store, must-revalidate"
+
+    def test_bypasses_the_other_middleware(self):
+        response = Client().get("/livez/", HTTP_HOST="10.0.0.1")
+
+        # the host isn't allowed, and XFrameOptionsMiddleware would add the header
+        assert response.status_code == 200
+        assert "X-Frame-Options" not in response
+        assert "Vary" not in response
+
+    def test_is_answered_over_asgi(self):
+        async def get():
+            return await AsyncClient().get("/livez")
+
+        response = async_to_sync(get)()
+
+        assert response.status_code == 200
+        assert response.content == b"OK"
+
+    def test_stays_async_in_an_async_stack(self):
+        async def view(request):
+            raise AssertionError("the probe shouldn't reach the view")
+
+        middleware = ProbeMiddleware(view)
+
+        assert asyncio.iscoroutinefunction(middleware)
+
+        async def request():
+            return await middleware(RequestFactory().get("/livez"))
+
+        assert async_to_sync(request)().status_code == 200
+
+
+@pytest.mark.django_db()
+class TestReadiness:
+    def test_is_ready(self):
+        response = Client().get("/readyz")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": HealthStatus.OK,
+            "checks": {
+                "database": HealthStatus.OK,
+                "pool": HealthStatus.OK,
+                "cache": HealthStatus.OK,
+            },
+        }
+
+    def test_reuses_the_checks_within_their_ttl(self, django_assert_num_queries):
+        client = Client()
+        client.get("/readyz")
+
+        with django_assert_num_queries(0):
+            response = client.get("/readyz")
+
+        assert response.status_code == 200
+
+    @override_settings(READINESS_DB_TTL=0)
+    def test_checks_the_database_again_after_its_ttl(self, django_assert_num_queries):
+        client = Client()
+        client.get("/readyz")
+
+        with django_assert_num_queries(1):
+            client.get("/readyz")
+
+    def test_is_not_ready_without_the_database(self):
+        with mock.patch(
+            "django.db.backends.base.base.BaseDatabaseWrapper.cursor",
+            side_effect=OperationalError,
+        ):
+            response = Client().get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == HealthStatus.FAIL
+        assert response.json()["checks"]["database"] == HealthStatus.FAIL
+
+    def test_is_not_ready_when_a_pool_is_saturated(self):
+        with mock.patch("config.db.pool.pool_stats", return_value=saturated_pool(10)):
+            response = Client().get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["checks"]["pool"] == HealthStatus.FAIL
+
+    @override_settings(READINESS_POOL_SATURATION=0.8)
+    def test_pool_saturation_is_configurable(self):
+        with mock.patch("config.db.pool.pool_stats", return_value=saturated_pool(8)):
+            assert checks.pool_check() == HealthStatus.FAIL
+        with mock.patch("config.db.pool.pool_stats", return_value=saturated_pool(7)):
+            assert checks.pool_check() == HealthStatus.OK
+
+    def test_is_not_ready_without_the_cache(self):
+        with mock.patch("config.cache.TieredCache.set", side_effect=OperationalError):
+            response = Client().get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["checks"]["cache"] == HealthStatus.FAIL
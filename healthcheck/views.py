@@ -1,7 +1,11 @@
 import time
 
-from django.views.generic import TemplateView
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.generic import TemplateView, View
 
+from healthcheck import metrics
 from healthcheck.checks import db_check
 from healthcheck.constants import HealthStatus
 
@@ -27,3 +31,24 @@ class HealthCheckView(TemplateView):
         response["Content-Type"] = "text/xml"
         response["Cache-Control"] = "no-cache, no-store, must-revalidate"
         return response
+
+
+class MetricsView(View):
+    """The request metrics, in the Prometheus text format
+
+    Open to staff users, and to scrapers sending `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+
+    def has_access(self, request):
+        if request.user.is_staff:
+            return True
+        token = settings.METRICS_TOKEN
+        authorization = request.headers.get("Authorization", "")
+        return bool(token) and constant_time_compare(authorization, f"Bearer {token}")
+
+    def get(self, request, **kwargs):
+        if not self.has_access(request):
+            return HttpResponseForbidden()
+        return HttpResponse(
+            metrics.collect(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
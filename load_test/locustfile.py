@@ -1,35 +1,325 @@
 """Load test scenario file.
 
-This module defines operations that test users are going to do during the test. As we are
-interested in finding the max_concurrent_users, 2 tasks have been defined here with
-view_tasklist having more weightage than visiting the home page. Test would stop as soon
-as seeing non 200 response.
+Each user class models one kind of visitor to the web app. Its weight sets its share of
+the simulated users, and its wait time stands in for the reading and typing between
+requests:
 
-No additional fixtures/config are required(on top of dependency for functional tests)
-to run this test.
+- MonthlyUpdateUser fills in the monthly update of a strategic action (create, info,
+  timing, delivery status, summary) and submits the supply chain's monthly update once
+  every strategic action is ready. This is the traffic that spikes before the month end.
+- ActionProgressUser and ChainDetailsUser browse the action progress and chain details
+  pages of a supply chain.
+- SupplyChainSummaryUser visits the home page and reads the supply chains summary.
+- ActivityStreamCrawler crawls the Hawk signed activity stream, as Activity Stream does.
+
+Users log in through the load test login, so run the server with the local settings
+and `LOAD_TEST_LOGIN=true`, against data made with `python manage.py generate_dataset`.
+`LOAD_TEST_USERS` can list, comma separated, the emails of the users to log in as;
+otherwise each simulated user logs in as a user picked at random. The activity stream is
+signed with `HAWK_INCOMING_ACCESS_KEY` and `HAWK_INCOMING_SECRET_KEY`.
+
+A response other than a 200, after redirects, is recorded as a failure and ends the
+task, rather than stopping the test. Set `MONTH_END_SPIKE=true` to ramp the users up and
+down as they do around the month end, rather than running a fixed number of users.
 """
-from random import randint
+import os
+import random
+import re
+from urllib.parse import urljoin, urlparse
+
+from locust import HttpUser, LoadTestShape, between, task
+from mohawk import Sender
+
+LOGIN_URL = "/load-test/login/"
+USER_EMAILS = [
+    email for email in os.environ.get("LOAD_TEST_USERS", "").split(",") if email
+]
+HAWK_CREDENTIALS = {
+    "id": os.environ.get("HAWK_INCOMING_ACCESS_KEY", "xxx"),
+    "key": os.environ.get("HAWK_INCOMING_SECRET_KEY", "xxx"),
+    "algorithm": "sha256",
+}
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+# the tags the task list gives strategic actions that aren't ready to submit
+NOT_READY_TAGS = ("govuk-tag--grey", "govuk-tag--blue")
+
+
+def links(html, pattern):
+    """The paths the page links to that match the pattern, quoted in the href or not"""
+    return sorted(set(re.findall(rf"""href=["']?({pattern})["'\s>]""", html)))
+
+
+def not_ready_updates(html):
+    """The links to the updates a task list shows as not started or in progress
+
+    The task list puts these before the others, so its first page has them all or is full.
+    """
+    return [
+        url
+        for row in html.split("<tr")[1:]
+        if any(tag in row for tag in NOT_READY_TAGS)
+        for url in links(row, r"/supply-chains/[\w-]+/[\w-]+/updates/[\w/-]+")
+    ]
+
+
+def options(html, name):
+    """The values a select offers, leaving out the empty choice"""
+    select = re.search(rf'<select name="{name}".*?</select>', html, re.DOTALL)
+    if select is None:
+        return []
+    return re.findall(r'value="([^"]+)"', select.group())
+
+
+class LoggedInUser(HttpUser):
+    abstract = True
+
+    def on_start(self):
+        params = {"email": random.choice(USER_EMAILS)} if USER_EMAILS else {}
+        self.get(LOGIN_URL, params=params)
+
+    def request(self, method, url, name=None, **kwargs):
+        """Make a request, returning the response, or None if it failed"""
+        with self.client.request(
+            method, url, name=name or url, catch_response=True, **kwargs
+        ) as response:
+            if response.status_code != 200:
+                response.failure(f"{response.status_code} from {response.url}")
+                return None
+            if urlparse(response.url).path.startswith("/auth/"):
+                response.failure("Sent to log in")
+                return None
+        return response
+
+    def get(self, url, name=None, **kwargs):
+        return self.request("GET", url, name, **kwargs)
+
+    def submit(self, page, data, url=None, name=None):
+        """Post a form on the page, with the page's CSRF token, as a browser would"""
+        token = CSRF_TOKEN.search(page.text)
+        if token is None:
+            return None
+        return self.request(
+            "POST",
+            url or page.url,
+            name,
+            data={"csrfmiddlewaretoken": token.group(1), **data},
+            headers={"Referer": page.url},
+        )
+
+
+class MonthlyUpdateUser(LoggedInUser):
+    weight = 6
+    wait_time = between(5, 20)
+
+    @task
+    def update_strategic_action(self):
+        home = self.get("/supply-chains/")
+        if home is None:
+            return
+        task_lists = [
+            url
+            for url in links(home.text, r"/supply-chains/[\w-]+/")
+            if url != "/supply-chains/summary/"
+        ]
+        if not task_lists:
+            return
+        task_list = self.get(random.choice(task_lists), name="/supply-chains/[sc]/")
+        if task_list is None:
+            return
+
+        updates = not_ready_updates(task_list.text)
+        if not updates:
+            # every action is ready, or the monthly update has already been submitted
+            if "Submit monthly update" in task_list.text:
+                self.wait()
+                self.submit(task_list, {}, name="/supply-chains/[sc]/ [submit]")
+            return
+        update = random.choice(updates)
+        if update.endswith("/start/"):
+            page = self.get(update, name="/supply-chains/[sc]/[action]/updates/start/")
+        else:
+            page = self.get(
+                update, name="/supply-chains/[sc]/[action]/updates/[update]/info/"
+            )
+        if page is None:
+            return
 
+        self.wait()
+        page = self.submit(
+            page,
+            {"content": "Progress this month has been steady."},
+            name="/supply-chains/[sc]/[action]/updates/[update]/info/ [post]",
+        )
+        if page is None:
+            return
+        if urlparse(page.url).path.endswith("/timing/"):
+            self.wait()
+            page = self.submit(
+                page,
+                {
+                    "is_completion_date_known": "False",
+                    "False-surrogate_is_ongoing": "12",
+                },
+                name="/supply-chains/[sc]/[action]/updates/[update]/timing/ [post]",
+            )
+            if page is None:
+                return
 
-from locust import HttpUser, task
-from locust.exception import ResponseError
+        self.wait()
+        if random.random() < 0.8:
+            status = {"implementation_rag_rating": "GREEN"}
+        else:
+            status = {
+                "implementation_rag_rating": "AMBER",
+                "AMBER-reason_for_delays": "Waiting on a supplier.",
+            }
+        page = self.submit(
+            page,
+            status,
+            name="/supply-chains/[sc]/[action]/updates/[update]/delivery-status/ [post]",
+        )
+        if page is None:
+            return
 
+        self.wait()
+        self.submit(
+            page,
+            {},
+            name="/supply-chains/[sc]/[action]/updates/[update]/confirm/ [post]",
+        )
 
-class QuickstartUser(HttpUser):
-    def validate_resp(self, status_code):
-        if status_code != 200:
-            print(f"Received error response: {status_code}")
-            self.environment.runner.quit()
-            raise ResponseError()
+
+class ActionProgressUser(LoggedInUser):
+    weight = 2
+    wait_time = between(5, 15)
+
+    @task
+    def view_action_progress(self):
+        home = self.get("/")
+        if home is None:
+            return
+        # the navigation links users to their department's action progress
+        departments = links(home.text, r"/action-progress/[^/\s\"'>]+/")
+        if not departments:
+            return
+        department = self.get(departments[0], name="/action-progress/[dept]/")
+        if department is None:
+            return
+        supply_chains = options(department.text, "supply_chain")
+        if not supply_chains:
+            return
+
+        self.wait()
+        action_list = self.submit(
+            department,
+            {"supply_chain": random.choice(supply_chains)},
+            name="/action-progress/[dept]/ [filter]",
+        )
+        if action_list is None:
+            return
+        actions = links(action_list.text, r"/action-progress/[^\s\"'>]+/detail/")
+        if not actions:
+            return
+
+        self.wait()
+        self.get(
+            random.choice(actions), name="/action-progress/[dept]/[sc]/[action]/detail/"
+        )
+
+
+class ChainDetailsUser(LoggedInUser):
+    weight = 2
+    wait_time = between(5, 15)
+
+    @task
+    def view_chain_details(self):
+        page = self.get("/chain-details/")
+        if page is None:
+            return
+        departments = options(page.text, "department")
+        if not departments:
+            return
+
+        self.wait()
+        chain_list = self.submit(
+            page,
+            {"department": random.choice(departments)},
+            name="/chain-details/ [filter]",
+        )
+        if chain_list is None:
+            return
+        chains = links(chain_list.text, r"/chain-details/[^/\s\"'>]+/[\w-]+/")
+        if not chains:
+            return
+
+        self.wait()
+        self.get(random.choice(chains), name="/chain-details/[dept]/[sc]/")
+
+
+class SupplyChainSummaryUser(LoggedInUser):
+    weight = 1
+    wait_time = between(10, 30)
 
     @task
     def home(self):
-        resp = self.client.get("")
-        self.validate_resp(resp.status_code)
-
-    @task(4)
-    def view_tasklists(self):
-        supply_chain_index = randint(1, 7)
-        route = f"Tasklist-SC{supply_chain_index}"
-        resp = self.client.get(f"/supply-chain-{supply_chain_index}/", name=route)
-        self.validate_resp(resp.status_code)
+        self.get("/")
+
+    @task(3)
+    def view_summary(self):
+        summary = self.get("/supply-chains/summary/")
+        if summary is None:
+            return
+        pages = links(summary.text, r"\?page=\d+")
+        if pages:
+            self.wait()
+            self.get(
+                "/supply-chains/summary/" + random.choice(pages),
+                name="/supply-chains/summary/?page=[n]",
+            )
+
+
+class ActivityStreamCrawler(HttpUser):
+    fixed_count = 1
+    wait_time = between(5, 10)
+
+    @task
+    def crawl(self):
+        """Read the activity stream from the start until a page has no items"""
+        url = urljoin(self.host, "/api/activity-stream/")
+        while url:
+            sender = Sender(HAWK_CREDENTIALS, url, "GET", content="", content_type="")
+            with self.client.get(
+                url,
+                name="/api/activity-stream/",
+                headers={"Authorization": sender.request_header},
+                catch_response=True,
+            ) as response:
+                if response.status_code != 200:
+                    response.failure(f"{response.status_code} from {url}")
+                    return
+                page = response.json()
+            if not page["orderedItems"]:
+                return
+            url = page.get("next")
+
+
+if os.environ.get("MONTH_END_SPIKE", "").lower() in ("1", "true"):
+    # locust runs any shape the locustfile defines in place of the configured users
+
+    class MonthEndSpike(LoadTestShape):
+        """A quiet spell, then the rush of monthly updates before the deadline"""
+
+        # (seconds since the start, users, spawn rate)
+        stages = [
+            (60, 20, 5),
+            (240, 150, 10),
+            (300, 20, 10),
+        ]
+
+        def tick(self):
+            run_time = self.get_run_time()
+            for until, users, spawn_rate in self.stages:
+                if run_time < until:
+                    return users, spawn_rate
+            return None
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class SupplyChainUpdateConfig(AppConfig):
     name = "supply_chains"
+
+    def ready(self):
+        from supply_chains.rollup import connect_signals
+
+        connect_signals()
@@ -0,0 +1,432 @@
+"""Generate a synthetic dataset for benchmarks and load tests
+
+Everything is bulk inserted, so none of the save paths or signals run. The vulnerability
+assessments' stage documents are built as the stages are, and `generate_dataset` rebuilds
+the counters and monthly summaries afterwards.
+
+The same seed and sizes always give the same data, apart from primary keys and the
+dates, which are relative to today.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.hashers import make_password
+from django.template.defaultfilters import slugify
+
+from accounts.models import GovDepartment, User
+from supply_chains.models import (
+    Country,
+    CountryDependency,
+    RAGRating,
+    ScenarioAssessment,
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+    SupplyChainCriticality,
+    SupplyChainMaturity,
+    SupplyChainUmbrella,
+    VulAssessmentDeliverStage,
+    VulAssessmentMakeStage,
+    VulAssessmentReceiveStage,
+    VulAssessmentStoreStage,
+    VulAssessmentSupplyStage,
+    VulnerabilityAssessment,
+)
+from supply_chains.utils import get_reporting_period
+
+Status = StrategicActionUpdate.Status
+
+STAGE_MODELS = [
+    VulAssessmentSupplyStage,
+    VulAssessmentReceiveStage,
+    VulAssessmentMakeStage,
+    VulAssessmentStoreStage,
+    VulAssessmentDeliverStage,
+]
+SCENARIOS = [
+    "borders_closed",
+    "storage_full",
+    "ports_blocked",
+    "raw_material_shortage",
+    "labour_shortage",
+    "demand_spike",
+]
+
+# most things are on track, and a few are in trouble
+RAG_WEIGHTS = {RAGRating.GREEN: 6, RAGRating.AMBER: 3, RAGRating.RED: 1}
+DEPENDENCY_WEIGHTS = {
+    CountryDependency.DependencyLevel.NONE: 1,
+    CountryDependency.DependencyLevel.LOW: 4,
+    CountryDependency.DependencyLevel.MEDIUM: 3,
+    CountryDependency.DependencyLevel.HIGH: 2,
+    CountryDependency.DependencyLevel.VERY_HIGH: 1,
+}
+ARCHIVED_SUPPLY_CHAIN_RATE = 0.05
+UMBRELLA_SUPPLY_CHAIN_RATE = 0.2
+ARCHIVED_ACTION_RATE = 0.1
+ONGOING_ACTION_RATE = 0.15
+# the chance a month's update for an active strategic action was missed
+MISSED_UPDATE_RATE = 0.05
+COUNTRY_DEPENDENCIES = (3, 10)
+
+WORDS = (
+    "supply resilience capacity sourcing logistics demand stock import export "
+    "manufacturing partner supplier component market risk review contract shortage "
+    "diversify expand domestic overseas critical material investment programme"
+).split()
+
+
+@dataclass
+class DatasetSize:
+    """How much to generate: umbrellas, supply chains and users are per department,
+    strategic actions per supply chain and months of updates per strategic action"""
+
+    departments: int = 5
+    umbrellas: int = 2
+    supply_chains: int = 20
+    actions: int = 8
+    months: int = 24
+    countries: int = 50
+    users: int = 5
+
+
+@dataclass
+class Dataset:
+    """What was generated, by model"""
+
+    counts: Dict[str, int] = field(default_factory=dict)
+    supply_chains: List[SupplyChain] = field(default_factory=list)
+
+
+class DatasetGenerator:
+    """Generates a dataset of the given size, named with the prefix"""
+
+    def __init__(self, size: DatasetSize, seed=0, prefix="Generated", batch_size=5000):
+        self.size = size
+        self.random = random.Random(seed)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.today = date.today()
+        self.dataset = Dataset()
+
+    # Values
+
+    def words(self, count):
+        return " ".join(self.random.choices(WORDS, k=count))
+
+    def sentence(self):
+        return self.words(self.random.randint(6, 16)).capitalize() + "."
+
+    def paragraph(self):
+        return " ".join(self.sentence() for _ in range(self.random.randint(2, 5)))
+
+    def rag_rating(self):
+        return self.random.choices(list(RAG_WEIGHTS), list(RAG_WEIGHTS.values()))[0]
+
+    def past_date(self, max_days):
+        return self.today - timedelta(days=self.random.randint(0, max_days))
+
+    def name(self, kind, number):
+        return f"{self.prefix} {kind} {number}"
+
+    # Models
+
+    def bulk_create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        label = str(model._meta.verbose_name_plural).lower()
+        self.dataset.counts[label] = self.dataset.counts.get(label, 0) + len(created)
+        return created
+
+    def generate(self) -> Dataset:
+        departments = self.bulk_create(
+            GovDepartment,
+            [
+                GovDepartment(
+                    name=self.name("department", i),
+                    email_domains=[f"{slugify(self.name('department', i))}.gov.uk"],
+                )
+                for i in range(self.size.departments)
+            ],
+        )
+        users = self.generate_users(departments)
+        supply_chains = self.generate_supply_chains(departments)
+        self.generate_supply_chain_details(supply_chains)
+        strategic_actions = self.generate_strategic_actions(supply_chains)
+        self.generate_updates(strategic_actions, users)
+        self.generate_vulnerability_assessments(supply_chains)
+        self.generate_scenario_assessments(supply_chains)
+        self.generate_country_dependencies(supply_chains)
+        self.dataset.supply_chains = supply_chains
+        return self.dataset
+
+    def generate_users(self, departments):
+        password = make_password(None)
+        users = {}
+        for department in departments:
+            domain = department.email_domains[0]
+            users[department.pk] = self.bulk_create(
+                User,
+                [
+                    User(
+                        sso_email_user_id=f"user-{i}-{domain}@sso.example.com",
+                        email=f"user.{i}@{domain}",
+                        first_name=f"User{i}",
+                        last_name=department.name,
+                        gov_department=department,
+                        password=password,
+                    )
+                    for i in range(self.size.users)
+                ],
+            )
+        return users
+
+    def generate_supply_chains(self, departments):
+        umbrellas = self.bulk_create(
+            SupplyChainUmbrella,
+            [
+                SupplyChainUmbrella(
+                    name=self.name("umbrella", f"{d}-{i}"),
+                    slug=slugify(self.name("umbrella", f"{d}-{i}")),
+                    description=self.paragraph(),
+                    gov_department=department,
+                )
+                for d, department in enumerate(departments)
+                for i in range(self.size.umbrellas)
+            ],
+        )
+        umbrellas_by_department = {}
+        for umbrella in umbrellas:
+            umbrellas_by_department.setdefault(umbrella.gov_department_id, []).append(
+                umbrella
+            )
+
+        supply_chains = []
+        for d, department in enumerate(departments):
+            department_umbrellas = umbrellas_by_department.get(department.pk, [])
+            for i in range(self.size.supply_chains):
+                name = self.name("supply chain", f"{d}-{i}")
+                is_archived = self.random.random() < ARCHIVED_SUPPLY_CHAIN_RATE
+                in_umbrella = (
+                    department_umbrellas
+                    and self.random.random() < UMBRELLA_SUPPLY_CHAIN_RATE
+                )
+                supply_chains.append(
+                    SupplyChain(
+                        name=name,
+                        slug=slugify(name),
+                        description=self.paragraph(),
+                        gov_department=department,
+                        supply_chain_umbrella=(
+                            self.random.choice(department_umbrellas)
+                            if in_umbrella
+                            else None
+                        ),
+                        contact_name=f"Contact {d}-{i}",
+                        contact_email=f"contact.{d}.{i}@{department.email_domains[0]}",
+                        vulnerability_status=self.rag_rating(),
+                        risk_severity_status=self.random.choice(
+                            SupplyChain.StatusRating.values
+                        ),
+                        is_archived=is_archived,
+                        archived_reason=self.sentence() if is_archived else "",
+                        archived_date=self.past_date(365) if is_archived else None,
+                    )
+                )
+        return self.bulk_create(SupplyChain, supply_chains)
+
+    def generate_supply_chain_details(self, supply_chains):
+        self.bulk_create(
+            SupplyChainCriticality,
+            [
+                SupplyChainCriticality(
+                    supply_chain=supply_chain,
+                    rating=self.random.choice(
+                        SupplyChainCriticality.CriticalityRating.values
+                    ),
+                )
+                for supply_chain in supply_chains
+            ],
+        )
+        self.bulk_create(
+            SupplyChainMaturity,
+            [
+                SupplyChainMaturity(
+                    supply_chain=supply_chain,
+                    rating=self.random.choice(
+                        SupplyChainMaturity.MaturityRating.values
+                    ),
+                )
+                for supply_chain in supply_chains
+            ],
+        )
+
+    def generate_strategic_actions(self, supply_chains):
+        strategic_actions = []
+        for supply_chain in supply_chains:
+            for i in range(self.size.actions):
+                name = f"{supply_chain.name} action {i}"
+                is_archived = supply_chain.is_archived or (
+                    self.random.random() < ARCHIVED_ACTION_RATE
+                )
+                is_ongoing = self.random.random() < ONGOING_ACTION_RATE
+                strategic_actions.append(
+                    StrategicAction(
+                        name=name,
+                        slug=slugify(name),
+                        description=self.paragraph(),
+                        impact=self.paragraph(),
+                        category=self.random.choice(StrategicAction.Category.values),
+                        geographic_scope=self.random.choice(
+                            StrategicAction.GeographicScope.values
+                        ),
+                        supporting_organisations=self.words(2),
+                        start_date=self.past_date(30 * self.size.months),
+                        is_ongoing=is_ongoing,
+                        target_completion_date=(
+                            None
+                            if is_ongoing
+                            else self.today
+                            + timedelta(days=self.random.randint(-180, 720))
+                        ),
+                        is_archived=is_archived,
+                        archived_reason=self.sentence() if is_archived else "",
+                        archived_date=self.past_date(365) if is_archived else None,
+                        supply_chain=supply_chain,
+                    )
+                )
+        return self.bulk_create(StrategicAction, strategic_actions)
+
+    def generate_updates(self, strategic_actions, users):
+        supply_chains = {
+            supply_chain.pk: supply_chain
+            for supply_chain in SupplyChain.objects.filter(
+                pk__in={action.supply_chain_id for action in strategic_actions}
+            ).only("gov_department_id")
+        }
+        current_period = get_reporting_period(self.today)
+        updates = []
+        for strategic_action in strategic_actions:
+            department_users = users[
+                supply_chains[strategic_action.supply_chain_id].gov_department_id
+            ]
+            for month in range(self.size.months):
+                period = current_period - relativedelta(months=month)
+                if period < get_reporting_period(strategic_action.start_date):
+                    break
+                current = month == 0
+                if strategic_action.is_archived and current:
+                    continue
+                if self.random.random() < MISSED_UPDATE_RATE:
+                    continue
+                date_created = period + timedelta(days=self.random.randint(0, 20))
+                if current:
+                    date_created = min(date_created, self.today)
+                    status = self.random.choice(
+                        [Status.IN_PROGRESS, Status.READY_TO_SUBMIT, Status.SUBMITTED]
+                    )
+                else:
+                    status = Status.SUBMITTED
+                submitted = status == Status.SUBMITTED
+                updates.append(
+                    StrategicActionUpdate(
+                        strategic_action=strategic_action,
+                        supply_chain_id=strategic_action.supply_chain_id,
+                        user=(
+                            self.random.choice(department_users)
+                            if department_users
+                            else None
+                        ),
+                        status=status,
+                        date_created=date_created,
+                        submission_date=(
+                            min(date_created + timedelta(days=3), self.today)
+                            if submitted
+                            else None
+                        ),
+                        content=self.paragraph(),
+                        implementation_rag_rating=(
+                            self.rag_rating() if status != Status.IN_PROGRESS else None
+                        ),
+                        slug=date_created.strftime("%m-%Y"),
+                    )
+                )
+            if len(updates) >= self.batch_size:
+                self.bulk_create(StrategicActionUpdate, updates)
+                updates = []
+        self.bulk_create(StrategicActionUpdate, updates)
+
+    def stage_values(self, stage_model):
+        values = {}
+        stage_name = stage_model.stage_name
+        values[f"{stage_name}_stage_rag_rating"] = self.rag_rating()
+        for char_id in stage_model.characteristic_ids:
+            values[f"{stage_name}_rag_rating_{char_id}"] = self.rag_rating()
+            values[f"{stage_name}_stage_summary_{char_id}"] = self.sentence()
+            values[f"{stage_name}_stage_rationale_{char_id}"] = self.paragraph()
+        return values
+
+    def generate_vulnerability_assessments(self, supply_chains):
+        assessments = []
+        stages = {stage_model: [] for stage_model in STAGE_MODELS}
+        for supply_chain in supply_chains:
+            assessment = VulnerabilityAssessment(supply_chain=supply_chain)
+            assessments.append(assessment)
+            for stage_model in STAGE_MODELS:
+                stage = stage_model(
+                    vulnerability=assessment, **self.stage_values(stage_model)
+                )
+                stages[stage_model].append(stage)
+                assessment.stage_document[stage_model.stage_name] = stage.to_document()
+        self.bulk_create(VulnerabilityAssessment, assessments)
+        for stage_model, model_stages in stages.items():
+            self.bulk_create(stage_model, model_stages)
+
+    def generate_scenario_assessments(self, supply_chains):
+        assessments = []
+        for supply_chain in supply_chains:
+            values = {}
+            for scenario in SCENARIOS:
+                # a scenario may not have been rated yet
+                values[f"{scenario}_rag_rating"] = self.random.choice(
+                    ["", *RAG_WEIGHTS]
+                )
+                values[f"{scenario}_impact"] = self.paragraph()
+                is_critical = self.random.random() < 0.2
+                values[f"{scenario}_is_critical"] = is_critical
+                values[f"{scenario}_critical_scenario"] = (
+                    self.paragraph() if is_critical else ""
+                )
+            assessments.append(
+                ScenarioAssessment(
+                    supply_chain=supply_chain,
+                    start_date=self.past_date(365),
+                    **values,
+                )
+            )
+        self.bulk_create(ScenarioAssessment, assessments)
+
+    def generate_country_dependencies(self, supply_chains):
+        countries = self.bulk_create(
+            Country,
+            [Country(name=self.name("country", i)) for i in range(self.size.countries)],
+        )
+        if not countries:
+            return
+        dependencies = []
+        for supply_chain in supply_chains:
+            count = min(self.random.randint(*COUNTRY_DEPENDENCIES), len(countries))
+            for country in self.random.sample(countries, count):
+                dependencies.append(
+                    CountryDependency(
+                        supply_chain=supply_chain,
+                        country=country,
+                        dependency_level=self.random.choices(
+                            list(DEPENDENCY_WEIGHTS),
+                            list(DEPENDENCY_WEIGHTS.values()),
+                        )[0],
+                    )
+                )
+        self.bulk_create(CountryDependency, dependencies)
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from supply_chains.management.commands.refresh_monthly_summaries import month
+from supply_chains.models import StrategicActionUpdate
+
+
+class Command(BaseCommand):
+    """Recompute the reporting period of strategic action updates from `date_created`
+
+    The period is set whenever an update is saved, but `QuerySet.update()` of
+    `date_created`, raw fixture loads and changes to the bank holiday calendar leave it
+    stale, so run this after those. Nothing is changed if any strategic action would
+    end up with more than one update in a reporting period.
+    """
+
+    help = "Recompute the reporting period of strategic action updates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=month,
+            help="only recompute updates created in or after this month, as YYYY-MM",
+        )
+
+    def handle(self, **options):
+        updates = StrategicActionUpdate.objects.all()
+        if options["since"]:
+            updates = updates.filter(date_created__gte=options["since"])
+        try:
+            with transaction.atomic():
+                recomputed = updates.set_reporting_periods()
+                # Updates can swap periods part way through, which the deferred unique
+                # constraint allows, so it's only the periods they end up in that count
+                duplicates = StrategicActionUpdate.objects.filter(
+                    strategic_action__in=updates.values("strategic_action")
+                ).duplicate_reporting_periods()
+                if duplicates:
+                    raise CommandError(
+                        "Strategic actions would have more than one update in a "
+                        "reporting period, which must be merged first: "
+                        + ", ".join(
+                            f"{duplicate['strategic_action']} in "
+                            f"{duplicate['reporting_period']:%Y-%m}"
+                            for duplicate in duplicates
+                        )
+                    )
+        except IntegrityError:
+            # another update was written in the meantime
+            raise CommandError(
+                "Strategic actions would have more than one update in a reporting period, "
+                "which must be merged first"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed the reporting period of {recomputed} updates"
+            )
+        )
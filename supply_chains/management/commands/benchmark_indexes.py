@@ -0,0 +1,199 @@
+import re
+import time
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import GovDepartment
+from supply_chains.models import SupplyChain, StrategicAction, StrategicActionUpdate
+from supply_chains.utils import get_last_working_day_of_previous_month
+
+Status = StrategicActionUpdate.Status
+INDEXED_MODELS = [SupplyChain, StrategicAction, StrategicActionUpdate]
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """Compare query plans for the monthly update hot paths with and without their indexes
+
+    Seeds a dataset, runs EXPLAIN ANALYZE on each query with the indexes in `Meta.indexes`,
+    drops them and runs them again. Everything happens in one transaction that is rolled
+    back, so the database is left as it was.
+    """
+
+    help = "Benchmark the monthly update queries with and without their indexes"
+
+    BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--supply-chains",
+            type=int,
+            default=200,
+            help="number of supply chains to seed",
+        )
+        parser.add_argument(
+            "--actions",
+            type=int,
+            default=10,
+            help="number of strategic actions per supply chain",
+        )
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=24,
+            help="number of months of updates per strategic action",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="print the full query plans as well as the timings",
+        )
+
+    def handle(self, **options):
+        self.verbose_plans = options["plans"]
+        try:
+            with transaction.atomic():
+                self.seed(
+                    options["supply_chains"], options["actions"], options["months"]
+                )
+                with_indexes = self.run_queries("with indexes")
+                self.drop_indexes()
+                without_indexes = self.run_queries("without indexes")
+                self.report(with_indexes, without_indexes)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def seed(self, supply_chain_count, actions_per_chain, months):
+        started = time.perf_counter()
+        department = GovDepartment.objects.create(
+            name="Benchmark department", email_domains=["benchmark.gov.uk"]
+        )
+        today = date.today()
+        supply_chains = SupplyChain.objects.bulk_create(
+            [
+                SupplyChain(
+                    name=f"Benchmark supply chain {i}",
+                    slug=f"benchmark-supply-chain-{i}",
+                    gov_department=department,
+                    last_submission_date=today - timedelta(days=i % 90),
+                    is_archived=i % 10 == 0,
+                    archived_reason="Benchmark" if i % 10 == 0 else "",
+                )
+                for i in range(supply_chain_count)
+            ],
+            batch_size=self.BATCH_SIZE,
+        )
+        strategic_actions = StrategicAction.objects.bulk_create(
+            [
+                StrategicAction(
+                    name=f"Benchmark strategic action {i}",
+                    slug=f"benchmark-strategic-action-{i}",
+                    description="Benchmark",
+                    category=StrategicAction.Category.CREATE,
+                    geographic_scope=StrategicAction.GeographicScope.UK_WIDE,
+                    supply_chain=supply_chain,
+                    is_archived=i % 5 == 0,
+                    archived_reason="Benchmark" if i % 5 == 0 else "",
+                )
+                for supply_chain in supply_chains
+                for i in range(actions_per_chain)
+            ],
+            batch_size=self.BATCH_SIZE,
+        )
+        # mid-month, so no update falls after its month's last working day and into the
+        # next month's reporting period, and none is dated in the future
+        mid_month = min(today, today.replace(day=15))
+        updates = []
+        for strategic_action in strategic_actions:
+            for month in range(months):
+                date_created = mid_month - relativedelta(months=month)
+                # the current month is still being written, earlier ones were submitted
+                submitted = month > 0
+                updates.append(
+                    StrategicActionUpdate(
+                        strategic_action=strategic_action,
+                        supply_chain_id=strategic_action.supply_chain_id,
+                        date_created=date_created,
+                        submission_date=date_created if submitted else None,
+                        status=Status.SUBMITTED if submitted else Status.IN_PROGRESS,
+                        content="Benchmark",
+                        slug=date_created.strftime("%m-%Y"),
+                    )
+                )
+            if len(updates) >= self.BATCH_SIZE:
+                StrategicActionUpdate.objects.bulk_create(updates)
+                updates = []
+        StrategicActionUpdate.objects.bulk_create(updates)
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        self.stdout.write(
+            f"Seeded {len(supply_chains)} supply chains, {len(strategic_actions)} strategic actions "
+            f"and {len(strategic_actions) * months} updates "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def benchmark_queries(self):
+        supply_chain = SupplyChain.objects.filter(
+            name__startswith="Benchmark", is_archived=False
+        ).first()
+        strategic_action = StrategicAction.objects.filter(
+            supply_chain=supply_chain, is_archived=False
+        ).first()
+        deadline = get_last_working_day_of_previous_month()
+        return {
+            "SAUQuerySet.since": StrategicActionUpdate.objects.since(
+                deadline, supply_chain=supply_chain
+            ),
+            "SAUQuerySet.since, submitted": StrategicActionUpdate.objects.since(
+                deadline - relativedelta(months=6),
+                supply_chain=supply_chain,
+                status=Status.SUBMITTED,
+            ),
+            "SAUQuerySet.given_month": StrategicActionUpdate.objects.given_month(
+                date.today(), strategic_action=strategic_action
+            ),
+            "SAUQuerySet.last_month": strategic_action.monthly_updates.filter(
+                submission_date__lte=deadline
+            ).order_by("-submission_date")[:1],
+            "SupplyChainQuerySet.submitted_since": SupplyChain.objects.submitted_since(
+                deadline
+            ),
+            "active strategic actions": StrategicAction.objects.filter(
+                supply_chain=supply_chain, is_archived=False
+            ).order_by("name"),
+        }
+
+    def run_queries(self, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Queries {label}"))
+        timings = {}
+        for name, queryset in self.benchmark_queries().items():
+            plan = queryset.explain(analyze=True, buffers=True)
+            timings[name] = float(EXECUTION_TIME.search(plan).group(1))
+            self.stdout.write(f"{name}: {timings[name]:.3f} ms")
+            if self.verbose_plans:
+                self.stdout.write(plan)
+        return timings
+
+    def drop_indexes(self):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    schema_editor.remove_index(model, index)
+
+    def report(self, with_indexes, without_indexes):
+        self.stdout.write(self.style.MIGRATE_HEADING("Summary"))
+        for name, indexed_time in with_indexes.items():
+            unindexed_time = without_indexes[name]
+            speedup = unindexed_time / indexed_time if indexed_time else float("inf")
+            self.stdout.write(
+                f"{name}: {unindexed_time:.3f} ms -> {indexed_time:.3f} ms ({speedup:.1f}x)"
+            )
@@ -0,0 +1,242 @@
+import math
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from mohawk import Sender
+
+from accounts.models import User
+from supply_chains.models import StrategicAction, StrategicActionUpdate, SupplyChain
+from supply_chains.utils import get_last_working_day_of_previous_month
+
+MODES = ["wsgi", "asgi"]
+ACTIVITY_STREAM = "/api/activity-stream/"
+
+
+def percentile(timings, percent):
+    """The nearest-rank percentile of the timings"""
+    ordered = sorted(timings)
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+class Command(BaseCommand):
+    """Compare response latencies under concurrent load when served over WSGI and ASGI
+
+    Starts gunicorn in each `SERVER_MODE`, gevent workers serving config.wsgi and uvicorn
+    workers serving config.asgi, where the read-only pages run as async views. Then it
+    requests those pages and the activity stream, `--concurrency` at a time, as a user of
+    a department with data, e.g. one made by `generate_dataset`. The servers use the
+    configured database.
+    """
+
+    help = "Benchmark p95 latency of the read-only pages over WSGI and over ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="number of requests to make to each page in each mode",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="number of requests to make at a time",
+        )
+        parser.add_argument(
+            "--email", help="the user to request the pages as, by default any user"
+        )
+        parser.add_argument(
+            "--port", type=int, default=8124, help="the port gunicorn binds to"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=2, help="number of gunicorn workers"
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=120,
+            help="seconds to wait for gunicorn to start serving",
+        )
+
+    def handle(self, **options):
+        user = self.get_user(options["email"])
+        paths = self.get_paths(user)
+        client = Client()
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        results = {}
+        for mode in MODES:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Serving over {mode}"))
+            results[mode] = self.run(mode, paths, session, options)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("p95 latency"))
+        for path in paths:
+            wsgi, asgi = (percentile(results[mode][path][0], 95) for mode in MODES)
+            self.stdout.write(
+                f"{path}: wsgi {wsgi * 1000:.1f}ms, asgi {asgi * 1000:.1f}ms "
+                f"({(asgi - wsgi) / wsgi:+.0%})"
+            )
+
+    def get_user(self, email):
+        users = User.objects.filter(is_active=True, gov_department__isnull=False)
+        if email:
+            users = users.filter(email=email)
+        user = users.filter(
+            gov_department__supply_chains__strategic_actions__isnull=False
+        ).first()
+        if user is None:
+            raise CommandError(
+                "No user with supply chains in their department to request the pages as"
+            )
+        return user
+
+    def get_paths(self, user):
+        department = user.gov_department
+        supply_chain = SupplyChain.objects.filter(
+            gov_department=department, strategic_actions__isnull=False
+        ).first()
+        strategic_action = StrategicAction.objects.filter(
+            supply_chain=supply_chain
+        ).first()
+        paths = [
+            reverse("supply-chain-summary"),
+            reverse("chain-details-list", kwargs={"dept": department.name}),
+            reverse(
+                "chain-details-info",
+                kwargs={
+                    "dept": department.name,
+                    "supply_chain_slug": supply_chain.slug,
+                },
+            ),
+            reverse(
+                "action-progress-detail",
+                kwargs={
+                    "dept": department.name,
+                    "supply_chain_slug": supply_chain.slug,
+                    "action_slug": strategic_action.slug,
+                },
+            ),
+        ]
+        update = (
+            StrategicActionUpdate.objects.since(
+                get_last_working_day_of_previous_month(),
+                supply_chain__gov_department=department,
+                status=StrategicActionUpdate.Status.SUBMITTED,
+            )
+            .select_related("supply_chain", "strategic_action")
+            .first()
+        )
+        if update is not None:
+            paths.append(
+                reverse(
+                    "monthly-update-review",
+                    kwargs={
+                        "supply_chain_slug": update.supply_chain.slug,
+                        "action_slug": update.strategic_action.slug,
+                        "update_slug": update.slug,
+                    },
+                )
+            )
+        paths.append(ACTIVITY_STREAM)
+        return paths
+
+    def run(self, mode, paths, session, options):
+        """Each path's response times in seconds, and its number of errors"""
+        base_url = f"http://localhost:{options['port']}"
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                f"config.{mode}:application",
+                "--config",
+                "config/gunicorn.py",
+                "--workers",
+                str(options["workers"]),
+                "--bind",
+                f"127.0.0.1:{options['port']}",
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "SERVER_MODE": mode},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_until_serving(server, f"{base_url}/livez", options["timeout"])
+            with ThreadPoolExecutor(options["concurrency"]) as executor:
+                # a request to each page first, so the workers have warmed up
+                list(
+                    executor.map(
+                        lambda path: self.request(base_url, path, session), paths
+                    )
+                )
+                requests = [path for path in paths for _ in range(options["requests"])]
+                responses = executor.map(
+                    lambda path: self.request(base_url, path, session), requests
+                )
+                results = defaultdict(lambda: ([], 0))
+                for path, (seconds, ok) in zip(requests, responses):
+                    timings, errors = results[path]
+                    timings.append(seconds)
+                    results[path] = (timings, errors + (not ok))
+        finally:
+            server.terminate()
+            server.wait()
+
+        for path in paths:
+            timings, errors = results[path]
+            self.stdout.write(
+                f"{path}: p50 {percentile(timings, 50) * 1000:.1f}ms, "
+                f"p95 {percentile(timings, 95) * 1000:.1f}ms, "
+                f"p99 {percentile(timings, 99) * 1000:.1f}ms, {errors} errors"
+            )
+        return results
+
+    def wait_until_serving(self, server, url, timeout):
+        started = time.perf_counter()
+        while True:
+            try:
+                with urlopen(url, timeout=1):
+                    return
+            except (URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise CommandError(
+                        f"gunicorn exited with {server.returncode} before responding"
+                    )
+                if time.perf_counter() - started > timeout:
+                    raise CommandError(f"No response from {url}")
+                time.sleep(0.05)
+
+    def request(self, base_url, path, session):
+        """The seconds the request took, and whether it succeeded"""
+        url = base_url + path
+        if path == ACTIVITY_STREAM:
+            credentials = {
+                "id": settings.HAWK_INCOMING_ACCESS_KEY,
+                "key": settings.HAWK_INCOMING_SECRET_KEY,
+                "algorithm": "sha256",
+            }
+            sender = Sender(credentials, url, "GET", content="", content_type="")
+            headers = {"Authorization": sender.request_header}
+        else:
+            headers = {"Cookie": f"{settings.SESSION_COOKIE_NAME}={session}"}
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers=headers), timeout=60) as response:
+                response.read()
+                ok = response.status == 200
+        except (HTTPError, URLError, ConnectionError):
+            ok = False
+        return time.perf_counter() - started, ok
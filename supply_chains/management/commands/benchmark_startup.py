@@ -0,0 +1,135 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MANAGE = [sys.executable, "manage.py"]
+BOOT_STEPS = {
+    "migrate, createcachetable and collectstatic": [
+        [*MANAGE, "migrate", "--noinput"],
+        [*MANAGE, "createcachetable"],
+        [*MANAGE, "collectstatic", "--noinput"],
+    ],
+    "prepare_boot": [[*MANAGE, "prepare_boot"]],
+}
+PRELOAD = {"preloaded": "1", "not preloaded": "0"}
+
+
+class Command(BaseCommand):
+    """Measure how long a web instance takes to start serving
+
+    Times the boot steps the `Procfile` runs before gunicorn, the old ones and
+    `prepare_boot`, then the time from starting gunicorn to its first response, with the
+    app preloaded in the master and without. The boot steps run against the configured
+    database and STATIC_ROOT, as they would on an instance.
+    """
+
+    help = "Benchmark the boot steps and gunicorn's time to first response"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs", type=int, default=3, help="number of times to time each"
+        )
+        parser.add_argument(
+            "--path", default="/healthcheck/", help="the path to request"
+        )
+        parser.add_argument(
+            "--port", type=int, default=8123, help="the port gunicorn binds to"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=2, help="number of gunicorn workers"
+        )
+        parser.add_argument(
+            "--worker-class", default="gevent", help="the gunicorn worker class"
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=120,
+            help="seconds to wait for the first response",
+        )
+
+    def handle(self, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Boot steps"))
+        for label, commands in BOOT_STEPS.items():
+            self.report(
+                label,
+                [self.time_commands(commands) for _ in range(options["runs"])],
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Time to first response"))
+        for label, preload in PRELOAD.items():
+            self.report(
+                label,
+                [
+                    self.time_to_first_response(preload, options)
+                    for _ in range(options["runs"])
+                ],
+            )
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f"{label}: median {statistics.median(timings):.2f}s, "
+            f"min {min(timings):.2f}s, max {max(timings):.2f}s"
+        )
+
+    def time_commands(self, commands):
+        started = time.perf_counter()
+        for command in commands:
+            subprocess.run(
+                command,
+                cwd=settings.BASE_DIR,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+        return time.perf_counter() - started
+
+    def time_to_first_response(self, preload, options):
+        url = f"http://127.0.0.1:{options['port']}{options['path']}"
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "config.wsgi:application",
+                "--config",
+                "config/gunicorn.py",
+                "--worker-class",
+                options["worker_class"],
+                "--workers",
+                str(options["workers"]),
+                "--bind",
+                f"127.0.0.1:{options['port']}",
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "GUNICORN_PRELOAD": preload},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                try:
+                    with urlopen(url, timeout=1):
+                        break
+                except HTTPError:
+                    # any response means the app is serving
+                    break
+                except (URLError, ConnectionError):
+                    if server.poll() is not None:
+                        raise CommandError(
+                            f"gunicorn exited with {server.returncode} before responding"
+                        )
+                    if time.perf_counter() - started > options["timeout"]:
+                        raise CommandError(f"No response from {url}")
+                    time.sleep(0.05)
+            return time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait()
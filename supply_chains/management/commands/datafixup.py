@@ -1,14 +1,30 @@
 from datetime import date
 
 from dateutil.relativedelta import relativedelta
-from django.core.management import BaseCommand
-from django.db import connection
+from django.core.management import BaseCommand, call_command
+from django.db import connection, transaction
+from django.db.models import DateField, Func, Max, OuterRef, Subquery
 
-from supply_chains.models import SupplyChain, StrategicActionUpdate
+from supply_chains.models import (
+    SupplyChain,
+    StrategicActionUpdate,
+    VulnerabilityAssessment,
+)
+from supply_chains.utils import get_reporting_period
 
 Status = StrategicActionUpdate.Status
 
 
+class AddMonths(Func):
+    """Postgres date arithmetic by whole months, clamping to month end like relativedelta"""
+
+    template = "(%(expressions)s + make_interval(months => %(months)d))::date"
+    output_field = DateField()
+
+    def __init__(self, expression, months, **extra):
+        super().__init__(expression, months=int(months), **extra)
+
+
 class Command(BaseCommand):
     """Utility to manipulate sample data/fixtures
 
@@ -40,28 +56,75 @@ class Command(BaseCommand):
 
         months_to_add = relativedelta(months=self.calculate_months_to_add())
         updates = StrategicActionUpdate.objects.all()
-        self.update_submission_and_created_dates(updates, months_to_add)
+        skipped = self.update_submission_and_created_dates(updates, months_to_add)
+        if skipped:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Left {len(skipped)} updates where they were, as moving them would "
+                    "put them in the same month as another update of their strategic "
+                    "action: " + ", ".join(str(pk) for pk in skipped)
+                )
+            )
+        # loaddata saves the vulnerability stages without filling in their documents
+        VulnerabilityAssessment.objects.refresh_stage_documents()
+        # the shifted updates change the counters, and the umbrellas' submission dates
+        call_command("reconcile_counters", stdout=self.stdout)
         self.stdout.write(self.style.SUCCESS(f"Fixtures fixed on {db_name} db"))
 
     def update_submission_and_created_dates(self, updates, months_to_add):
-        updated_updates = []
-        updated_supply_chains = []
-        for update in updates:
-            if update.status in [Status.SUBMITTED, Status.READY_TO_SUBMIT]:
-                if update.submission_date:
-                    update.submission_date += months_to_add
-                    update.date_created += months_to_add
-                    update.supply_chain.last_submission_date = update.submission_date
-                    updated_updates.append(update)
-                    updated_supply_chains.append(update.supply_chain)
-                else:
-                    update.date_created += months_to_add
-                    updated_updates.append(update)
-
-        StrategicActionUpdate.objects.bulk_update(
-            updated_updates, ["submission_date", "date_created"]
+        """Shift update dates and recompute supply chains' last submission dates
+
+        These are set-based UPDATE statements, so the number of queries doesn't grow with the data.
+        Returns the primary keys of the updates left unshifted, as in `colliding_updates()`.
+        """
+        months = months_to_add.years * 12 + months_to_add.months
+        updates = updates.filter(status__in=[Status.SUBMITTED, Status.READY_TO_SUBMIT])
+        skipped = self.colliding_updates(updates, months_to_add)
+        updates = updates.exclude(pk__in=skipped)
+        submitted_updates = updates.filter(submission_date__isnull=False)
+        latest_submission_date = (
+            submitted_updates.filter(supply_chain=OuterRef("pk"))
+            .values("supply_chain")
+            .annotate(latest=Max("submission_date"))
+            .values("latest")
+        )
+
+        with transaction.atomic():
+            updates.update(
+                submission_date=AddMonths("submission_date", months),
+                date_created=AddMonths("date_created", months),
+            )
+            # the shifted dates can land in a different reporting period
+            updates.set_reporting_periods()
+            SupplyChain.objects.filter(
+                pk__in=submitted_updates.values("supply_chain")
+            ).update(last_submission_date=Subquery(latest_submission_date))
+        return skipped
+
+    def colliding_updates(self, updates, months_to_add):
+        """The updates that shifting would put in a reporting period already taken
+
+        Only some of a strategic action's updates are shifted, so a shifted one can land in
+        the period of one that isn't, such as the action's update in progress, or of another
+        shifted one as month ends are clamped. The earliest update keeps the period.
+        """
+        taken = set(
+            StrategicActionUpdate.objects.filter(
+                strategic_action__in=updates.values("strategic_action")
+            )
+            .exclude(pk__in=updates.values("pk"))
+            .values_list("strategic_action", "reporting_period")
         )
-        SupplyChain.objects.bulk_update(updated_supply_chains, ["last_submission_date"])
+        colliding = []
+        for pk, strategic_action, date_created in updates.order_by(
+            "date_created"
+        ).values_list("pk", "strategic_action", "date_created"):
+            period = get_reporting_period(date_created + months_to_add)
+            if (strategic_action, period) in taken:
+                colliding.append(pk)
+            else:
+                taken.add((strategic_action, period))
+        return colliding
 
     def calculate_months_to_add(self):
         today = date.today()
@@ -0,0 +1,83 @@
+import time
+from dataclasses import fields
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from supply_chains.dataset import DatasetGenerator, DatasetSize
+from supply_chains.models import SupplyChain
+from supply_chains.utils import get_reporting_period
+
+
+class Command(BaseCommand):
+    """Fill the database with synthetic departments, supply chains and their details
+
+    The same seed and sizes give the same data. Everything is bulk inserted in one
+    transaction, then the counters and monthly summaries the bulk inserts skip are rebuilt.
+    """
+
+    help = "Generate a synthetic dataset for benchmarks and load tests"
+
+    def add_arguments(self, parser):
+        defaults = DatasetSize()
+        sizes = {
+            "departments": "number of departments",
+            "umbrellas": "number of supply chain umbrellas per department",
+            "supply_chains": "number of supply chains per department",
+            "actions": "number of strategic actions per supply chain",
+            "months": "number of months of updates per strategic action",
+            "countries": "number of countries supply chains can depend on",
+            "users": "number of users per department",
+        }
+        for size, help_text in sizes.items():
+            parser.add_argument(
+                f"--{size.replace('_', '-')}",
+                type=int,
+                default=getattr(defaults, size),
+                help=help_text,
+            )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="seed for the random choices"
+        )
+        parser.add_argument(
+            "--prefix",
+            default="Generated",
+            help="prefix for the names of everything generated",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="number of rows per insert",
+        )
+
+    def handle(self, **options):
+        prefix = options["prefix"]
+        if SupplyChain.objects.filter(name__startswith=f"{prefix} ").exists():
+            raise CommandError(
+                f"Supply chains named '{prefix} ...' already exist, choose another --prefix"
+            )
+        size = DatasetSize(**{f.name: options[f.name] for f in fields(DatasetSize)})
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            dataset = DatasetGenerator(
+                size,
+                seed=options["seed"],
+                prefix=prefix,
+                batch_size=options["batch_size"],
+            ).generate()
+        for label, count in dataset.counts.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(f"Generated in {time.perf_counter() - started:.1f}s")
+
+        call_command("reconcile_counters", stdout=self.stdout)
+        first_period = get_reporting_period(date.today()) - relativedelta(
+            months=max(size.months - 1, 0)
+        )
+        call_command(
+            "refresh_monthly_summaries", since=first_period, stdout=self.stdout
+        )
@@ -0,0 +1,221 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import StringIO
+from typing import Dict, List, Tuple
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from supply_chains.management.commands.ingest_csv import (
+    MODEL_GOV_DEPT,
+    MODEL_SUPPLY_CHAIN,
+    MODEL_STRAT_ACTION,
+    MODEL_STRAT_ACTION_UPDATE,
+)
+
+# Each load is the management command that performs it, the arguments that precede
+# the manifest's file paths, and the loads whose rows it refers to by foreign key.
+# The counters are reconciled once, after every load has run.
+LOADS = {
+    "govdepartment": ("ingest_csv", ["--no-reconcile", MODEL_GOV_DEPT], []),
+    "supplychain": (
+        "ingest_csv",
+        ["--no-reconcile", MODEL_SUPPLY_CHAIN],
+        ["govdepartment"],
+    ),
+    "strategicaction": (
+        "ingest_csv",
+        ["--no-reconcile", MODEL_STRAT_ACTION],
+        ["supplychain"],
+    ),
+    "strategicactionupdate": (
+        "ingest_csv",
+        ["--no-reconcile", MODEL_STRAT_ACTION_UPDATE],
+        ["strategicaction"],
+    ),
+    "stages": ("ingest_stages", [], ["supplychain"]),
+    "vulnerabilities": ("ingest_vulnerabilities", [], ["supplychain"]),
+    "countrydata": ("ingestcountrydata", [], ["supplychain"]),
+    "scenarioassessments": ("ingestscenarioassessments", [], ["supplychain"]),
+}
+
+
+def dependencies_in_manifest(load: str, manifest: Dict) -> List[str]:
+    """The loads that must finish before this one, ignoring any not in the manifest
+
+    Loads absent from the manifest are assumed to have been ingested already.
+    """
+    return [dependency for dependency in LOADS[load][2] if dependency in manifest]
+
+
+def execution_order(manifest: Dict) -> List[List[str]]:
+    """Group the manifest's loads into stages where each only depends on earlier stages"""
+    remaining = set(manifest)
+    done = set()
+    stages = []
+    while remaining:
+        ready = sorted(
+            load
+            for load in remaining
+            if set(dependencies_in_manifest(load, manifest)) <= done
+        )
+        if not ready:
+            raise CommandError(f"Circular dependency between {sorted(remaining)}")
+        stages.append(ready)
+        done.update(ready)
+        remaining.difference_update(ready)
+    return stages
+
+
+def run_load(command: str, args: List[str]) -> str:
+    """Run one ingest command and return its output"""
+    output = StringIO()
+    call_command(command, *args, stdout=output, stderr=output)
+    return output.getvalue()
+
+
+def run_load_in_worker(command: str, args: List[str]) -> str:
+    """Run one ingest command in a pool worker, closing the connection it opened"""
+    try:
+        return run_load(command, args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Ingest a set of resilience tool data files in dependency order"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "manifest",
+            help=(
+                "JSON file mapping each load to the file path(s) for it; "
+                f"supported loads are {list(LOADS)}"
+            ),
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="number of loads to run at the same time; 1 runs them in this process",
+        )
+
+    def handle(self, **options):
+        manifest = self._read_manifest(options["manifest"])
+        # fail on a bad manifest before anything is ingested
+        execution_order(manifest)
+
+        if options["jobs"] > 1:
+            failed = self._run_in_pool(manifest, options["jobs"])
+        else:
+            failed = self._run_in_process(manifest)
+
+        # including what the loads that succeeded brought in when others failed
+        call_command("reconcile_counters", stdout=self.stdout)
+        if failed:
+            raise CommandError(f"Failed to ingest {sorted(failed)}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully ingested {', '.join(manifest)}")
+        )
+
+    def _read_manifest(self, manifest_path: str) -> Dict:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        unknown = set(manifest) - set(LOADS)
+        if unknown:
+            raise CommandError(
+                f"Unknown loads {sorted(unknown)}. \n\nRefer help for supported values"
+            )
+        # file paths are relative to the manifest so it can be moved along with the data
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        return {
+            load: [
+                os.path.join(base_dir, path)
+                for path in ([paths] if isinstance(paths, str) else paths)
+            ]
+            for load, paths in manifest.items()
+        }
+
+    def _load_args(self, load: str, manifest: Dict) -> Tuple[str, List[str]]:
+        command, args, _ = LOADS[load]
+        return command, args + manifest[load]
+
+    def _report(self, load: str, output: str = "", error: Exception = None):
+        if error is None:
+            self.stdout.write(output, ending="")
+            self.stdout.write(self.style.SUCCESS(f"Finished {load}"))
+        else:
+            self.stdout.write(self.style.ERROR(f"Failed {load}: {error}"))
+
+    def _run_in_process(self, manifest: Dict) -> set:
+        failed = set()
+        for stage in execution_order(manifest):
+            for load in stage:
+                if failed.intersection(dependencies_in_manifest(load, manifest)):
+                    failed.add(load)
+                    self.stdout.write(self.style.ERROR(f"Skipped {load}"))
+                    continue
+                try:
+                    output = run_load(*self._load_args(load, manifest))
+                except Exception as e:
+                    failed.add(load)
+                    self._report(load, error=e)
+                else:
+                    self._report(load, output)
+        return failed
+
+    def _skip_dependents(self, manifest: Dict, pending: set, failed: set):
+        """Skip the pending loads that depend on a failed one, directly or through others"""
+        skipped = True
+        while skipped:
+            skipped = sorted(
+                load
+                for load in pending
+                if failed.intersection(dependencies_in_manifest(load, manifest))
+            )
+            for load in skipped:
+                pending.discard(load)
+                failed.add(load)
+                self.stdout.write(self.style.ERROR(f"Skipped {load}"))
+
+    def _run_in_pool(self, manifest: Dict, jobs: int) -> set:
+        """Start each load as soon as everything it depends on has finished
+
+        Workers are forked from this process so they share its already set up Django,
+        and each opens its own database connection.
+        """
+        done = set()
+        failed = set()
+        pending = set(manifest)
+        running = {}
+        # a forked worker must not share the parent's open connections
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            while pending or running:
+                self._skip_dependents(manifest, pending, failed)
+                for load in sorted(pending):
+                    if set(dependencies_in_manifest(load, manifest)) <= done:
+                        pending.discard(load)
+                        self.stdout.write(f"Starting {load}")
+                        future = executor.submit(
+                            run_load_in_worker, *self._load_args(load, manifest)
+                        )
+                        running[future] = load
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    load = running.pop(future)
+                    try:
+                        self._report(load, future.result())
+                    except Exception as e:
+                        failed.add(load)
+                        self._report(load, error=e)
+                    else:
+                        done.add(load)
+        return failed
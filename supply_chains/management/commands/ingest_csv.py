@@ -1,4 +1,5 @@
 import csv
+import hashlib
 import json
 from typing import List, Dict
 from datetime import date, datetime
@@ -7,8 +8,17 @@ from django.core import management
 from django.core.management.commands import loaddata
 from django.core.management.base import BaseCommand, CommandError
 from django.core.files.temp import NamedTemporaryFile
-
-from supply_chains.models import SupplyChain, StrategicAction, StrategicActionUpdate
+from django.db import transaction
+from django.utils import timezone
+
+from supply_chains.models import (
+    SupplyChain,
+    StrategicAction,
+    StrategicActionUpdate,
+    IngestedFile,
+    IngestedRow,
+)
+from supply_chains.utils import get_reporting_period
 from accounts.models import GovDepartment
 
 MODEL_GOV_DEPT = "accounts.govdepartment"
@@ -26,9 +36,19 @@ ALL_MODELS = [
 GENERIC_ARCHIVE_REASON = "Archived with generic reason"
 
 
+def _content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def _row_hash(row: Dict) -> str:
+    return _content_hash(json.dumps(row, sort_keys=True).encode())
+
+
 class Command(BaseCommand):
     help = "Ingest CSV formatted resilience tool data"
 
+    BATCH_SIZE = 500
+
     def add_arguments(self, parser):
         parser.add_argument(
             "model",
@@ -40,6 +60,21 @@ class Command(BaseCommand):
             help="The file system path to the CSV file with the data to import",
         )
 
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="only apply rows that are new or changed since the last ingest, in batches",
+        )
+
+        parser.add_argument(
+            "--no-reconcile",
+            action="store_true",
+            help=(
+                "leave the supply chain counters for the caller to reconcile, "
+                "once it has ingested everything"
+            ),
+        )
+
     def _get_json_object(self, csv_file: str) -> object:
         with open(csv_file) as f:
             reader = csv.DictReader(f)
@@ -140,6 +175,10 @@ class Command(BaseCommand):
                 row["fields"]["date_created"] = (
                     row["fields"]["date_created"] or row["fields"]["submission_date"]
                 )
+                # loaddata bypasses the field's pre_save, which would normally set this
+                row["fields"]["reporting_period"] = get_reporting_period(
+                    date.fromisoformat(row["fields"]["date_created"])
+                ).isoformat()
 
                 row["fields"]["user"] = row["fields"]["user"] or None
                 row["fields"].pop("actual supply chain name (not in database)", None)
@@ -149,6 +188,19 @@ class Command(BaseCommand):
 
         return rows
 
+    def _get_ingested_model(self, model: str) -> object:
+        if model == MODEL_GOV_DEPT:
+            return GovDepartment
+
+        if model == MODEL_SUPPLY_CHAIN:
+            return SupplyChain
+
+        if model == MODEL_STRAT_ACTION:
+            return StrategicAction
+
+        if model == MODEL_STRAT_ACTION_UPDATE:
+            return StrategicActionUpdate
+
     def _save_objects(self, model: str) -> None:
         """Save objects being ingested
 
@@ -157,17 +209,7 @@ class Command(BaseCommand):
         This method is necessary to trigger our save over-rides within models as exisitng
         admin command loaddata doesn't invoke that.
         """
-        if model == MODEL_GOV_DEPT:
-            ingested_model = GovDepartment
-
-        if model == MODEL_SUPPLY_CHAIN:
-            ingested_model = SupplyChain
-
-        if model == MODEL_STRAT_ACTION:
-            ingested_model = StrategicAction
-
-        if model == MODEL_STRAT_ACTION_UPDATE:
-            ingested_model = StrategicActionUpdate
+        ingested_model = self._get_ingested_model(model)
 
         try:
             for obj in ingested_model.objects.all():
@@ -177,21 +219,106 @@ class Command(BaseCommand):
             ingested_model.objects.all().delete()
             raise
 
+    def _add_last_modified(self, rows: List) -> None:
+        for row in rows:
+            if "last_modified" not in row:
+                row["last_modified"] = datetime.now().strftime(r"%Y-%m-%dT%H:%M:%S.%f")
+
+    def _load_rows(self, model: str, rows: List) -> None:
+        json_obj = self._format_to_django_object(model, rows)
+
+        with NamedTemporaryFile(suffix=".json", mode="w") as fp:
+            json.dump(json_obj, fp)
+            fp.seek(0)
+            management.call_command(
+                loaddata.Command(), fp.name, format="json", verbosity=0
+            )
+
+    def _reconcile_counters(self, **options) -> None:
+        """Recompute the supply chain counters, unless the caller is going to
+
+        Saving an instance read back from the database changes none of the values it
+        was loaded with, so the saves here leave the counters where they were.
+        """
+        if not options["no_reconcile"]:
+            management.call_command("reconcile_counters", stdout=self.stdout)
+
+    def _ingest_incrementally(self, model: str, csv_file: str) -> int:
+        """Apply only the rows that have changed since the last ingest, returning how many
+
+        Each batch is loaded, saved and recorded in the ingest ledger in one transaction,
+        so if a run fails the batches before it stay applied and re-running the
+        same file carries on from there. Nothing is deleted on failure.
+        """
+        with open(csv_file, "rb") as f:
+            file_hash = _content_hash(f.read())
+        ingested_file, _ = IngestedFile.objects.get_or_create(
+            model=model, content_hash=file_hash
+        )
+        if ingested_file.completed:
+            self.stdout.write(
+                self.style.SUCCESS(f"No changes to ingest into {model}, file unchanged")
+            )
+            return 0
+
+        rows = json.loads(self._get_json_object(csv_file))
+        ingested_hashes = dict(
+            IngestedRow.objects.filter(model=model).values_list(
+                "row_key", "content_hash"
+            )
+        )
+        changed_rows = []
+        for row in rows:
+            row_hash = _row_hash(row)
+            if ingested_hashes.get(row["id"]) != row_hash:
+                changed_rows.append((row, row_hash))
+
+        ingested_model = self._get_ingested_model(model)
+        for start in range(0, len(changed_rows), self.BATCH_SIZE):
+            batch = changed_rows[start : start + self.BATCH_SIZE]
+            batch_rows = [row for row, _ in batch]
+            row_hashes = {row["id"]: row_hash for row, row_hash in batch}
+            with transaction.atomic():
+                self._add_last_modified(batch_rows)
+                self._load_rows(model, batch_rows)
+                for obj in ingested_model.objects.filter(pk__in=row_hashes):
+                    obj.save()
+                IngestedRow.objects.filter(model=model, row_key__in=row_hashes).delete()
+                IngestedRow.objects.bulk_create(
+                    IngestedRow(model=model, row_key=row_key, content_hash=row_hash)
+                    for row_key, row_hash in row_hashes.items()
+                )
+                ingested_file.rows_applied += len(batch)
+                ingested_file.save()
+
+        ingested_file.completed = timezone.now()
+        ingested_file.save()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully ingested {len(changed_rows)} changed rows of "
+                f"{len(rows)} into {model}"
+            )
+        )
+        return len(changed_rows)
+
     def handle(self, **options):
         if options["model"] not in ALL_MODELS:
             raise CommandError(
                 f"Unknown model {options['model']}. \n\nRefer help for supported values"
             )
 
+        if options["incremental"]:
+            if self._ingest_incrementally(options["model"], options["csvfile"]):
+                self._reconcile_counters(**options)
+            return
+
         obj = json.loads(self._get_json_object(options["csvfile"]))
         # As an `auto_now` field cannot be null, but `loaddata` (which is used by this command)
         # bypasses both `Model.save()` and 'QuerySet.update()` by going directly to the database,
         # data ingestion causes an IntegrityError unless the `last_modified` field's value is explicitly set.
         # The value used is `datetime.now()` to replicate the normal behaviour
         # when an object with an `auto_now` field is created.
-        for row in obj:
-            if "last_modified" not in row:
-                row["last_modified"] = datetime.now().strftime(r"%Y-%m-%dT%H:%M:%S.%f")
+        self._add_last_modified(obj)
         json_obj = self._format_to_django_object(options["model"], obj)
 
         with NamedTemporaryFile(suffix=".json", mode="w") as fp:
@@ -204,3 +331,4 @@ class Command(BaseCommand):
                     f"Successfully ingested data into {options['model']}"
                 )
             )
+        self._reconcile_counters(**options)
@@ -1,12 +1,13 @@
 import csv
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from django.core.management.base import BaseCommand
-from django.forms.models import ALL_FIELDS
+from django.db import transaction
 
 from supply_chains.models import (
     SupplyChain,
     VulnerabilityAssessment,
+    VulAssessmentStage,
     VulAssessmentSupplyStage,
     VulAssessmentReceiveStage,
     VulAssessmentMakeStage,
@@ -14,21 +15,26 @@ from supply_chains.models import (
     VulAssessmentDeliverStage,
     NullableRAGRating,
 )
+from supply_chains.rollup import mark_stale
 
 EXPECTED_VUL_ROWS_PER_SC = 14
 EXPECTED_RAG_ROWS_PER_SC = 5
 
-ALL_FIELDS = list()
-
-for m in [
-    VulnerabilityAssessment,
-    VulAssessmentSupplyStage,
-    VulAssessmentReceiveStage,
-    VulAssessmentMakeStage,
-    VulAssessmentStoreStage,
-    VulAssessmentDeliverStage,
-]:
-    ALL_FIELDS.extend([f.name for f in m._meta.get_fields()])
+STAGE_MODELS = {
+    model.stage_name: model
+    for model in [
+        VulAssessmentSupplyStage,
+        VulAssessmentReceiveStage,
+        VulAssessmentMakeStage,
+        VulAssessmentStoreStage,
+        VulAssessmentDeliverStage,
+    ]
+}
+STAGE_BY_CHARACTERISTIC = {
+    char_id: stage_name
+    for stage_name, model in STAGE_MODELS.items()
+    for char_id in model.characteristic_ids
+}
 
 RAG_VALUE_LOOKUP = {item[1]: item[0] for item in NullableRAGRating.choices}
 
@@ -43,65 +49,30 @@ def _lookup_rag_value(label: str) -> str:
     return value
 
 
-def _get_vul_attributes(index: int) -> Tuple:
-    matched_fields = [x for x in ALL_FIELDS if x.endswith(f"_{index}")]
-
-    return matched_fields
-
-
-def _get_rag_attribute(stage: str) -> str:
-    return f"{stage.lower()}_stage_rag_rating"
-
-
-def _get_sub_model_by_stage(stage: str, vul: VulnerabilityAssessment) -> object:
-    stage = stage.lower().strip()
-    if stage == "supply":
-        obj = VulAssessmentSupplyStage.objects.get(vulnerability=vul)
-    elif stage == "receive":
-        obj = VulAssessmentReceiveStage.objects.get(vulnerability=vul)
-    elif stage == "make":
-        obj = VulAssessmentMakeStage.objects.get(vulnerability=vul)
-    elif stage == "store":
-        obj = VulAssessmentStoreStage.objects.get(vulnerability=vul)
-    elif stage == "deliver":
-        obj = VulAssessmentDeliverStage.objects.get(vulnerability=vul)
-    else:
-        raise Exception(
-            f"Unknown stage {stage} encountered within supplay chain {vul.supply_chain.name}"
-        )
-
-    return obj
-
-
-def _get_sub_model(char_id: int, vul: VulnerabilityAssessment) -> object:
-    if char_id in [1, 2, 3]:
-        obj, _ = VulAssessmentSupplyStage.objects.get_or_create(vulnerability=vul)
-    elif char_id in [4, 5, 6]:
-        obj, _ = VulAssessmentReceiveStage.objects.get_or_create(vulnerability=vul)
-    elif char_id in [7, 8, 9, 10]:
-        obj, _ = VulAssessmentMakeStage.objects.get_or_create(vulnerability=vul)
-    elif char_id in [11, 12, 13]:
-        obj, _ = VulAssessmentStoreStage.objects.get_or_create(vulnerability=vul)
-    elif char_id == 14:
-        obj, _ = VulAssessmentDeliverStage.objects.get_or_create(vulnerability=vul)
-    else:
-        raise Exception(
-            f"Unknown charecterstic_id {char_id} encountered within supplay chain {vul.supply_chain.name}"
-        )
-
-    return obj
-
+def _get_stage(
+    stage_name: str, vul: VulnerabilityAssessment, stages: Dict
+) -> VulAssessmentStage:
+    if stage_name not in stages:
+        stages[stage_name] = STAGE_MODELS[stage_name](vulnerability=vul)
+    return stages[stage_name]
 
-def _ingest_vul_object(sc_name: SupplyChain, vul_data: List, rag_data: List):
-    sc = SupplyChain.objects.get(name=sc_name)
 
-    obj = VulnerabilityAssessment.objects.create(supply_chain=sc)
+def _build_vul_object(
+    sc: SupplyChain, vul_data: List, rag_data: List
+) -> Tuple[VulnerabilityAssessment, List[VulAssessmentStage]]:
+    """Build a supply chain's assessment and its stages, without saving them"""
+    obj = VulnerabilityAssessment(supply_chain=sc)
+    stages = {}
 
     for v in vul_data:
-        vul_char_id = v["sc_vulnerability_stage"]
-        sub_obj = _get_sub_model(int(vul_char_id), obj)
-
-        rag_field, summary_field, rationale_field = _get_vul_attributes(vul_char_id)
+        vul_char_id = int(v["sc_vulnerability_stage"])
+        try:
+            stage_name = STAGE_BY_CHARACTERISTIC[vul_char_id]
+        except KeyError:
+            raise Exception(
+                f"Unknown charecterstic_id {vul_char_id} encountered within supplay chain {sc.name}"
+            )
+        sub_obj = _get_stage(stage_name, obj, stages)
 
         rag_val, summary_val, rationale_val = (
             v["vulnerability_stage_rating"].title(),
@@ -109,25 +80,50 @@ def _ingest_vul_object(sc_name: SupplyChain, vul_data: List, rag_data: List):
             v["vulnerability_stage_rationale"],
         )
 
-        setattr(sub_obj, rag_field, _lookup_rag_value(rag_val))
-        setattr(sub_obj, summary_field, summary_val)
-        setattr(sub_obj, rationale_field, rationale_val)
-
-        sub_obj.save()
+        setattr(
+            sub_obj,
+            f"{stage_name}_rag_rating_{vul_char_id}",
+            _lookup_rag_value(rag_val),
+        )
+        setattr(sub_obj, f"{stage_name}_stage_summary_{vul_char_id}", summary_val)
+        setattr(sub_obj, f"{stage_name}_stage_rationale_{vul_char_id}", rationale_val)
 
     for rag in rag_data:
-        stage, val = (
-            rag["sc_stage"],
+        stage_name, val = (
+            rag["sc_stage"].lower().strip(),
             rag["overall_vulnerability_assessement_rating"].title(),
         )
-        sub_obj = _get_sub_model_by_stage(stage, obj)
-        setattr(sub_obj, _get_rag_attribute(stage), _lookup_rag_value(val))
-
-        sub_obj.save()
-
-    obj.save()
-
-    return
+        if stage_name not in STAGE_MODELS:
+            raise Exception(
+                f"Unknown stage {stage_name} encountered within supplay chain {sc.name}"
+            )
+        sub_obj = _get_stage(stage_name, obj, stages)
+        setattr(sub_obj, f"{stage_name}_stage_rag_rating", _lookup_rag_value(val))
+
+    # bulk_create doesn't call the stages' save(), which would fill this in
+    obj.stage_document = {
+        stage_name: stage.to_document() for stage_name, stage in stages.items()
+    }
+
+    return obj, list(stages.values())
+
+
+def _ingest_vul_objects(objects: List[Tuple[VulnerabilityAssessment, List]]):
+    """Write the assessments and their stages with one insert per model"""
+    with transaction.atomic():
+        VulnerabilityAssessment.objects.bulk_create([obj for obj, _ in objects])
+        for model in STAGE_MODELS.values():
+            model.objects.bulk_create(
+                [
+                    stage
+                    for _, stages in objects
+                    for stage in stages
+                    if isinstance(stage, model)
+                ]
+            )
+        # nor do the bulk writes send the signals that keep the monthly summaries fresh
+        for obj, _ in objects:
+            mark_stale(obj.supply_chain_id)
 
 
 class Command(BaseCommand):
@@ -171,7 +167,14 @@ class Command(BaseCommand):
             )
         )
 
-        success_count = 0
+        supply_chains = {
+            sc.name: sc for sc in SupplyChain.objects.filter(name__in=sc_list)
+        }
+        missing = set(sc_list).difference(supply_chains)
+        if missing:
+            raise SupplyChain.DoesNotExist(f"Unknown supply chains {sorted(missing)}")
+
+        objects = []
         for _, sc in enumerate(sc_list):
             vul = [x for x in vul_data if x["supply_chain_reporting_name"] == sc]
             rag = [x for x in overall_data if x["supply_chain_reporting_name"] == sc]
@@ -183,8 +186,10 @@ class Command(BaseCommand):
                 raise Exception(
                     f"Inconsistent data for {sc} with {len(vul)}(expected {EXPECTED_VUL_ROWS_PER_SC}) rows and {len(rag)}(expected {EXPECTED_RAG_ROWS_PER_SC}) RAG ratings."
                 )
-            _ingest_vul_object(sc, vul, rag)
-            success_count += 1
+            objects.append(_build_vul_object(supply_chains[sc], vul, rag))
+
+        _ingest_vul_objects(objects)
+        success_count = len(objects)
 
         self.stdout.write(
             self.style.SUCCESS(
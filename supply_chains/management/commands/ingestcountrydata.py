@@ -3,15 +3,18 @@ import os
 
 from django.conf import settings
 from django.core.management import BaseCommand
+from django.db import transaction
 
 from supply_chains.models import SupplyChain, Country, CountryDependency
 
 
 class Command(BaseCommand):
-    """Utility to ingest country dependency spreadsheet data"""
+    """Utility to ingest country dependency spreadsheet data
 
-    class EmptyNameError(Exception):
-        pass
+    The spreadsheet is a matrix with one row per supply chain and one column per country,
+    so it is read in a single pass, pivoted to (supply chain, country, level) triples
+    and written with one bulk insert rather than a query per cell.
+    """
 
     filepath = None
 
@@ -22,6 +25,7 @@ class Command(BaseCommand):
 
     FIRST_COUNTRY_COLUMN = 7
     SUPPLY_CHAIN_NAME_FIELD = "Supply Chain Name"
+    BATCH_SIZE = 1000
     source_dependency_level_to_choice_value = {
         # Spreadsheet has an empty string for "No dependency" so munge the label in the value lookup table
         choice[1].lower() if choice[1] != "No" else "": choice[0]
@@ -38,8 +42,16 @@ class Command(BaseCommand):
         self.filepath = options["csvfile"]
         if not os.path.isabs(self.filepath):
             self.filepath = settings.BASE_DIR / self.filepath
-        self.ingest_countries()
-        self.ingest_supply_chain_country_dependencies()
+        self.unrecognised_supply_chains = []
+        self.countries_ingested = 0
+        self.supply_chains_found = 0
+        self.dependencies_ingested = 0
+        self._known_countries = None
+
+        self.fieldnames, self.matrix = self.load_matrix()
+        with transaction.atomic():
+            self.ingest_countries()
+            self.ingest_supply_chain_country_dependencies()
         self.stdout.write(
             self.style.ERROR(f"Countries ingested: {self.countries_ingested}")
         )
@@ -61,64 +73,115 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("No unrecognised supply chains."))
 
     def ingest_countries(self):
-        for country_name in self.source_country_names:
-            Country.objects.get_or_create(name=country_name)
-            self.countries_ingested += 1
+        existing_names = set(
+            Country.objects.filter(name__in=self.source_country_names).values_list(
+                "name", flat=True
+            )
+        )
+        Country.objects.bulk_create(
+            [
+                Country(name=country_name)
+                for country_name in dict.fromkeys(self.source_country_names)
+                if country_name not in existing_names
+            ],
+            batch_size=self.BATCH_SIZE,
+        )
+        self.countries_ingested += len(self.source_country_names)
 
     def ingest_supply_chain_country_dependencies(self):
-        for row in self.supply_chain_country_dependencies:
+        dependencies = self.pivot_matrix()
+        if not dependencies:
+            return
+        existing_dependencies = set(
+            CountryDependency.objects.filter(
+                supply_chain__in={
+                    supply_chain_id for supply_chain_id, _, _ in dependencies
+                }
+            ).values_list("supply_chain_id", "country_id", "dependency_level")
+        )
+        CountryDependency.objects.bulk_create(
+            [
+                CountryDependency(
+                    supply_chain_id=supply_chain_id,
+                    country_id=country_id,
+                    dependency_level=dependency_level,
+                )
+                for supply_chain_id, country_id, dependency_level in dict.fromkeys(
+                    dependencies
+                )
+                if (supply_chain_id, country_id, dependency_level)
+                not in existing_dependencies
+            ],
+            batch_size=self.BATCH_SIZE,
+        )
+        self.dependencies_ingested += len(dependencies)
+
+    def pivot_matrix(self):
+        """Turn the wide supply chain × country matrix into long-format triples
+
+        Each column's level labels are mapped through `source_dependency_level_to_choice_value`
+        and each row's supply chain is resolved from a single name lookup table,
+        so no queries are made per row or per cell.
+        """
+        supply_chains_by_name = {
+            name.lower(): pk
+            for pk, name in SupplyChain.objects.values_list("pk", "name")
+        }
+        country_ids = [
+            self.known_countries[country_name]
+            for country_name in self.source_country_names
+        ]
+        name_column = self.fieldnames.index(self.SUPPLY_CHAIN_NAME_FIELD)
+
+        dependencies = []
+        for row in self.matrix:
+            supply_chain_name = row[name_column]
+            if not supply_chain_name:
+                # The spreadsheet has empty rows after the data
+                break
             try:
-                self.ingest_row(row)
-            except self.EmptyNameError:
-                return
-
-    def ingest_row(self, source_country_dependencies):
-        supply_chain_name = source_country_dependencies[self.SUPPLY_CHAIN_NAME_FIELD]
-        if not supply_chain_name:
-            raise self.EmptyNameError
-        try:
-            supply_chain = SupplyChain.objects.get(name__iexact=supply_chain_name)
+                supply_chain_id = supply_chains_by_name[supply_chain_name.lower()]
+            except KeyError:
+                self.unrecognised_supply_chains.append(supply_chain_name)
+                continue
             self.supply_chains_found += 1
-        except SupplyChain.DoesNotExist:
-            self.unrecognised_supply_chains.append(supply_chain_name)
-            return
-        for country in self.known_countries:
-            source_dependency_level = source_country_dependencies[country.name]
-            dependency_level = self.source_dependency_level_to_choice_value[
-                source_dependency_level.lower()
-            ]
-            CountryDependency.objects.get_or_create(
-                country=country,
-                supply_chain=supply_chain,
-                dependency_level=dependency_level,
+            levels = row[self.FIRST_COUNTRY_COLUMN :]
+            dependencies.extend(
+                zip(
+                    [supply_chain_id] * len(country_ids),
+                    country_ids,
+                    [
+                        self.source_dependency_level_to_choice_value[level.lower()]
+                        for level in levels
+                    ],
+                )
             )
-            self.dependencies_ingested += 1
+        return dependencies
 
     _known_countries = None
 
     @property
     def known_countries(self):
         if self._known_countries is None:
-            self._known_countries = Country.objects.all()
+            self._known_countries = dict(
+                Country.objects.filter(name__in=self.source_country_names).values_list(
+                    "name", "pk"
+                )
+            )
         return self._known_countries
 
     @property
     def source_country_names(self):
         return self.fieldnames[self.FIRST_COUNTRY_COLUMN :]
 
-    @property
-    def fieldnames(self):
-        with open(
-            self.filepath, "r", encoding="utf-8-sig"
-        ) as country_file:  # encoding specified as export has BOM
-            reader = csv.DictReader(country_file)
-            return reader.fieldnames
-
-    @property
-    def supply_chain_country_dependencies(self):
+    def load_matrix(self):
+        """Read the whole sheet as a header row and a 2-D list of cell values"""
         with open(
             self.filepath, "r", encoding="utf-8-sig"
         ) as country_file:  # encoding specified as export has BOM
-            reader = csv.DictReader(country_file)
-            for row in reader:
-                yield row
+            reader = csv.reader(country_file)
+            fieldnames = next(reader)
+            width = len(fieldnames)
+            # pad short rows so every row lines up with the country columns
+            matrix = [row + [""] * (width - len(row)) for row in reader if row]
+        return fieldnames, matrix
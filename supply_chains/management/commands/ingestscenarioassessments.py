@@ -1,16 +1,32 @@
 import csv
+import json
 import os
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
 from django.utils.text import slugify
 
+from change_log.tracking import batched, record_create, record_update, recording
 from supply_chains.models import SupplyChain, ScenarioAssessment, NullableRAGRating
 
 
+SCENARIO_TYPES = (
+    "borders_closed",
+    "storage_full",
+    "ports_blocked",
+    "raw_material_shortage",
+    "labour_shortage",
+    "demand_spike",
+)
+
+
 class Command(BaseCommand):
     """Utility to ingest country dependency spreadsheet data"""
 
+    BATCH_SIZE = 500
+
     filepath = None
     unrecognised_supply_chains = set()
 
@@ -19,12 +35,182 @@ class Command(BaseCommand):
             "csvfile",
             help="The file system path to the CSV file with the data to import",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="validate every row before writing, then create and update assessments in batches",
+        )
+        parser.add_argument(
+            "--report",
+            help="file system path to write a JSON validation report to (used with --bulk)",
+        )
 
     def handle(self, **options):
         self.filepath = options["csvfile"]
         if not os.path.isabs(self.filepath):
             self.filepath = settings.BASE_DIR / self.filepath
-        self.ingest_scenario_assessments()
+        if options["bulk"]:
+            self.ingest_scenario_assessments_in_bulk(options["report"])
+        else:
+            self.ingest_scenario_assessments()
+
+    def ingest_scenario_assessments_in_bulk(self, report_path=None):
+        """Validate the whole file up front and then write it in one transaction
+
+        Nothing is written if any row is invalid; the problems are listed in the report instead.
+        """
+        assessments, report = self.validate_source_assessments()
+        if report_path:
+            with open(report_path, "w") as report_file:
+                json.dump(report, report_file, indent=2)
+        for supply_chain_name in report["unrecognised_supply_chains"]:
+            self.stdout.write(
+                self.style.ERROR(f"Unrecognised supply chain: {supply_chain_name}")
+            )
+        if report["errors"]:
+            for error in report["errors"]:
+                self.stdout.write(
+                    self.style.ERROR(f"Row {error['row']}: {error['message']}")
+                )
+            raise CommandError(
+                f"{len(report['errors'])} invalid rows found, no scenario assessments were ingested"
+            )
+
+        created, updated = self.save_assessments(assessments)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scenario assessments created: {created}, updated: {updated}"
+            )
+        )
+
+    def validate_source_assessments(self):
+        """Build assessment field values for every supply chain in the file
+
+        Returns the values keyed by supply chain along with a JSON-serialisable report
+        of the rows that could not be used.
+        """
+        supply_chains_by_name = {
+            supply_chain.name: supply_chain
+            for supply_chain in SupplyChain.objects.all()
+        }
+        assessments = {}
+        errors = []
+        unrecognised_supply_chains = set()
+        for row_number, assessment_row in enumerate(self.source_data, start=1):
+            supply_chain_name = assessment_row["supply_chain_name"].strip()
+            if not supply_chain_name:
+                # The CSV can have empty rows after the data, giving "" as the supply chain name
+                break
+            if supply_chain_name not in supply_chains_by_name:
+                unrecognised_supply_chains.add(supply_chain_name)
+                continue
+            supply_chain = supply_chains_by_name[supply_chain_name]
+            assessment_kwargs = assessments.setdefault(
+                supply_chain.pk, {"supply_chain": supply_chain}
+            )
+            try:
+                row_kwargs = self.scenario_kwargs(assessment_row)
+            except ValueError as e:
+                errors.append(
+                    {
+                        "row": row_number,
+                        "supply_chain_name": supply_chain_name,
+                        "scenario_name": assessment_row["scenario_name"],
+                        "message": str(e),
+                    }
+                )
+                continue
+            for kwarg, value in row_kwargs.items():
+                if kwarg in assessment_kwargs:
+                    errors.append(
+                        {
+                            "row": row_number,
+                            "supply_chain_name": supply_chain_name,
+                            "scenario_name": assessment_row["scenario_name"],
+                            "message": f"{supply_chain_name} already has value for {kwarg}",
+                        }
+                    )
+                    break
+            else:
+                assessment_kwargs.update(row_kwargs)
+        report = {
+            "file": str(self.filepath),
+            "valid_assessments": len(assessments),
+            "unrecognised_supply_chains": sorted(unrecognised_supply_chains),
+            "errors": errors,
+        }
+        return assessments, report
+
+    def scenario_kwargs(self, assessment_row):
+        """Map one CSV row to the model fields for its scenario, raising ValueError if it can't be"""
+        # the data contains a scenario that's no longer relavent
+        if assessment_row["scenario_name"].startswith("End of transition"):
+            return {}
+        scenario_type = assessment_row["scenario_name"].strip().replace(" ", "_")
+        if scenario_type not in SCENARIO_TYPES:
+            raise ValueError(f"Unknown scenario '{assessment_row['scenario_name']}'")
+        rag_rating = assessment_row["rag_rating"].strip().lower()
+        # Handle anomalous values in initial data dump
+        if rag_rating in ("n/a", "tbc"):
+            rag_rating = "none"
+        try:
+            rag_rating = getattr(NullableRAGRating, rag_rating.upper())
+        except AttributeError:
+            raise ValueError(f"Unknown RAG rating '{assessment_row['rag_rating']}'")
+        if assessment_row["is_critical"] not in ("0", "1"):
+            raise ValueError(
+                f"is_critical must be 0 or 1, not '{assessment_row['is_critical']}'"
+            )
+        return {
+            f"{scenario_type}_impact": assessment_row["impact"],
+            f"{scenario_type}_rag_rating": rag_rating,
+            f"{scenario_type}_is_critical": bool(int(assessment_row["is_critical"])),
+            f"{scenario_type}_critical_scenario": assessment_row["critical_scenario"]
+            or "",
+        }
+
+    def save_assessments(self, assessments):
+        """Create or update assessments with one read and batched writes
+
+        `ScenarioAssessment.save()` re-reads each row to decide how to label its revision,
+        so this writes in bulk and records a single revision for the whole import instead.
+        """
+        existing_assessments = {
+            assessment.supply_chain_id: assessment
+            for assessment in ScenarioAssessment.objects.filter(
+                supply_chain__in=assessments.keys()
+            )
+        }
+        to_create = []
+        to_update = []
+        update_fields = {"last_modified"}
+        now = timezone.now()
+        for supply_chain_id, assessment_kwargs in assessments.items():
+            assessment = existing_assessments.get(supply_chain_id)
+            if assessment is None:
+                to_create.append(ScenarioAssessment(**assessment_kwargs))
+                continue
+            for field_name, value in assessment_kwargs.items():
+                setattr(assessment, field_name, value)
+            assessment.last_modified = now
+            update_fields.update(assessment_kwargs.keys())
+            to_update.append(assessment)
+        update_fields.discard("supply_chain")
+
+        comment = f"Imported: {len(to_create)} scenario assessments created, {len(to_update)} edited"
+        with batched(), transaction.atomic(), recording(comment=comment):
+            ScenarioAssessment.objects.bulk_create(
+                to_create, batch_size=self.BATCH_SIZE
+            )
+            if to_update:
+                ScenarioAssessment.objects.bulk_update(
+                    to_update, sorted(update_fields), batch_size=self.BATCH_SIZE
+                )
+            for assessment in to_create:
+                record_create(assessment)
+            for assessment in to_update:
+                record_update(assessment, update_fields)
+        return len(to_create), len(to_update)
 
     def ingest_scenario_assessments(self):
         for assessment_kwargs in self.source_assessments:
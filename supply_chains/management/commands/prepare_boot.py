@@ -0,0 +1,57 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from config import boot
+
+
+class Command(BaseCommand):
+    """Get the database and static files ready for the web process
+
+    Replaces running `migrate`, `createcachetable` and `collectstatic` on every start.
+    `migrate` is skipped when every migration on disk has been applied, and `collectstatic`
+    when STATIC_ROOT was collected from the same files. `createcachetable` is cheap and
+    always runs.
+    """
+
+    help = "Migrate and collect static files, skipping either when nothing has changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="the database to migrate",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="migrate and collect static files even if nothing has changed",
+        )
+
+    def handle(self, **options):
+        started = time.perf_counter()
+        database = options["database"]
+        force = options["force"]
+        verbosity = options["verbosity"]
+
+        unapplied = boot.unapplied_migrations(database)
+        if unapplied or force:
+            self.stdout.write(f"Applying {len(unapplied)} migrations")
+            call_command(
+                "migrate", database=database, interactive=False, verbosity=verbosity
+            )
+        else:
+            self.stdout.write("Migrations are up to date, skipping migrate")
+        call_command("createcachetable", database=database, verbosity=verbosity)
+
+        fingerprint = boot.static_fingerprint()
+        if force or not boot.static_is_collected(fingerprint):
+            self.stdout.write("Collecting static files")
+            call_command("collectstatic", interactive=False, verbosity=verbosity)
+            boot.record_static_fingerprint(fingerprint)
+        else:
+            self.stdout.write("Static files are up to date, skipping collectstatic")
+
+        self.stdout.write(f"Ready to boot in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,123 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from supply_chains.models import (
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+    SupplyChainUmbrella,
+)
+from supply_chains.utils import get_reporting_period
+
+
+def subquery_total(queryset, group_by, aggregate):
+    """A correlated subquery for one group's aggregate, or 0 when the group has no rows"""
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(total=aggregate)
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    """Recompute the denormalised counters on supply chains and umbrellas
+
+    The counters are kept up to date as strategic actions and updates are saved, so
+    this is only needed after bulk loads or direct database changes. Each model's
+    counters are recomputed with a single UPDATE, and the number of rows that had
+    drifted is reported.
+    """
+
+    help = "Recompute the strategic action and update counters on supply chains and umbrellas"
+
+    def handle(self, **options):
+        period = get_reporting_period(date.today())
+        with transaction.atomic():
+            drifted = self.reconcile_supply_chains(period)
+            self.stdout.write(f"Supply chains corrected: {drifted}")
+            drifted = self.reconcile_umbrellas(period)
+            self.stdout.write(f"Supply chain umbrellas corrected: {drifted}")
+        self.stdout.write(self.style.SUCCESS("Counters reconciled"))
+
+    def reconcile_supply_chains(self, period: date) -> int:
+        counters = {
+            "active_strategic_action_count": subquery_total(
+                StrategicAction.objects.filter(
+                    supply_chain=OuterRef("pk"), is_archived=False
+                ),
+                "supply_chain",
+                Count("pk"),
+            ),
+            "submitted_update_count": subquery_total(
+                StrategicActionUpdate.objects.given_month(
+                    period,
+                    supply_chain=OuterRef("pk"),
+                    status=StrategicActionUpdate.Status.SUBMITTED,
+                ),
+                "supply_chain",
+                Count("pk"),
+            ),
+            # ingested supply chains can have a submission date without any updates
+            "last_submission_date": Greatest(
+                "last_submission_date",
+                Subquery(
+                    StrategicActionUpdate.objects.filter(
+                        supply_chain=OuterRef("pk"),
+                        status=StrategicActionUpdate.Status.SUBMITTED,
+                    )
+                    .order_by()
+                    .values("supply_chain")
+                    .annotate(latest=Max("submission_date"))
+                    .values("latest")
+                ),
+            ),
+        }
+        return self.reconcile(SupplyChain.objects.all(), counters, period)
+
+    def reconcile_umbrellas(self, period: date) -> int:
+        def total(field, aggregate):
+            return subquery_total(
+                SupplyChain.objects.filter(supply_chain_umbrella=OuterRef("pk")),
+                "supply_chain_umbrella",
+                aggregate(field),
+            )
+
+        counters = {
+            "active_strategic_action_count": total(
+                "active_strategic_action_count", Sum
+            ),
+            "submitted_update_count": total("submitted_update_count", Sum),
+            "last_submission_date": Subquery(
+                SupplyChain.objects.filter(supply_chain_umbrella=OuterRef("pk"))
+                .order_by()
+                .values("supply_chain_umbrella")
+                .annotate(latest=Max("last_submission_date"))
+                .values("latest")
+            ),
+        }
+        return self.reconcile(SupplyChainUmbrella.objects.all(), counters, period)
+
+    def reconcile(self, queryset, counters, period: date) -> int:
+        """Set the counters to their computed values, returning how many rows differed"""
+        annotated = queryset.annotate(
+            **{f"computed_{field}": value for field, value in counters.items()}
+        )
+        drifted = Q(submitted_update_period__isnull=True) | ~Q(
+            submitted_update_period=period
+        )
+        for field in counters:
+            computed = F(f"computed_{field}")
+            drifted |= ~Q(**{field: computed}) | Q(
+                **{f"{field}__isnull": True, f"computed_{field}__isnull": False}
+            )
+        drifted_count = annotated.filter(drifted).count()
+        queryset.update(submitted_update_period=period, **counters)
+        return drifted_count
@@ -0,0 +1,46 @@
+from datetime import date, datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+
+from supply_chains.models import SupplyChain
+from supply_chains.rollup import refresh_summaries
+from supply_chains.utils import get_reporting_period
+
+
+def month(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}', expected YYYY-MM")
+
+
+class Command(BaseCommand):
+    """Rebuild the monthly supply chain summaries from the data they summarise
+
+    Summaries are kept up to date as data is saved, but changes made with
+    `QuerySet.update()`, the bulk methods or fixtures don't trigger a refresh,
+    so run this after those.
+    """
+
+    help = "Rebuild the monthly supply chain summaries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            type=month,
+            help="first month to rebuild, as YYYY-MM; defaults to the current reporting period",
+        )
+
+    def handle(self, **options):
+        current_period = get_reporting_period(date.today())
+        period = options["since"] or current_period
+        if period > current_period:
+            raise CommandError(f"{period:%Y-%m} is after the current reporting period")
+
+        supply_chain_ids = list(SupplyChain.objects.values_list("pk", flat=True))
+        while period <= current_period:
+            written = refresh_summaries(supply_chain_ids, period)
+            self.stdout.write(f"{period:%Y-%m}: {written} summaries")
+            period += relativedelta(months=1)
+        self.stdout.write(self.style.SUCCESS("Monthly supply chain summaries rebuilt"))
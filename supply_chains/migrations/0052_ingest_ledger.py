@@ -0,0 +1,67 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:43
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0051_auto_20211110_1709"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestedFile",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("model", models.CharField(max_length=64)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("started", models.DateTimeField(auto_now_add=True)),
+                ("completed", models.DateTimeField(blank=True, null=True)),
+                ("rows_applied", models.PositiveIntegerField(default=0)),
+                ("last_modified", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ("-started",),
+            },
+        ),
+        migrations.CreateModel(
+            name="IngestedRow",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("model", models.CharField(max_length=64)),
+                ("row_key", models.CharField(max_length=64)),
+                ("content_hash", models.CharField(max_length=64)),
+                ("last_modified", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="ingestedrow",
+            constraint=models.UniqueConstraint(
+                fields=("model", "row_key"), name="unique_ingested_row"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="ingestedfile",
+            constraint=models.UniqueConstraint(
+                fields=("model", "content_hash"), name="unique_ingested_file"
+            ),
+        ),
+    ]
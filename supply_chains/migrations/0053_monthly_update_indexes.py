@@ -0,0 +1,62 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0052_ingest_ledger"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="strategicaction",
+            index=models.Index(
+                condition=models.Q(("is_archived", False)),
+                fields=["supply_chain", "name"],
+                name="sa_active_sc_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="strategicactionupdate",
+            index=models.Index(
+                fields=["strategic_action", "date_created"], name="sau_sa_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="strategicactionupdate",
+            index=models.Index(
+                fields=["supply_chain", "date_created"], name="sau_sc_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="strategicactionupdate",
+            index=models.Index(
+                fields=["strategic_action", "-submission_date"],
+                name="sau_sa_submission_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="strategicactionupdate",
+            index=models.Index(
+                condition=models.Q(("status", "submitted")),
+                fields=["supply_chain", "date_created"],
+                name="sau_submitted_sc_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="supplychain",
+            index=models.Index(
+                fields=["last_submission_date"], name="sc_last_submission_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="supplychain",
+            index=models.Index(
+                condition=models.Q(("is_archived", False)),
+                fields=["gov_department", "name"],
+                name="sc_active_dept_name_idx",
+            ),
+        ),
+    ]
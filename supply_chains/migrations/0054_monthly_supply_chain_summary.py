@@ -0,0 +1,196 @@
+# Generated by Django 3.2.25 on 2026-10-19 13:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_govdepartment_visualisation_url"),
+        ("supply_chains", "0053_monthly_update_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlySupplyChainSummary",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("period", models.DateField()),
+                ("is_archived", models.BooleanField(default=False)),
+                (
+                    "vulnerability_status",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("RED", "Red"),
+                            ("AMBER", "Amber"),
+                            ("GREEN", "Green"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                (
+                    "risk_severity_status",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("low", "Low"),
+                            ("medium", "Medium"),
+                            ("high", "High"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                (
+                    "criticality_rating",
+                    models.IntegerField(
+                        blank=True,
+                        choices=[
+                            (1, "Limited"),
+                            (2, "Minor"),
+                            (3, "Moderate"),
+                            (4, "Significant"),
+                            (5, "Catastrophic"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                (
+                    "maturity_rating",
+                    models.IntegerField(
+                        blank=True,
+                        choices=[
+                            (1, "Level 1"),
+                            (2, "Level 2"),
+                            (3, "Level 3"),
+                            (4, "Level 4"),
+                            (5, "Level 5"),
+                        ],
+                        null=True,
+                    ),
+                ),
+                (
+                    "supply_stage_rag_rating",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("RED", "Red"),
+                            ("AMBER", "Amber"),
+                            ("GREEN", "Green"),
+                            ("None", "—"),
+                        ],
+                        max_length=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "receive_stage_rag_rating",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("RED", "Red"),
+                            ("AMBER", "Amber"),
+                            ("GREEN", "Green"),
+                            ("None", "—"),
+                        ],
+                        max_length=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "make_stage_rag_rating",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("RED", "Red"),
+                            ("AMBER", "Amber"),
+                            ("GREEN", "Green"),
+                            ("None", "—"),
+                        ],
+                        max_length=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "store_stage_rag_rating",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("RED", "Red"),
+                            ("AMBER", "Amber"),
+                            ("GREEN", "Green"),
+                            ("None", "—"),
+                        ],
+                        max_length=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "deliver_stage_rag_rating",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("RED", "Red"),
+                            ("AMBER", "Amber"),
+                            ("GREEN", "Green"),
+                            ("None", "—"),
+                        ],
+                        max_length=5,
+                        null=True,
+                    ),
+                ),
+                ("strategic_action_count", models.PositiveIntegerField(default=0)),
+                (
+                    "overdue_strategic_action_count",
+                    models.PositiveIntegerField(default=0),
+                ),
+                ("submitted_update_count", models.PositiveIntegerField(default=0)),
+                ("red_update_count", models.PositiveIntegerField(default=0)),
+                ("amber_update_count", models.PositiveIntegerField(default=0)),
+                ("green_update_count", models.PositiveIntegerField(default=0)),
+                ("last_modified", models.DateTimeField(auto_now=True)),
+                (
+                    "gov_department",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="monthly_summaries",
+                        to="accounts.govdepartment",
+                    ),
+                ),
+                (
+                    "supply_chain",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="monthly_summaries",
+                        to="supply_chains.supplychain",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Monthly supply chain summaries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="monthlysupplychainsummary",
+            index=models.Index(
+                fields=["period", "gov_department"], name="scs_period_dept_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="monthlysupplychainsummary",
+            constraint=models.UniqueConstraint(
+                fields=("supply_chain", "period"),
+                name="unique_monthly_supply_chain_summary",
+            ),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:01
+
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from supply_chains.utils import get_last_working_day_of_a_month, get_reporting_period
+
+
+def total(queryset, group_by, aggregate):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(total=aggregate)
+            .values("total")
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    """Count the active strategic actions and this period's submitted updates
+
+    Supply chain last_submission_date is already maintained, so it's left as it is.
+    """
+    SupplyChain = apps.get_model("supply_chains", "SupplyChain")
+    SupplyChainUmbrella = apps.get_model("supply_chains", "SupplyChainUmbrella")
+    StrategicAction = apps.get_model("supply_chains", "StrategicAction")
+    StrategicActionUpdate = apps.get_model("supply_chains", "StrategicActionUpdate")
+
+    period = get_reporting_period(date.today())
+    period_start = get_last_working_day_of_a_month(period - timedelta(days=1))
+    period_end = get_last_working_day_of_a_month(
+        period + relativedelta(months=1) - timedelta(days=1)
+    )
+    SupplyChain.objects.update(
+        active_strategic_action_count=total(
+            StrategicAction.objects.filter(
+                supply_chain=OuterRef("pk"), is_archived=False
+            ),
+            "supply_chain",
+            Count("pk"),
+        ),
+        submitted_update_count=total(
+            StrategicActionUpdate.objects.filter(
+                supply_chain=OuterRef("pk"),
+                status="submitted",
+                date_created__gt=period_start,
+                date_created__lte=period_end,
+            ),
+            "supply_chain",
+            Count("pk"),
+        ),
+        submitted_update_period=period,
+    )
+    supply_chains = SupplyChain.objects.filter(supply_chain_umbrella=OuterRef("pk"))
+    SupplyChainUmbrella.objects.update(
+        active_strategic_action_count=total(
+            supply_chains,
+            "supply_chain_umbrella",
+            Sum("active_strategic_action_count"),
+        ),
+        submitted_update_count=total(
+            supply_chains, "supply_chain_umbrella", Sum("submitted_update_count")
+        ),
+        submitted_update_period=period,
+        last_submission_date=Subquery(
+            supply_chains.order_by()
+            .values("supply_chain_umbrella")
+            .annotate(latest=Max("last_submission_date"))
+            .values("latest")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0054_monthly_supply_chain_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="supplychain",
+            name="active_strategic_action_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="supplychain",
+            name="submitted_update_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of updates submitted in submitted_update_period",
+            ),
+        ),
+        migrations.AddField(
+            model_name="supplychain",
+            name="submitted_update_period",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="supplychainumbrella",
+            name="active_strategic_action_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="supplychainumbrella",
+            name="last_submission_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="supplychainumbrella",
+            name="submitted_update_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="The number of updates submitted in submitted_update_period",
+            ),
+        ),
+        migrations.AddField(
+            model_name="supplychainumbrella",
+            name="submitted_update_period",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
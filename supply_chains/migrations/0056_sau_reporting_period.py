@@ -0,0 +1,76 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:07
+
+import django.db.models.constraints
+from django.db import migrations, models
+from django.db.models import Case, Count, Value, When
+
+import supply_chains.models
+from supply_chains.utils import get_reporting_period
+
+
+def populate_reporting_periods(apps, schema_editor):
+    StrategicActionUpdate = apps.get_model("supply_chains", "StrategicActionUpdate")
+
+    dates = set(
+        StrategicActionUpdate.objects.values_list("date_created", flat=True).distinct()
+    )
+    if dates:
+        StrategicActionUpdate.objects.update(
+            reporting_period=Case(
+                *[
+                    When(
+                        date_created=date_created,
+                        then=Value(get_reporting_period(date_created)),
+                    )
+                    for date_created in dates
+                ],
+                output_field=models.DateField(),
+            )
+        )
+
+    duplicates = list(
+        StrategicActionUpdate.objects.values("strategic_action", "reporting_period")
+        .annotate(updates=Count("pk"))
+        .filter(updates__gt=1)
+        .order_by("strategic_action", "reporting_period")
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Strategic actions with more than one update in a reporting period, "
+            "which must be merged before migrating: "
+            + ", ".join(
+                f"{duplicate['strategic_action']} in {duplicate['reporting_period']:%Y-%m}"
+                for duplicate in duplicates
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0055_activity_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="strategicactionupdate",
+            name="reporting_period",
+            field=supply_chains.models.ReportingPeriodField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(populate_reporting_periods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="strategicactionupdate",
+            name="reporting_period",
+            field=supply_chains.models.ReportingPeriodField(blank=True, editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name="strategicactionupdate",
+            constraint=models.UniqueConstraint(
+                fields=("strategic_action", "reporting_period"),
+                name="unique_sau_per_reporting_period",
+                deferrable=django.db.models.constraints.Deferrable["DEFERRED"],
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0056_sau_reporting_period"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="strategicactionupdate",
+            name="sau_sa_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="strategicactionupdate",
+            name="sau_sc_created_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="strategicactionupdate",
+            name="sau_submitted_sc_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="strategicactionupdate",
+            index=models.Index(
+                fields=["supply_chain", "reporting_period"], name="sau_sc_period_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="strategicactionupdate",
+            index=models.Index(
+                condition=models.Q(("status", "submitted")),
+                fields=["supply_chain", "reporting_period"],
+                name="sau_submitted_sc_period_idx",
+            ),
+        ),
+    ]
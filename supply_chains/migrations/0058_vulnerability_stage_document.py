@@ -0,0 +1,63 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+STAGES = {
+    "supply": [1, 2, 3],
+    "receive": [4, 5, 6],
+    "make": [7, 8, 9, 10],
+    "store": [11, 12, 13],
+    "deliver": [14],
+}
+
+
+def stage_document(stage, stage_name, characteristic_ids):
+    return {
+        "rag_rating": getattr(stage, f"{stage_name}_stage_rag_rating"),
+        "characteristics": {
+            str(char_id): {
+                "rag_rating": getattr(stage, f"{stage_name}_rag_rating_{char_id}"),
+                "summary": getattr(stage, f"{stage_name}_stage_summary_{char_id}"),
+                "rationale": getattr(stage, f"{stage_name}_stage_rationale_{char_id}"),
+            }
+            for char_id in characteristic_ids
+        },
+    }
+
+
+def populate_stage_documents(apps, schema_editor):
+    VulnerabilityAssessment = apps.get_model("supply_chains", "VulnerabilityAssessment")
+
+    related_names = {
+        stage_name: f"vulnerability_{stage_name}_stage" for stage_name in STAGES
+    }
+    assessments = list(
+        VulnerabilityAssessment.objects.select_related(*related_names.values())
+    )
+    for assessment in assessments:
+        assessment.stage_document = {
+            stage_name: stage_document(
+                getattr(assessment, related_names[stage_name]),
+                stage_name,
+                characteristic_ids,
+            )
+            for stage_name, characteristic_ids in STAGES.items()
+            if hasattr(assessment, related_names[stage_name])
+        }
+    VulnerabilityAssessment.objects.bulk_update(assessments, ["stage_document"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0057_sau_reporting_period_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vulnerabilityassessment",
+            name="stage_document",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(populate_stage_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-19 15:01
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+def populate_due_dates(apps, schema_editor):
+    MonthlySupplyChainSummary = apps.get_model(
+        "supply_chains", "MonthlySupplyChainSummary"
+    )
+    StrategicAction = apps.get_model("supply_chains", "StrategicAction")
+
+    due_dates = {}
+    for supply_chain_id, due_date in (
+        StrategicAction.objects.filter(
+            is_archived=False, is_ongoing=False, target_completion_date__isnull=False
+        )
+        .order_by("target_completion_date")
+        .values_list("supply_chain_id", "target_completion_date")
+    ):
+        due_dates.setdefault(supply_chain_id, []).append(due_date)
+
+    summaries = list(
+        MonthlySupplyChainSummary.objects.filter(supply_chain_id__in=due_dates)
+    )
+    for summary in summaries:
+        summary.strategic_action_due_dates = due_dates[summary.supply_chain_id]
+    MonthlySupplyChainSummary.objects.bulk_update(
+        summaries, ["strategic_action_due_dates"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0058_vulnerability_stage_document"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="monthlysupplychainsummary",
+            name="overdue_strategic_action_count",
+        ),
+        migrations.AddField(
+            model_name="monthlysupplychainsummary",
+            name="strategic_action_due_dates",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.DateField(), blank=True, default=list, size=None
+            ),
+        ),
+        migrations.RunPython(populate_due_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,159 @@
+import json
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+# auto_now, so the change log leaves it out
+NOT_LOGGED = {"last_modified"}
+
+
+def diff(previous, values):
+    return {
+        attname: [previous.get(attname), value]
+        for attname, value in values.items()
+        if previous.get(attname) != value
+    }
+
+
+class Entries:
+    """Change log entries, inserted in batches"""
+
+    def __init__(self, ChangeLogEntry):
+        self.ChangeLogEntry = ChangeLogEntry
+        self.pending = []
+
+    def add(self, **kwargs):
+        self.pending.append(self.ChangeLogEntry(**kwargs))
+        if len(self.pending) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.ChangeLogEntry.objects.bulk_create(self.pending)
+        self.pending = []
+
+
+def logged_before(ChangeLogEntry, content_type):
+    """The history to copy is what was recorded before the change log started"""
+    first_entry = (
+        ChangeLogEntry.objects.filter(content_type=content_type)
+        .order_by("timestamp")
+        .first()
+    )
+    return first_entry.timestamp if first_entry else None
+
+
+def copy_supply_chain_history(apps, entries, ContentType):
+    HistoricalSupplyChain = apps.get_model("supply_chains", "HistoricalSupplyChain")
+    content_type, _ = ContentType.objects.get_or_create(
+        app_label="supply_chains", model="supplychain"
+    )
+    rows = HistoricalSupplyChain.objects.order_by("id", "history_date", "history_id")
+    before = logged_before(entries.ChangeLogEntry, content_type)
+    if before is not None:
+        rows = rows.filter(history_date__lt=before)
+
+    previous_id, previous = None, None
+    for row in rows.values().iterator():
+        values = {
+            attname: value
+            for attname, value in row.items()
+            if not attname.startswith("history_") and attname not in NOT_LOGGED
+        }
+        if row["id"] != previous_id:
+            previous_id, previous = row["id"], None
+        if row["history_type"] == "+":
+            action, changes = "create", diff({}, values)
+        elif row["history_type"] == "-":
+            action = "delete"
+            changes = {attname: [value, None] for attname, value in values.items()}
+        elif previous is None:
+            # the history starts with a change to a supply chain made before it began,
+            # and what it changed from isn't known
+            previous = values
+            continue
+        else:
+            action, changes = "update", diff(previous, values)
+        previous = values
+        if changes:
+            entries.add(
+                content_type=content_type,
+                object_id=str(row["id"]),
+                action=action,
+                changes=changes,
+                user_id=row["history_user_id"],
+                comment=row["history_change_reason"] or "",
+                timestamp=row["history_date"],
+            )
+
+
+def copy_versions(apps, entries, ContentType, model_name):
+    """Copy django-reversion's versions, which are whole objects, as diffs"""
+    Version = apps.get_model("reversion", "Version")
+    model = apps.get_model("supply_chains", model_name)
+    content_type, _ = ContentType.objects.get_or_create(
+        app_label="supply_chains", model=model_name.lower()
+    )
+    attnames = {
+        field.name: field.attname
+        for field in model._meta.concrete_fields
+        if field.name not in NOT_LOGGED
+    }
+    versions = Version.objects.filter(content_type=content_type).order_by(
+        "object_id", "revision__date_created", "pk"
+    )
+    before = logged_before(entries.ChangeLogEntry, content_type)
+    if before is not None:
+        versions = versions.filter(revision__date_created__lt=before)
+
+    previous_id, previous = None, None
+    for version in versions.select_related("revision").iterator():
+        (data,) = json.loads(version.serialized_data)
+        values = {
+            attnames[name]: value
+            for name, value in data["fields"].items()
+            if name in attnames
+        }
+        values["id"] = data["pk"]
+        if version.object_id != previous_id:
+            previous_id, previous = version.object_id, None
+        if previous is None:
+            action, changes = "create", diff({}, values)
+        else:
+            action, changes = "update", diff(previous, values)
+        previous = values
+        if changes:
+            entries.add(
+                content_type=content_type,
+                object_id=version.object_id,
+                action=action,
+                changes=changes,
+                user_id=version.revision.user_id,
+                comment=version.revision.comment,
+                timestamp=version.revision.date_created,
+            )
+
+
+def copy_history(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    entries = Entries(apps.get_model("change_log", "ChangeLogEntry"))
+    copy_supply_chain_history(apps, entries, ContentType)
+    for model_name in ["StrategicAction", "ScenarioAssessment"]:
+        copy_versions(apps, entries, ContentType, model_name)
+    entries.flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("supply_chains", "0059_monthly_summary_due_dates"),
+        ("change_log", "0002_changelogentry_comment"),
+        ("reversion", "0001_squashed_0004_auto_20160611_1202"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_history, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name="HistoricalSupplyChain",
+        ),
+    ]
@@ -1,23 +1,26 @@
+import calendar
 import uuid
 from datetime import datetime, date, timedelta
-
-import reversion
-
-from simple_history.models import HistoricalRecords
+from typing import Dict, List, Optional
 
 from dateutil.relativedelta import relativedelta
+
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from accounts.models import GovDepartment
 from activity_stream.models import ActivityStreamQuerySetMixin
+from change_log.tracking import ChangeLogMixin, recording
 from supply_chains.utils import (
-    get_last_working_day_of_previous_month,
     get_last_working_day_of_a_month,
+    get_last_working_day_of_previous_month,
+    get_reporting_period,
 )
 
 MAX_SLUG_LENGTH = 75
@@ -36,7 +39,56 @@ class NullableRAGRating(models.TextChoices):
     NONE = (None, "—")
 
 
-class SupplyChainUmbrellaQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
+class CountersQuerySetMixin:
+    """Adjust the `ActivityCounters` fields with a single UPDATE, without reading the rows"""
+
+    def add_active_strategic_actions(self, delta: int) -> int:
+        return self.update(
+            active_strategic_action_count=Greatest(
+                models.F("active_strategic_action_count") + delta, 0
+            )
+        )
+
+    def add_submitted_updates(
+        self, period: date, delta: int, submission_date: date = None
+    ) -> int:
+        """Count `delta` more updates submitted in the reporting period
+
+        Updates for a period earlier than the one counted are ignored,
+        and a later period restarts the count.
+        """
+        counting_earlier_period = models.Q(submitted_update_period__isnull=True) | (
+            models.Q(submitted_update_period__lt=period)
+        )
+        changes = {
+            "submitted_update_count": models.Case(
+                models.When(
+                    submitted_update_period=period,
+                    then=Greatest(models.F("submitted_update_count") + delta, 0),
+                ),
+                models.When(counting_earlier_period, then=max(delta, 0)),
+                default=models.F("submitted_update_count"),
+            ),
+            "submitted_update_period": models.Case(
+                models.When(
+                    counting_earlier_period,
+                    then=models.Value(period, output_field=models.DateField()),
+                ),
+                default=models.F("submitted_update_period"),
+            ),
+        }
+        if submission_date is not None:
+            # Postgres' GREATEST ignores NULLs
+            changes["last_submission_date"] = Greatest(
+                "last_submission_date",
+                models.Value(submission_date, output_field=models.DateField()),
+            )
+        return self.update(**changes)
+
+
+class SupplyChainUmbrellaQuerySet(
+    CountersQuerySetMixin, ActivityStreamQuerySetMixin, models.QuerySet
+):
     pass
 
 
@@ -65,7 +117,108 @@ class GSCUpdateModel(models.Model):
         abstract = True
 
 
-class SupplyChainUmbrella(models.Model):
+class ActivityCounters(models.Model):
+    """Denormalised counts of strategic actions and updates, for dashboards to read directly
+
+    They are kept up to date by the save and delete paths of `StrategicAction` and
+    `StrategicActionUpdate`, and by `submit_monthly_updates`. Bulk loads don't update
+    them, so run `reconcile_counters` after those, as the ingest commands and
+    `datafixup` do.
+    """
+
+    active_strategic_action_count = models.PositiveIntegerField(default=0)
+    submitted_update_count = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of updates submitted in submitted_update_period",
+    )
+    # the first day of the month, as returned by `get_reporting_period`
+    submitted_update_period = models.DateField(null=True, blank=True)
+
+    # changed only by `CountersQuerySetMixin`
+    counter_fields = [
+        "active_strategic_action_count",
+        "submitted_update_count",
+        "submitted_update_period",
+    ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # don't overwrite the counters with the values this instance was loaded with
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        return super().save(*args, **kwargs)
+
+    def submitted_updates_in(self, period: date) -> int:
+        """The number of updates submitted in the reporting period starting on `period`"""
+        if self.submitted_update_period != period:
+            return 0
+        return self.submitted_update_count
+
+    class Meta:
+        abstract = True
+
+
+class TrackedFieldsMixin:
+    """Remember the values of `tracked_fields` as they were last loaded from or saved to the db
+
+    This lets `save()` tell what has changed without fetching the row again.
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._record_tracked_fields()
+        return instance
+
+    def _record_tracked_fields(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field: getattr(self, field)
+            for field in self.tracked_fields
+            if field not in deferred
+        }
+
+    def get_loaded_values(self):
+        """The tracked values as last stored, or None if this instance doesn't know them"""
+        loaded_values = getattr(self, "_loaded_values", None)
+        if loaded_values is None or len(loaded_values) != len(self.tracked_fields):
+            return None
+        return loaded_values
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        self._record_tracked_fields()
+        return result
+
+
+class ReportingPeriodField(models.DateField):
+    """The reporting period of the row's `date_created`, as returned by `get_reporting_period`
+
+    It's set from `date_created` whenever the row is written, including by `bulk_create`,
+    so the two can't disagree. `QuerySet.update()` bypasses this, so a query changing
+    `date_created` must also call `SAUQuerySet.set_reporting_periods()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("blank", True)
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        date_created = model_instance._meta.get_field("date_created").to_python(
+            model_instance.date_created
+        )
+        value = get_reporting_period(date_created)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class SupplyChainUmbrella(ActivityCounters):
     objects = SupplyChainUmbrellaQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=settings.CHARFIELD_MAX_LENGTH, unique=True)
@@ -81,6 +234,10 @@ class SupplyChainUmbrella(models.Model):
         null=True,
         blank=True,
     )
+    # the latest of its supply chains' last_submission_date
+    last_submission_date = models.DateField(null=True, blank=True)
+
+    counter_fields = ActivityCounters.counter_fields + ["last_submission_date"]
 
     def __str__(self) -> str:
         if self.gov_department:
@@ -95,7 +252,9 @@ class SupplyChainUmbrella(models.Model):
         return super().save(*args, **kwargs)
 
 
-class SupplyChainQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
+class SupplyChainQuerySet(
+    CountersQuerySetMixin, ActivityStreamQuerySetMixin, models.QuerySet
+):
     def submitted_since(self, deadline):
         return self.filter(last_submission_date__gt=deadline)
 
@@ -159,7 +318,27 @@ class SupplyChainMaturity(GSCUpdateModel):
         return f"{self.supply_chain} maturity"
 
 
-class SupplyChain(GSCUpdateModel):
+def update_counters(supply_chain_id, supply_chain=None, **changes):
+    """Apply a `CountersQuerySetMixin` change to a supply chain and its umbrella
+
+    `changes` is the method name and its arguments, such as
+    `add_active_strategic_actions=(1,)`. Passing the supply chain when it's already
+    loaded saves looking up its umbrella.
+    """
+    supply_chains = SupplyChain.objects.filter(pk=supply_chain_id)
+    if supply_chain is not None:
+        umbrellas = SupplyChainUmbrella.objects.filter(
+            pk=supply_chain.supply_chain_umbrella_id
+        )
+    else:
+        umbrellas = SupplyChainUmbrella.objects.filter(supply_chains=supply_chain_id)
+    for method, args in changes.items():
+        getattr(supply_chains, method)(*args)
+        if supply_chain is None or supply_chain.supply_chain_umbrella_id is not None:
+            getattr(umbrellas, method)(*args)
+
+
+class SupplyChain(ChangeLogMixin, ActivityCounters, GSCUpdateModel):
     class StatusRating(models.TextChoices):
         LOW = ("low", "Low")
         MEDIUM = ("medium", "Medium")
@@ -209,7 +388,9 @@ class SupplyChain(GSCUpdateModel):
     archived_reason = models.TextField(blank=True)
     archived_date = models.DateField(null=True, blank=True)
     last_modified = models.DateTimeField(auto_now=True)
-    history = HistoricalRecords()
+
+    # the counters are kept up to date with QuerySet.update(), so aren't logged
+    change_log_excluded_fields = ActivityCounters.counter_fields
 
     @property
     def criticality_rating_text(self):
@@ -271,13 +452,26 @@ class SupplyChain(GSCUpdateModel):
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # SupplyChainQuerySet.submitted_since
+            models.Index(
+                fields=["last_submission_date"], name="sc_last_submission_idx"
+            ),
+            # a department's active chains, listed by name
+            models.Index(
+                fields=["gov_department", "name"],
+                name="sc_active_dept_name_idx",
+                condition=models.Q(is_archived=False),
+            ),
+        ]
+
 
 class StrategicActionQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
     pass
 
 
-@reversion.register()
-class StrategicAction(models.Model):
+class StrategicAction(ChangeLogMixin, TrackedFieldsMixin, models.Model):
     class Category(models.TextChoices):
         CREATE = ("create", "Create")
         DIVERSIFY = ("diversify", "Diversify")
@@ -333,6 +527,13 @@ class StrategicAction(models.Model):
     slug = models.SlugField(null=True, blank=True, max_length=MAX_SLUG_LENGTH)
     last_modified = models.DateTimeField(auto_now=True)
 
+    tracked_fields = (
+        "target_completion_date",
+        "is_ongoing",
+        "is_archived",
+        "supply_chain_id",
+    )
+
     def clean_fields(self, exclude=None):
         super().clean_fields(exclude=exclude)
         if self.is_archived and self.archived_reason == "":
@@ -346,46 +547,78 @@ class StrategicAction(models.Model):
         if self.is_archived and not self.archived_date:
             self.archived_date = timezone.now().date()
         self.full_clean()
-        # Log changes in reversion
-        reversion_message = None
+        # Say why the timing changed in the change log
+        change_log_comment = ""
         reason_for_completion_date_change = kwargs.pop(
             "reason_for_completion_date_change", ""
         )
         user = kwargs.pop("user", None)
-        if self.pk is not None:
-            # the test item factory appears to create a PK for the model, so it might not really exist
-            try:
-                # existing instance so see if target_completion_date/is_ongoing combo has changed
-                previous_self = StrategicAction.objects.get(pk=self.pk)
-                if (
-                    self.target_completion_date != previous_self.target_completion_date
-                    or self.is_ongoing != previous_self.is_ongoing
-                ):
-                    prefix = "TIMING"
-                    change_type = ""
-                    if previous_self.is_ongoing:
-                        # must be moving from "Ongoing" to having a target completion date
-                        change_type = "Stopped being 'Ongoing'"
+        previous_values = None
+        if not self._state.adding:
+            previous_values = self.get_loaded_values()
+            if previous_values is None:
+                # this instance wasn't loaded from the db, so we don't know what it's replacing
+                previous_values = (
+                    StrategicAction.objects.filter(pk=self.pk)
+                    .values(*self.tracked_fields)
+                    .first()
+                )
+            # existing instance so see if target_completion_date/is_ongoing combo has changed
+            if previous_values is not None and (
+                self.target_completion_date != previous_values["target_completion_date"]
+                or self.is_ongoing != previous_values["is_ongoing"]
+            ):
+                prefix = "TIMING"
+                change_type = ""
+                if previous_values["is_ongoing"]:
+                    # must be moving from "Ongoing" to having a target completion date
+                    change_type = "Stopped being 'Ongoing'"
+                else:
+                    # either changing to "Ongoing" or date has changed
+                    if self.is_ongoing:
+                        change_type = "Becoming 'Ongoing'"
                     else:
-                        # either changing to "Ongoing" or date has changed
-                        if self.is_ongoing:
-                            change_type = "Becoming 'Ongoing'"
-                        else:
-                            change_type = "Target completion date changed"
-
-                    reversion_message = (
-                        f"{prefix}: {change_type}: {reason_for_completion_date_change}"
-                    )
-            except StrategicAction.DoesNotExist:
-                pass
-        with reversion.create_revision():
+                        change_type = "Target completion date changed"
+
+                change_log_comment = (
+                    f"{prefix}: {change_type}: {reason_for_completion_date_change}"
+                )
+        with recording(comment=change_log_comment, user=user):
             result = super().save(*args, **kwargs)
-            if reversion_message is not None:
-                reversion.set_comment(reversion_message)
-            if user is not None:
-                reversion.set_user(user)
+            self._update_active_counts(previous_values)
+        return result
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            if not self.is_archived:
+                update_counters(
+                    self.supply_chain_id, add_active_strategic_actions=(-1,)
+                )
         return result
 
+    def _update_active_counts(self, previous_values):
+        """Move this action between its supply chains' counts of active actions"""
+        counted_for = None
+        if previous_values is not None and not previous_values["is_archived"]:
+            counted_for = previous_values["supply_chain_id"]
+        count_for = None if self.is_archived else self.supply_chain_id
+        if counted_for == count_for:
+            return
+        if counted_for is not None:
+            update_counters(counted_for, add_active_strategic_actions=(-1,))
+        if count_for is not None:
+            update_counters(
+                count_for,
+                self._cached_supply_chain(),
+                add_active_strategic_actions=(1,),
+            )
+
+    def _cached_supply_chain(self):
+        if self._meta.get_field("supply_chain").is_cached(self):
+            return self.supply_chain
+        return None
+
     def last_submitted_update(self):
         return self.monthly_updates.last_month()
 
@@ -398,11 +631,30 @@ class StrategicAction(models.Model):
         else:
             return self.name
 
+    class Meta:
+        indexes = [
+            # a chain's active actions, listed by name
+            models.Index(
+                fields=["supply_chain", "name"],
+                name="sa_active_sc_name_idx",
+                condition=models.Q(is_archived=False),
+            ),
+        ]
+
 
 class SAUQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
     def since(self, deadline, *args, **kwargs):
+        next_period = get_reporting_period(deadline + timedelta(days=1))
+        if get_reporting_period(deadline) != next_period:
+            # the deadline ends a round, so this is every round after it,
+            # which the reporting period indexes can answer
+            return self.filter(reporting_period__gte=next_period, *args, **kwargs)
         return self.filter(date_created__gt=deadline, *args, **kwargs)
 
+    def in_period(self, period: date, *args, **kwargs):
+        """Updates in the round of monthly updates for the given month"""
+        return self.filter(reporting_period=period.replace(day=1), *args, **kwargs)
+
     def last_month(self, before_date=None):
         if before_date is None:
             before_date = datetime.now().date()
@@ -422,20 +674,65 @@ class SAUQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
 
     def given_month(self, month: date, *args, **kwargs):
         # RT-489: current month should include the whole period and not upto given day.
-        lastday = month.replace(day=1) + relativedelta(months=1) - timedelta(days=1)
-        given_deadline = get_last_working_day_of_a_month(lastday)
-        last_day_of_previous_month = month.replace(day=1) - timedelta(1)
-        last_deadline = get_last_working_day_of_a_month(last_day_of_previous_month)
+        return self.in_period(month, *args, **kwargs).order_by("date_created")
 
-        return self.filter(
-            date_created__gt=last_deadline,
-            date_created__lte=given_deadline,
-            *args,
-            **kwargs,
-        ).order_by("date_created")
+    def set_reporting_periods(self) -> int:
+        """Recompute `reporting_period` from `date_created`, in one query
 
+        A round ends on its month's last working day, which depends on the bank holidays,
+        so that is found here for each month the updates were created in. The update joins
+        against those, one row a month, and works out each period from them.
+        """
+        months = (
+            self.annotate(month=TruncMonth("date_created"))
+            .order_by()
+            .values_list("month", flat=True)
+            .distinct()
+        )
+        round_ends = [
+            (
+                month,
+                get_last_working_day_of_a_month(
+                    month.replace(day=calendar.monthrange(month.year, month.month)[1])
+                ),
+            )
+            for month in months
+        ]
+        if not round_ends:
+            return 0
+        updates_sql, updates_params = (
+            self.order_by().values("pk").query.sql_with_params()
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {self.model._meta.db_table} AS sau
+                SET reporting_period = CASE
+                    WHEN sau.date_created > round.last_working_day
+                    THEN (round.month + interval '1 month')::date
+                    ELSE round.month
+                END
+                FROM (VALUES {", ".join(["(%s::date, %s::date)"] * len(round_ends))})
+                    AS round (month, last_working_day)
+                WHERE date_trunc('month', sau.date_created)::date = round.month
+                AND sau.id IN ({updates_sql})
+                """,
+                [value for round_end in round_ends for value in round_end]
+                + list(updates_params),
+            )
+            return cursor.rowcount
+
+    def duplicate_reporting_periods(self) -> List[Dict]:
+        """The strategic actions and reporting periods with more than one update"""
+        return list(
+            self.values("strategic_action", "reporting_period")
+            .annotate(updates=models.Count("pk"))
+            .filter(updates__gt=1)
+            .order_by("strategic_action", "reporting_period")
+        )
 
-class StrategicActionUpdate(models.Model):
+
+class StrategicActionUpdate(TrackedFieldsMixin, models.Model):
     class Status(models.TextChoices):
         NOT_STARTED = ("not_started", "Not started")
         IN_PROGRESS = ("in_progress", "In progress")
@@ -483,24 +780,71 @@ class StrategicActionUpdate(models.Model):
         related_name="monthly_updates",
     )
     slug = models.SlugField(null=True, blank=True, max_length=MAX_SLUG_LENGTH)
+    reporting_period = ReportingPeriodField()
     last_modified = models.DateTimeField(auto_now=True)
 
+    tracked_fields = (
+        "status",
+        "supply_chain_id",
+        "strategic_action_id",
+        "date_created",
+    )
+    # the fields clean() reads, so its memoised result is reused while they're unchanged
+    clean_depends_on = (
+        "status",
+        "submission_date",
+        "content",
+        "implementation_rag_rating",
+        "reason_for_delays",
+        "changed_value_for_target_completion_date",
+        "reason_for_completion_date_change",
+    )
+
     def validate_unique(self, exclude=None):
         # we want to allow just one update for a period, on a strategic action
-        # At times this could be too rigid condition to have, say during testing, which can be
-        # refactored, when required
-        given_updates = StrategicActionUpdate.objects.given_month(
-            self.date_created, strategic_action=self.strategic_action
+        # The database enforces this too, so the check is only needed when this update
+        # would move to a different action or period, and only once for each.
+        # The constraint's own check is left out, as it would query every time.
+        super().validate_unique(exclude=[*(exclude or []), "reporting_period"])
+        period = get_reporting_period(self.date_created)
+        key = (self.strategic_action_id, period)
+        loaded_values = self.get_loaded_values()
+        if loaded_values is not None and key == (
+            loaded_values["strategic_action_id"],
+            get_reporting_period(loaded_values["date_created"]),
+        ):
+            return
+        if getattr(self, "_unique_period_checked", None) == key:
+            return
+
+        existing_update = (
+            StrategicActionUpdate.objects.filter(
+                strategic_action_id=self.strategic_action_id, reporting_period=period
+            )
+            .exclude(pk=self.pk)
+            .first()
         )
-
-        if given_updates and self != given_updates[0]:
+        if existing_update is not None:
             raise ValidationError(
-                f"Monthly update already exist for the period: {given_updates[0]}"
+                f"Monthly update already exist for the period: {existing_update}"
             )
-
-        super().validate_unique(exclude=exclude)
+        self._unique_period_checked = key
 
     def clean(self) -> None:
+        key = tuple(getattr(self, field) for field in self.clean_depends_on)
+        cached = getattr(self, "_clean_result", None)
+        if cached is None or cached[0] != key:
+            try:
+                self._clean_submission()
+            except ValidationError as e:
+                cached = (key, e)
+            else:
+                cached = (key, None)
+            self._clean_result = cached
+        if cached[1] is not None:
+            raise cached[1]
+
+    def _clean_submission(self) -> None:
         error_dict = {}
         if self.status == StrategicActionUpdate.Status.SUBMITTED:
             if not self.submission_date:
@@ -563,7 +907,7 @@ class StrategicActionUpdate(models.Model):
             """
             To finalise the update we must:
             1. Copy a revised target completion date to the strategic action, or copy is ongoing and clear the SA's date;
-            2. If there is a revised target completion date, record the change in reversion.
+            2. If there is a revised target completion date, record the change in the change log.
             """
             strategic_action_changed = False
             if self.changed_value_for_target_completion_date is not None:
@@ -583,14 +927,60 @@ class StrategicActionUpdate(models.Model):
                     reason_for_completion_date_change=self.reason_for_completion_date_change,
                     user=self.user,
                 )
-        super().save(*args, **kwargs)
         if not self.slug:
             self.slug = self.date_created.strftime("%m-%Y")
-            try:
-                kwargs.pop("force_insert")
-            except KeyError:
-                pass
-            self.save(*args, **kwargs)
+        previous_values = None
+        if not self._state.adding:
+            previous_values = self.get_loaded_values()
+            if previous_values is None:
+                previous_values = (
+                    StrategicActionUpdate.objects.filter(pk=self.pk)
+                    .values(*self.tracked_fields)
+                    .first()
+                )
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            self._update_submitted_counts(previous_values)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            result = super().delete(*args, **kwargs)
+            if self.status == StrategicActionUpdate.Status.SUBMITTED:
+                update_counters(
+                    self.supply_chain_id,
+                    add_submitted_updates=(get_reporting_period(self.date_created), -1),
+                )
+        return result
+
+    def _update_submitted_counts(self, previous_values):
+        """Move this update between its supply chains' counts of submitted updates"""
+        counted_in = None
+        if (
+            previous_values is not None
+            and previous_values["status"] == StrategicActionUpdate.Status.SUBMITTED
+        ):
+            counted_in = (
+                previous_values["supply_chain_id"],
+                get_reporting_period(previous_values["date_created"]),
+            )
+        count_in = None
+        if self.status == StrategicActionUpdate.Status.SUBMITTED:
+            count_in = (self.supply_chain_id, get_reporting_period(self.date_created))
+        if counted_in == count_in:
+            return
+        if counted_in is not None:
+            supply_chain_id, period = counted_in
+            update_counters(supply_chain_id, add_submitted_updates=(period, -1))
+        if count_in is not None:
+            supply_chain_id, period = count_in
+            supply_chain = None
+            if self._meta.get_field("supply_chain").is_cached(self):
+                supply_chain = self.supply_chain
+            update_counters(
+                supply_chain_id,
+                supply_chain,
+                add_submitted_updates=(period, 1, self.submission_date),
+            )
 
     @property
     def has_existing_target_completion_date(self):
@@ -716,6 +1106,35 @@ class StrategicActionUpdate(models.Model):
     def __str__(self):
         return f"Update {self.slug} for {self.strategic_action}"
 
+    class Meta:
+        indexes = [
+            # SAUQuerySet.since and in_period, filtered by supply chain.
+            # Filtered by strategic action, they use the unique constraint's index.
+            models.Index(
+                fields=["supply_chain", "reporting_period"], name="sau_sc_period_idx"
+            ),
+            # SAUQuerySet.last_month, ordered by -submission_date
+            models.Index(
+                fields=["strategic_action", "-submission_date"],
+                name="sau_sa_submission_idx",
+            ),
+            # submitted updates since a deadline, which is most of what views and reports read
+            models.Index(
+                fields=["supply_chain", "reporting_period"],
+                name="sau_submitted_sc_period_idx",
+                condition=models.Q(status="submitted"),
+            ),
+        ]
+        constraints = [
+            # checked on commit, so a query recomputing the periods can move updates
+            # through each other's periods on the way
+            models.UniqueConstraint(
+                fields=["strategic_action", "reporting_period"],
+                name="unique_sau_per_reporting_period",
+                deferrable=models.Deferrable.DEFERRED,
+            )
+        ]
+
 
 class MaturitySelfAssessmentQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
     pass
@@ -746,7 +1165,41 @@ class MaturitySelfAssessment(GSCUpdateModel):
 
 
 class VulnerabilityAssessmentQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
-    pass
+    def refresh_stage_documents(self) -> int:
+        """Rebuild `stage_document` from the stage models, in two queries
+
+        Needed after stages are written without `save()`, e.g. by `loaddata`.
+        Returns the number of assessments refreshed.
+        """
+        assessments = list(self.select_related(*VUL_STAGE_RELATED_NAMES.values()))
+        for assessment in assessments:
+            assessment.stage_document = assessment.build_stage_document()
+        VulnerabilityAssessment.objects.bulk_update(assessments, ["stage_document"])
+        return len(assessments)
+
+
+class VulnerabilityStage:
+    """One stage of a vulnerability assessment, read from its `stage_document`
+
+    The attributes are named like the stage model's fields, e.g. `supply_rag_rating_1`,
+    so templates written for the stage models work with either.
+    """
+
+    def __init__(self, stage_name: str, document: Dict):
+        self.stage_name = stage_name
+        setattr(self, f"{stage_name}_stage_rag_rating", document["rag_rating"])
+        for char_id, characteristic in document["characteristics"].items():
+            setattr(
+                self, f"{stage_name}_rag_rating_{char_id}", characteristic["rag_rating"]
+            )
+            setattr(
+                self, f"{stage_name}_stage_summary_{char_id}", characteristic["summary"]
+            )
+            setattr(
+                self,
+                f"{stage_name}_stage_rationale_{char_id}",
+                characteristic["rationale"],
+            )
 
 
 # Refactoring flat structured VulnerabilityAssessment models just enough to fix RT-609
@@ -761,16 +1214,125 @@ class VulnerabilityAssessment(GSCUpdateModel):
         related_name="vulnerability_assessment",
     )
     last_modified = models.DateTimeField(auto_now=True)
+    # A copy of every stage's ratings and characteristics, by stage name, so they can be
+    # read without joining the five stage tables. `VulAssessmentStage` keeps it in step,
+    # and `save()` leaves it alone.
+    stage_document = models.JSONField(default=dict, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # the stages keep `stage_document` up to date, so don't overwrite it with the
+            # copy this instance was loaded with
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "stage_document"
+            ]
+        return super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.supply_chain.name} vulnerability assessment"
 
+    def stage(self, stage_name: str) -> Optional[VulnerabilityStage]:
+        """The stage with the given name, e.g. "supply", or None if it hasn't been assessed"""
+        document = self.stage_document.get(stage_name)
+        if document is None:
+            return None
+        return VulnerabilityStage(stage_name, document)
+
+    def build_stage_document(self) -> Dict:
+        document = {}
+        for stage_name, related_name in VUL_STAGE_RELATED_NAMES.items():
+            if hasattr(self, related_name):
+                document[stage_name] = getattr(self, related_name).to_document()
+        return document
+
+
+class JSONBSet(models.Func):
+    """Postgres jsonb_set, replacing one top level key of a JSON document"""
+
+    function = "jsonb_set"
+    output_field = models.JSONField()
+
+    def __init__(self, expression, key: str, value, **extra):
+        super().__init__(
+            expression,
+            models.Value(f"{{{key}}}"),
+            models.Value(value, output_field=models.JSONField()),
+            **extra,
+        )
+
+
+class JSONBDeleteKey(models.Func):
+    """Postgres jsonb minus a top level key"""
+
+    template = "(%(expressions)s)"
+    arg_joiner = " - "
+    output_field = models.JSONField()
+
+    def __init__(self, expression, key: str, **extra):
+        super().__init__(expression, models.Value(key), **extra)
+
+
+class VulAssessmentStage(models.Model):
+    """A stage of a vulnerability assessment, holding numbered characteristics
+
+    Saving or deleting a stage updates its part of the assessment's `stage_document`.
+    Changes made with `QuerySet.update()` or the bulk methods need
+    `VulnerabilityAssessmentQuerySet.refresh_stage_documents()` afterwards.
+    """
+
+    stage_name: str
+    characteristic_ids: List[int]
+
+    class Meta:
+        abstract = True
+
+    def to_document(self) -> Dict:
+        return {
+            "rag_rating": getattr(self, f"{self.stage_name}_stage_rag_rating"),
+            "characteristics": {
+                str(char_id): {
+                    "rag_rating": getattr(
+                        self, f"{self.stage_name}_rag_rating_{char_id}"
+                    ),
+                    "summary": getattr(
+                        self, f"{self.stage_name}_stage_summary_{char_id}"
+                    ),
+                    "rationale": getattr(
+                        self, f"{self.stage_name}_stage_rationale_{char_id}"
+                    ),
+                }
+                for char_id in self.characteristic_ids
+            },
+        }
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            VulnerabilityAssessment.objects.filter(pk=self.vulnerability_id).update(
+                stage_document=JSONBSet(
+                    "stage_document", self.stage_name, self.to_document()
+                )
+            )
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            deleted = super().delete(*args, **kwargs)
+            VulnerabilityAssessment.objects.filter(pk=self.vulnerability_id).update(
+                stage_document=JSONBDeleteKey("stage_document", self.stage_name)
+            )
+        return deleted
+
 
 class VulAssessmentSupplyStageQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
     pass
 
 
-class VulAssessmentSupplyStage(models.Model):
+class VulAssessmentSupplyStage(VulAssessmentStage):
+    stage_name = "supply"
+    characteristic_ids = [1, 2, 3]
+
     objects = VulAssessmentSupplyStageQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -849,7 +1411,10 @@ class VulAssessmentReceiveStageQuerySet(ActivityStreamQuerySetMixin, models.Quer
     pass
 
 
-class VulAssessmentReceiveStage(models.Model):
+class VulAssessmentReceiveStage(VulAssessmentStage):
+    stage_name = "receive"
+    characteristic_ids = [4, 5, 6]
+
     objects = VulAssessmentReceiveStageQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -929,7 +1494,10 @@ class VulAssessmentMakeStageQuerySet(ActivityStreamQuerySetMixin, models.QuerySe
     pass
 
 
-class VulAssessmentMakeStage(models.Model):
+class VulAssessmentMakeStage(VulAssessmentStage):
+    stage_name = "make"
+    characteristic_ids = [7, 8, 9, 10]
+
     objects = VulAssessmentMakeStageQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -1025,7 +1593,10 @@ class VulAssessmentStoreStageQuerySet(ActivityStreamQuerySetMixin, models.QueryS
     pass
 
 
-class VulAssessmentStoreStage(models.Model):
+class VulAssessmentStoreStage(VulAssessmentStage):
+    stage_name = "store"
+    characteristic_ids = [11, 12, 13]
+
     objects = VulAssessmentStoreStageQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -1105,7 +1676,10 @@ class VulAssessmentDeliverStageQuerySet(ActivityStreamQuerySetMixin, models.Quer
     pass
 
 
-class VulAssessmentDeliverStage(models.Model):
+class VulAssessmentDeliverStage(VulAssessmentStage):
+    stage_name = "deliver"
+    characteristic_ids = [14]
+
     objects = VulAssessmentDeliverStageQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -1149,12 +1723,24 @@ class VulAssessmentDeliverStage(models.Model):
         verbose_name = "Vulnerability Assessment Deliver Stage"
 
 
+# the stage models by name, and the related names they have on VulnerabilityAssessment
+VUL_STAGE_RELATED_NAMES = {
+    stage.stage_name: stage._meta.get_field("vulnerability").remote_field.related_name
+    for stage in [
+        VulAssessmentSupplyStage,
+        VulAssessmentReceiveStage,
+        VulAssessmentMakeStage,
+        VulAssessmentStoreStage,
+        VulAssessmentDeliverStage,
+    ]
+}
+
+
 class ScenarioAssessmentQuerySet(ActivityStreamQuerySetMixin, models.QuerySet):
     pass
 
 
-@reversion.register()
-class ScenarioAssessment(GSCUpdateModel):
+class ScenarioAssessment(ChangeLogMixin, GSCUpdateModel):
     objects = ScenarioAssessmentQuerySet.as_manager()
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     date_created = models.DateField(auto_now_add=True)
@@ -1257,28 +1843,9 @@ class ScenarioAssessment(GSCUpdateModel):
     last_modified = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        # Log changes in reversion
         user = kwargs.pop("user", None)
-        # Assume this is a new one
-        prefix = "Created"
-        if self.pk is not None:
-            # The test item factory appears to create a PK for the model, so it might not really exist
-            try:
-                ScenarioAssessment.objects.get(pk=self.pk)
-                # existing instance so record as Edit
-                prefix = "Edited"
-            except ScenarioAssessment.DoesNotExist:
-                pass
-        reversion_message = (
-            f"{prefix}: scenario assessment for {self.supply_chain.name}"
-        )
-        with reversion.create_revision():
-            result = super().save(*args, **kwargs)
-            if reversion_message is not None:
-                reversion.set_comment(reversion_message)
-            if user is not None:
-                reversion.set_user(user)
-        return result
+        with recording(user=user):
+            return super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.supply_chain.name} scenario assessment"
@@ -1464,3 +2031,213 @@ class CountryDependency(models.Model):
     class Meta:
         verbose_name_plural = "Country dependencies"
         ordering = ("supply_chain", "country")
+
+
+class IngestedFile(models.Model):
+    """A source file passed to an incremental ingest, identified by its content hash"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model = models.CharField(max_length=64)
+    content_hash = models.CharField(max_length=64)
+    started = models.DateTimeField(auto_now_add=True)
+    completed = models.DateTimeField(null=True, blank=True)
+    rows_applied = models.PositiveIntegerField(default=0)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model} file {self.content_hash[:8]}"
+
+    class Meta:
+        ordering = ("-started",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model", "content_hash"], name="unique_ingested_file"
+            )
+        ]
+
+
+class IngestedRow(models.Model):
+    """The content hash of the last version of a source row that was ingested
+
+    Rows are keyed by the primary key they are ingested with,
+    so a changed row has the same key and a different hash.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    model = models.CharField(max_length=64)
+    row_key = models.CharField(max_length=64)
+    content_hash = models.CharField(max_length=64)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model} row {self.row_key}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model", "row_key"], name="unique_ingested_row"
+            )
+        ]
+
+
+class _CountBefore(models.Func):
+    """How many of an array of dates are before the given date"""
+
+    template = (
+        "(SELECT count(*) FROM unnest(%(dates)s) AS item WHERE item < %(before)s)"
+    )
+    output_field = models.IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        dates, before = (
+            compiler.compile(expression) for expression in self.get_source_expressions()
+        )
+        return (
+            self.template % {"dates": dates[0], "before": before[0]},
+            (*dates[1], *before[1]),
+        )
+
+
+class MonthlySupplyChainSummaryQuerySet(models.QuerySet):
+    def latest_in(self, period: date):
+        """Each supply chain's summary for the period, or its last one before the period
+
+        A summary is only written for a period when something it summarises changes, so
+        a supply chain that hasn't changed since carries its last summary forward.
+        """
+        latest = (
+            self.filter(period__lte=period)
+            .order_by("supply_chain", "-period")
+            .distinct("supply_chain")
+            .values("pk")
+        )
+        return self.filter(pk__in=latest)
+
+    def department_summary(self, period: date):
+        """Totals for each department's active supply chains in the given period
+
+        Strategic actions are overdue if they were due before the end of the period, or
+        before today for the current period.
+        """
+        period = get_reporting_period(period)
+        period_end = period + relativedelta(months=1)
+        in_period = models.Q(period=period)
+        return (
+            self.latest_in(period)
+            .filter(is_archived=False)
+            .values("gov_department")
+            .annotate(
+                supply_chains=models.Count("pk"),
+                red_supply_chains=models.Count(
+                    "pk", filter=models.Q(vulnerability_status=RAGRating.RED)
+                ),
+                strategic_actions=models.Sum("strategic_action_count"),
+                overdue_strategic_actions=models.Sum(
+                    _CountBefore(
+                        "strategic_action_due_dates",
+                        models.Value(min(date.today(), period_end)),
+                    )
+                ),
+                # a carried forward summary had no updates in the period
+                red_updates=Coalesce(
+                    models.Sum("red_update_count", filter=in_period),
+                    0,
+                    output_field=models.IntegerField(),
+                ),
+                amber_updates=Coalesce(
+                    models.Sum("amber_update_count", filter=in_period),
+                    0,
+                    output_field=models.IntegerField(),
+                ),
+                green_updates=Coalesce(
+                    models.Sum("green_update_count", filter=in_period),
+                    0,
+                    output_field=models.IntegerField(),
+                ),
+            )
+            .order_by("gov_department")
+        )
+
+
+class MonthlySupplyChainSummary(models.Model):
+    """A supply chain's ratings and monthly update counts for one reporting period
+
+    Rows are denormalised from the supply chain and its criticality, maturity, stage
+    assessments, strategic actions and updates by `supply_chains.rollup`, which refreshes
+    them when any of those are saved, so reports can read them without joins.
+    """
+
+    objects = MonthlySupplyChainSummaryQuerySet.as_manager()
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    supply_chain = models.ForeignKey(
+        SupplyChain,
+        on_delete=models.CASCADE,
+        related_name="monthly_summaries",
+    )
+    gov_department = models.ForeignKey(
+        GovDepartment,
+        on_delete=models.CASCADE,
+        related_name="monthly_summaries",
+    )
+    # the first day of the month, as returned by `get_reporting_period`
+    period = models.DateField()
+    is_archived = models.BooleanField(default=False)
+    vulnerability_status = models.CharField(
+        choices=RAGRating.choices, max_length=6, blank=True
+    )
+    risk_severity_status = models.CharField(
+        choices=SupplyChain.StatusRating.choices, max_length=6, blank=True
+    )
+    criticality_rating = models.IntegerField(
+        choices=SupplyChainCriticality.CriticalityRating.choices, null=True, blank=True
+    )
+    maturity_rating = models.IntegerField(
+        choices=SupplyChainMaturity.MaturityRating.choices, null=True, blank=True
+    )
+    supply_stage_rag_rating = models.CharField(
+        max_length=5, choices=NullableRAGRating.choices, null=True, blank=True
+    )
+    receive_stage_rag_rating = models.CharField(
+        max_length=5, choices=NullableRAGRating.choices, null=True, blank=True
+    )
+    make_stage_rag_rating = models.CharField(
+        max_length=5, choices=NullableRAGRating.choices, null=True, blank=True
+    )
+    store_stage_rag_rating = models.CharField(
+        max_length=5, choices=NullableRAGRating.choices, null=True, blank=True
+    )
+    deliver_stage_rag_rating = models.CharField(
+        max_length=5, choices=NullableRAGRating.choices, null=True, blank=True
+    )
+    strategic_action_count = models.PositiveIntegerField(default=0)
+    # the target completion dates of the active strategic actions that aren't ongoing
+    strategic_action_due_dates = ArrayField(
+        models.DateField(), default=list, blank=True
+    )
+    submitted_update_count = models.PositiveIntegerField(default=0)
+    red_update_count = models.PositiveIntegerField(default=0)
+    amber_update_count = models.PositiveIntegerField(default=0)
+    green_update_count = models.PositiveIntegerField(default=0)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.supply_chain} summary for {self.period:%B %Y}"
+
+    def overdue_strategic_action_count(self, on: date = None) -> int:
+        on = on or date.today()
+        return sum(due_date < on for due_date in self.strategic_action_due_dates)
+
+    class Meta:
+        verbose_name_plural = "Monthly supply chain summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["supply_chain", "period"],
+                name="unique_monthly_supply_chain_summary",
+            )
+        ]
+        indexes = [
+            # MonthlySupplyChainSummaryQuerySet.department_summary
+            models.Index(
+                fields=["period", "gov_department"], name="scs_period_dept_idx"
+            ),
+        ]
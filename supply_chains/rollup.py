@@ -0,0 +1,276 @@
+"""Keep `MonthlySupplyChainSummary` up to date as the data it summarises changes
+
+Saving or deleting anything a summary is built from marks its supply chain's summary
+for that reporting period as stale. The stale summaries are rebuilt together, with a
+fixed number of queries, once the transaction the changes were made in commits, and
+are forgotten if it rolls back.
+
+Only changed supply chains get a summary for a period, so readers carry each supply
+chain's last summary forward, as `MonthlySupplyChainSummaryQuerySet.latest_in` does.
+"""
+from datetime import date
+from typing import Iterable
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from supply_chains.models import (
+    RAGRating,
+    MonthlySupplyChainSummary,
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+    SupplyChainCriticality,
+    SupplyChainMaturity,
+    VulAssessmentDeliverStage,
+    VulAssessmentMakeStage,
+    VulAssessmentReceiveStage,
+    VulAssessmentStoreStage,
+    VulAssessmentSupplyStage,
+)
+from supply_chains.utils import get_reporting_period
+
+STAGE_RATINGS = {
+    f"{stage}_stage_rag_rating": (
+        f"vulnerability_assessment__vulnerability_{stage}_stage__"
+        f"{stage}_stage_rag_rating"
+    )
+    for stage in ["supply", "receive", "make", "store", "deliver"]
+}
+STAGE_MODELS = [
+    VulAssessmentSupplyStage,
+    VulAssessmentReceiveStage,
+    VulAssessmentMakeStage,
+    VulAssessmentStoreStage,
+    VulAssessmentDeliverStage,
+]
+
+
+# written over when a summary is refreshed
+REFRESHED_FIELDS = [
+    field.name
+    for field in MonthlySupplyChainSummary._meta.concrete_fields
+    if not field.primary_key and field.name not in ["supply_chain", "period"]
+]
+
+
+def refresh_summaries(
+    supply_chain_ids: Iterable, period: date, vulnerability_ids: Iterable = ()
+) -> int:
+    """Rebuild the summaries of the given supply chains for one reporting period
+
+    The supply chains can also be given by their vulnerability assessments' ids.
+    Returns the number of summaries written.
+    """
+    period = get_reporting_period(period)
+
+    supply_chains = SupplyChain.objects.filter(
+        Q(pk__in=set(supply_chain_ids))
+        | Q(vulnerability_assessment__in=set(vulnerability_ids))
+    ).values(
+        "pk",
+        "gov_department_id",
+        "is_archived",
+        "vulnerability_status",
+        "risk_severity_status",
+        "criticality__rating",
+        "maturity__rating",
+        *STAGE_RATINGS.values(),
+    )
+    supply_chain_ids = {supply_chain["pk"] for supply_chain in supply_chains}
+    action_counts = {
+        row["supply_chain"]: row
+        for row in StrategicAction.objects.filter(
+            supply_chain__in=supply_chain_ids, is_archived=False
+        )
+        .values("supply_chain")
+        .annotate(
+            total=Count("pk"),
+            due_dates=ArrayAgg(
+                "target_completion_date",
+                filter=Q(is_ongoing=False, target_completion_date__isnull=False),
+                ordering="target_completion_date",
+            ),
+        )
+        .order_by()
+    }
+    update_counts = {
+        row["supply_chain"]: row
+        for row in StrategicActionUpdate.objects.given_month(
+            period,
+            supply_chain__in=supply_chain_ids,
+            status=StrategicActionUpdate.Status.SUBMITTED,
+        )
+        .values("supply_chain")
+        .annotate(
+            total=Count("pk"),
+            **{
+                rating.lower(): Count("pk", filter=Q(implementation_rag_rating=rating))
+                for rating in RAGRating.values
+            },
+        )
+        .order_by()
+    }
+
+    summaries = []
+    for supply_chain in supply_chains:
+        actions = action_counts.get(supply_chain["pk"], {})
+        updates = update_counts.get(supply_chain["pk"], {})
+        summaries.append(
+            MonthlySupplyChainSummary(
+                supply_chain_id=supply_chain["pk"],
+                gov_department_id=supply_chain["gov_department_id"],
+                period=period,
+                is_archived=supply_chain["is_archived"],
+                vulnerability_status=supply_chain["vulnerability_status"],
+                risk_severity_status=supply_chain["risk_severity_status"],
+                criticality_rating=supply_chain["criticality__rating"],
+                maturity_rating=supply_chain["maturity__rating"],
+                **{
+                    field: supply_chain[lookup]
+                    for field, lookup in STAGE_RATINGS.items()
+                },
+                strategic_action_count=actions.get("total", 0),
+                strategic_action_due_dates=actions.get("due_dates", []),
+                submitted_update_count=updates.get("total", 0),
+                red_update_count=updates.get("red", 0),
+                amber_update_count=updates.get("amber", 0),
+                green_update_count=updates.get("green", 0),
+            )
+        )
+
+    with transaction.atomic():
+        # Insert the summaries that aren't there, then write over the rest. A refresh
+        # committing at the same time can insert one of them first, and the insert waits
+        # for it to commit and then leaves that summary to be written over too.
+        MonthlySupplyChainSummary.objects.bulk_create(summaries, ignore_conflicts=True)
+        existing = dict(
+            MonthlySupplyChainSummary.objects.select_for_update()
+            .filter(supply_chain__in=supply_chain_ids, period=period)
+            .values_list("supply_chain", "pk")
+        )
+        written_over = []
+        for summary in summaries:
+            if existing[summary.supply_chain_id] != summary.pk:
+                summary.pk = existing[summary.supply_chain_id]
+                written_over.append(summary)
+        MonthlySupplyChainSummary.objects.bulk_update(written_over, REFRESHED_FIELDS)
+    return len(summaries)
+
+
+class StaleSummaries:
+    """The summaries marked stale in a transaction, refreshed together when it commits
+
+    Each change queues a call to it with `transaction.on_commit()`, and the first to run
+    refreshes them all, leaving the rest nothing to do. A transaction that rolls back
+    drops its calls, and the next starts with a new `StaleSummaries`.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.callbacks = connection.run_on_commit
+        # the supply chains, and the vulnerability assessments of others, by period
+        self.supply_chain_ids = {}
+        self.vulnerability_ids = {}
+
+    def is_current(self) -> bool:
+        # The connection replaces its list of callbacks when the transaction commits or
+        # rolls back, and when a savepoint rolls back. Calls queued before a savepoint
+        # that rolled back are kept, and then some summaries are just refreshed twice.
+        return self.connection.run_on_commit is self.callbacks
+
+    def __call__(self):
+        supply_chain_ids, self.supply_chain_ids = self.supply_chain_ids, {}
+        vulnerability_ids, self.vulnerability_ids = self.vulnerability_ids, {}
+        for period in {*supply_chain_ids, *vulnerability_ids}:
+            refresh_summaries(
+                supply_chain_ids.get(period, ()),
+                period,
+                vulnerability_ids=vulnerability_ids.get(period, ()),
+            )
+
+
+def _mark_stale(period: date, supply_chain_id=None, vulnerability_id=None):
+    period = get_reporting_period(period or date.today())
+    supply_chain_ids = [supply_chain_id] if supply_chain_id is not None else []
+    vulnerability_ids = [vulnerability_id] if vulnerability_id is not None else []
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        refresh_summaries(supply_chain_ids, period, vulnerability_ids=vulnerability_ids)
+        return
+
+    stale = getattr(connection, "stale_monthly_summaries", None)
+    if stale is None or not stale.is_current():
+        stale = connection.stale_monthly_summaries = StaleSummaries(connection)
+    stale.supply_chain_ids.setdefault(period, set()).update(supply_chain_ids)
+    stale.vulnerability_ids.setdefault(period, set()).update(vulnerability_ids)
+    transaction.on_commit(stale)
+
+
+def mark_stale(supply_chain_id, period: date = None):
+    """Refresh a supply chain's summary for the period, the current one by default
+
+    The refresh happens when the current transaction commits, or straight away outside one.
+    """
+    _mark_stale(period, supply_chain_id=supply_chain_id)
+
+
+def mark_vulnerability_stale(vulnerability_id, period: date = None):
+    """Refresh the summary of a vulnerability assessment's supply chain, as `mark_stale`
+
+    Its supply chain is looked up along with the rest of the refresh.
+    """
+    _mark_stale(period, vulnerability_id=vulnerability_id)
+
+
+def _moved(sender, instance, raw=False, **kwargs):
+    """Mark the summary a strategic action or update is moving out of as stale"""
+    if raw or instance._state.adding:
+        return
+    fields = ["supply_chain_id"]
+    if sender is StrategicActionUpdate:
+        fields.append("date_created")
+    previous = instance.get_loaded_values()
+    if previous is None:
+        previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+        if previous is None:
+            return
+    if any(previous[field] != getattr(instance, field) for field in fields):
+        mark_stale(previous["supply_chain_id"], previous.get("date_created"))
+
+
+def _supply_chain_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_stale(instance.pk)
+
+
+def _supply_chain_detail_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_stale(instance.supply_chain_id)
+
+
+def _update_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_stale(instance.supply_chain_id, instance.date_created)
+
+
+def _stage_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_vulnerability_stale(instance.vulnerability_id)
+
+
+def connect_signals():
+    # a deleted supply chain's summaries are deleted with it
+    post_save.connect(_supply_chain_changed, sender=SupplyChain)
+    for model in [SupplyChainCriticality, SupplyChainMaturity, StrategicAction]:
+        post_save.connect(_supply_chain_detail_changed, sender=model)
+        post_delete.connect(_supply_chain_detail_changed, sender=model)
+    post_save.connect(_update_changed, sender=StrategicActionUpdate)
+    for model in [StrategicAction, StrategicActionUpdate]:
+        pre_save.connect(_moved, sender=model)
+    post_delete.connect(_update_changed, sender=StrategicActionUpdate)
+    for model in STAGE_MODELS:
+        post_save.connect(_stage_changed, sender=model)
+        post_delete.connect(_stage_changed, sender=model)
@@ -0,0 +1,158 @@
+from collections import Counter
+from datetime import date
+from typing import List
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from change_log.tracking import batched, record_update, recording
+from supply_chains.models import (
+    SupplyChain,
+    StrategicAction,
+    StrategicActionUpdate,
+    update_counters,
+)
+from supply_chains.rollup import mark_stale
+from supply_chains.utils import get_reporting_period
+
+Status = StrategicActionUpdate.Status
+
+UPDATE_FIELDS = [
+    "status",
+    "submission_date",
+    "changed_value_for_target_completion_date",
+    "changed_value_for_is_ongoing",
+    "last_modified",
+]
+STRATEGIC_ACTION_FIELDS = ["target_completion_date", "is_ongoing", "last_modified"]
+
+
+def _apply_timing_change(update: StrategicActionUpdate) -> str:
+    """Copy a revised timing from the update to its strategic action
+
+    This mirrors what `StrategicActionUpdate.save()` does on submission, and returns the
+    comment `StrategicAction.save()` would log, or None if the timing didn't change.
+    """
+    strategic_action = update.strategic_action
+    previous_is_ongoing = strategic_action.is_ongoing
+    changed = False
+    if update.changed_value_for_target_completion_date is not None:
+        strategic_action.target_completion_date = (
+            update.changed_value_for_target_completion_date
+        )
+        strategic_action.is_ongoing = False
+        update.changed_value_for_target_completion_date = None
+        changed = True
+    if update.changed_value_for_is_ongoing:
+        strategic_action.is_ongoing = update.changed_value_for_is_ongoing
+        strategic_action.target_completion_date = None
+        update.changed_value_for_is_ongoing = False
+        changed = True
+    if not changed:
+        return None
+
+    if previous_is_ongoing:
+        change_type = "Stopped being 'Ongoing'"
+    elif strategic_action.is_ongoing:
+        change_type = "Becoming 'Ongoing'"
+    else:
+        change_type = "Target completion date changed"
+    return f"TIMING: {change_type}: {update.reason_for_completion_date_change}"
+
+
+def submit_monthly_updates(
+    supply_chains: List[SupplyChain], last_deadline: date, user: User = None
+) -> int:
+    """Submit every ready update for the supply chains since the last deadline
+
+    All updates are validated before anything is written. The writes are batched by model
+    rather than made by saving each update, so the query count doesn't grow with the number
+    of updates; the change log entries for them are inserted together. Either every update is submitted or, if any is invalid, a ValidationError
+    is raised and nothing is.
+
+    Returns the number of updates submitted.
+    """
+    today = date.today()
+    now = timezone.now()
+    updates = list(
+        StrategicActionUpdate.objects.since(
+            last_deadline,
+            supply_chain__in=supply_chains,
+            status=Status.READY_TO_SUBMIT,
+        ).select_related("strategic_action__supply_chain", "user")
+    )
+
+    errors = []
+    changed_strategic_actions = []
+    comments = []
+    change_log_users = []
+    for update in updates:
+        update.status = Status.SUBMITTED
+        update.submission_date = today
+        update.last_modified = now
+        try:
+            update.clean()
+        except ValidationError as e:
+            errors.append(ValidationError(f"{update}: {'; '.join(e.messages)}"))
+            continue
+        comment = _apply_timing_change(update)
+        if comment is None:
+            continue
+        strategic_action = update.strategic_action
+        strategic_action.last_modified = now
+        try:
+            strategic_action.full_clean(exclude=["supply_chain"], validate_unique=False)
+        except ValidationError as e:
+            errors.append(
+                ValidationError(f"{strategic_action}: {'; '.join(e.messages)}")
+            )
+            continue
+        changed_strategic_actions.append(strategic_action)
+        comments.append(comment)
+        change_log_users.append(update.user)
+    if errors:
+        raise ValidationError(errors)
+
+    for supply_chain in supply_chains:
+        supply_chain.last_submission_date = today
+        supply_chain.last_modified = now
+
+    with batched(), transaction.atomic():
+        if changed_strategic_actions:
+            StrategicAction.objects.bulk_update(
+                changed_strategic_actions, STRATEGIC_ACTION_FIELDS
+            )
+            for strategic_action, comment, change_log_user in zip(
+                changed_strategic_actions, comments, change_log_users
+            ):
+                with recording(comment=comment, user=change_log_user):
+                    record_update(strategic_action, STRATEGIC_ACTION_FIELDS)
+        StrategicActionUpdate.objects.bulk_update(updates, UPDATE_FIELDS)
+        supply_chain_fields = ["last_submission_date", "last_modified"]
+        SupplyChain.objects.bulk_update(supply_chains, supply_chain_fields)
+        with recording(user=user):
+            for supply_chain in supply_chains:
+                record_update(supply_chain, supply_chain_fields)
+        # the bulk writes bypass the save paths that keep the counters up to date
+        supply_chains_by_id = {
+            supply_chain.pk: supply_chain for supply_chain in supply_chains
+        }
+        submitted = Counter(
+            (update.supply_chain_id, get_reporting_period(update.date_created))
+            for update in updates
+        )
+        for (supply_chain_id, period), count in submitted.items():
+            update_counters(
+                supply_chain_id,
+                supply_chains_by_id.get(supply_chain_id),
+                add_submitted_updates=(period, count, today),
+            )
+        # nor do they send the signals that keep the monthly summaries fresh
+        for update in updates:
+            mark_stale(update.supply_chain_id, update.date_created)
+
+    for strategic_action in changed_strategic_actions:
+        strategic_action._record_tracked_fields()
+    return len(updates)
@@ -0,0 +1,6 @@
+country_dependencies_csv = """Id,Department,Supply Chain Name,Lead,Category,Notes,Total,France,Germany,Japan
+1,DIT,Supply Chain One,A,B,,3,High,,Very high
+2,DIT,supply chain two,A,B,,1,Low,Medium,
+3,DIT,Unknown Supply Chain,A,B,,0,,,
+,,,,,,,,,
+"""
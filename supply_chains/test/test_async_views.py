@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+from django.views.generic import TemplateView
+
+from accounts.test.factories import UserFactory
+from chain_details.views import ChainDetailsInfoView
+from supply_chains.mixins import ConcurrentContextMixin, _on_own_connection
+from supply_chains.test.factories import (
+    ScenarioAssessmentFactory,
+    SupplyChainFactory,
+    SupplyChainStageFactory,
+)
+from supply_chains.views import SCSummary
+
+
+class BarrierView(ConcurrentContextMixin, TemplateView):
+    """Each loader waits for the other, so they only return if they run concurrently"""
+
+    template_name = "privacy_notice.html"
+
+    def get_context_loaders(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def loader(value):
+            def load():
+                barrier.wait()
+                return value
+
+            return load
+
+        return {"first": loader(1), "second": loader(2)}
+
+
+def get(view, url="/", user=None, **kwargs):
+    request = RequestFactory().get(url)
+    request.user = user or AnonymousUser()
+    # the templates' tags read the URL name
+    request.resolver_match = resolve(url)
+    if asyncio.iscoroutinefunction(view):
+        return async_to_sync(view)(request, **kwargs)
+    return view(request, **kwargs)
+
+
+def test_views_are_sync_without_async_views():
+    assert not asyncio.iscoroutinefunction(BarrierView.as_view())
+
+
+@override_settings(ASYNC_VIEWS=True)
+def test_views_are_async_with_async_views():
+    assert asyncio.iscoroutinefunction(BarrierView.as_view())
+
+
+@override_settings(ASYNC_VIEWS=True)
+def test_async_views_load_their_context_concurrently():
+    response = get(BarrierView.as_view())
+
+    assert response.context_data["first"] == 1
+    assert response.context_data["second"] == 2
+
+
+def test_sync_views_load_their_context_in_turn():
+    class SyncView(ConcurrentContextMixin, TemplateView):
+        template_name = "privacy_notice.html"
+
+        def get_context_loaders(self):
+            return {"thread": threading.get_ident}
+
+    response = get(SyncView.as_view())
+
+    assert response.context_data["thread"] == threading.get_ident()
+
+
+def test_loaders_give_back_their_connection():
+    with mock.patch("supply_chains.mixins.connections") as connections:
+        assert _on_own_connection(lambda: 1)() == 1
+
+    connections.close_all.assert_called_once_with()
+
+
+@override_settings(ASYNC_VIEWS=True)
+def test_async_views_still_check_access():
+    response = get(SCSummary.as_view(), "/supply-chains/summary/")
+
+    assert response.status_code == 302
+    assert response.url.startswith("/auth/login/")
+
+
+# the loaders use connections of their own, so they need the test data committed
+@pytest.mark.django_db(transaction=True)
+class TestAsyncChainDetailsInfo:
+    @override_settings(ASYNC_VIEWS=True)
+    def test_renders_the_supply_chain(self):
+        user = UserFactory()
+        supply_chain = SupplyChainFactory(gov_department=user.gov_department)
+        ScenarioAssessmentFactory(supply_chain=supply_chain)
+        stages = [
+            SupplyChainStageFactory(supply_chain=supply_chain, name=name, order=order)
+            for name, order in (("refining", 2), ("recycling", 1))
+        ]
+
+        kwargs = {
+            "dept": user.gov_department.name,
+            "supply_chain_slug": supply_chain.slug,
+        }
+
+        response = get(
+            ChainDetailsInfoView.as_view(),
+            reverse("chain-details-info", kwargs=kwargs),
+            user=user,
+            **kwargs,
+        )
+        response.render()
+
+        assert response.status_code == 200
+        assert response.context_data["sc"] == supply_chain
+        assert response.context_data["stages"] == stages[::-1]
+        assert response.context_data["scenario_assessment_sections"]
+        assert supply_chain.name in response.content.decode()
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_raises_not_found_from_a_loader(self):
+        user = UserFactory()
+
+        with pytest.raises(Http404):
+            get(
+                ChainDetailsInfoView.as_view(),
+                user=user,
+                dept=user.gov_department.name,
+                supply_chain_slug="missing",
+            )
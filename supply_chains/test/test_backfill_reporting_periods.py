@@ -0,0 +1,103 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from supply_chains.models import StrategicActionUpdate
+from supply_chains.test.factories import (
+    StrategicActionFactory,
+    StrategicActionUpdateFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def strategic_action():
+    yield StrategicActionFactory()
+
+
+def create_update(strategic_action, date_created):
+    return StrategicActionUpdateFactory(
+        strategic_action=strategic_action,
+        supply_chain=strategic_action.supply_chain,
+        date_created=date_created,
+    )
+
+
+class TestBackfillReportingPeriods:
+    def test_recomputes_stale_periods(self, strategic_action):
+        update = create_update(strategic_action, date(2021, 6, 10))
+        # update() skips the save that would have set the period
+        StrategicActionUpdate.objects.update(date_created=date(2021, 7, 10))
+
+        with StringIO() as status:
+            call_command("backfill_reporting_periods", stdout=status)
+            res = status.getvalue()
+
+        update.refresh_from_db()
+        assert update.reporting_period == date(2021, 7, 1)
+        assert "Recomputed the reporting period of 1 updates" in res
+
+    def test_days_after_the_last_working_day_are_in_the_next_period(
+        self, strategic_action
+    ):
+        update = create_update(strategic_action, date(2021, 6, 10))
+        # 30 July 2021 was a Friday, so the 31st is in August's round
+        StrategicActionUpdate.objects.update(date_created=date(2021, 7, 31))
+
+        call_command("backfill_reporting_periods", stdout=StringIO())
+
+        update.refresh_from_db()
+        assert update.reporting_period == date(2021, 8, 1)
+
+    def test_since_leaves_earlier_updates(self, strategic_action):
+        earlier = create_update(strategic_action, date(2021, 5, 10))
+        later = create_update(strategic_action, date(2021, 6, 10))
+        for update, stale_period in [
+            (earlier, date(2020, 1, 1)),
+            (later, date(2020, 2, 1)),
+        ]:
+            StrategicActionUpdate.objects.filter(pk=update.pk).update(
+                reporting_period=stale_period
+            )
+
+        call_command(
+            "backfill_reporting_periods", "--since", "2021-06", stdout=StringIO()
+        )
+
+        earlier.refresh_from_db()
+        later.refresh_from_db()
+        assert earlier.reporting_period == date(2020, 1, 1)
+        assert later.reporting_period == date(2021, 6, 1)
+
+    def test_clashing_periods_change_nothing(self, strategic_action):
+        create_update(strategic_action, date(2021, 5, 10))
+        create_update(strategic_action, date(2021, 6, 10))
+        StrategicActionUpdate.objects.update(date_created=date(2021, 6, 10))
+
+        with pytest.raises(CommandError, match=f"{strategic_action.pk} in 2021-06"):
+            call_command("backfill_reporting_periods", stdout=StringIO())
+
+        assert set(
+            StrategicActionUpdate.objects.values_list("reporting_period", flat=True)
+        ) == {date(2021, 5, 1), date(2021, 6, 1)}
+
+    def test_updates_swapping_periods_are_not_a_clash(self, strategic_action):
+        june = create_update(strategic_action, date(2021, 6, 10))
+        july = create_update(strategic_action, date(2021, 7, 10))
+        StrategicActionUpdate.objects.filter(pk=june.pk).update(
+            date_created=date(2021, 7, 10)
+        )
+        StrategicActionUpdate.objects.filter(pk=july.pk).update(
+            date_created=date(2021, 6, 10)
+        )
+
+        call_command("backfill_reporting_periods", stdout=StringIO())
+
+        june.refresh_from_db()
+        july.refresh_from_db()
+        assert june.reporting_period == date(2021, 7, 1)
+        assert july.reporting_period == date(2021, 6, 1)
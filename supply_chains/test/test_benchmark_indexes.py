@@ -0,0 +1,61 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from supply_chains.management.commands.benchmark_indexes import Command
+from supply_chains.models import SupplyChain, StrategicActionUpdate
+
+pytestmark = pytest.mark.django_db
+
+
+class TestBenchmarkIndexes:
+    def invoke_benchmark(self, *args):
+        with StringIO() as status:
+            call_command(
+                "benchmark_indexes",
+                "--supply-chains",
+                "3",
+                "--actions",
+                "2",
+                "--months",
+                "3",
+                *args,
+                stdout=status,
+            )
+            return status.getvalue()
+
+    def test_reports_timings_with_and_without_indexes(self):
+        res = self.invoke_benchmark()
+
+        assert "Seeded 3 supply chains, 6 strategic actions and 18 updates" in res
+        assert "Queries with indexes" in res
+        assert "Queries without indexes" in res
+        assert "SAUQuerySet.given_month: " in res
+
+    def test_leaves_data_and_indexes_unchanged(self):
+        self.invoke_benchmark("--plans")
+
+        assert not SupplyChain.objects.exists()
+        assert not StrategicActionUpdate.objects.exists()
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, StrategicActionUpdate._meta.db_table
+            )
+        assert "sau_submitted_sc_period_idx" in constraints
+
+    @mock.patch("supply_chains.management.commands.benchmark_indexes.date")
+    def test_seeds_an_update_a_reporting_period_at_the_end_of_a_month(self, mock_date):
+        # 31 July 2021 was a Saturday, so a month before the 31st of August falls into
+        # August's reporting period
+        mock_date.today.return_value = date(2021, 8, 31)
+
+        Command().seed(supply_chain_count=1, actions_per_chain=1, months=3)
+
+        assert not StrategicActionUpdate.objects.duplicate_reporting_periods()
+        assert sorted(
+            StrategicActionUpdate.objects.values_list("reporting_period", flat=True)
+        ) == [date(2021, 6, 1), date(2021, 7, 1), date(2021, 8, 1)]
@@ -0,0 +1,97 @@
+from io import StringIO
+from unittest import mock
+from urllib.error import HTTPError, URLError
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from accounts.test.factories import UserFactory
+from supply_chains.management.commands.benchmark_serving import percentile
+from supply_chains.test.factories import StrategicActionFactory, SupplyChainFactory
+
+pytestmark = pytest.mark.django_db
+
+COMMAND = "supply_chains.management.commands.benchmark_serving"
+
+
+@pytest.fixture
+def user():
+    user = UserFactory()
+    StrategicActionFactory(
+        supply_chain=SupplyChainFactory(gov_department=user.gov_department)
+    )
+    return user
+
+
+def respond(request, timeout):
+    if not isinstance(request, str) and request.full_url.endswith("/detail/"):
+        raise HTTPError(request.full_url, 500, "Server Error", {}, None)
+    response = mock.MagicMock()
+    response.__enter__.return_value.status = 200
+    return response
+
+
+def test_percentile_is_the_nearest_rank():
+    timings = list(range(1, 101))
+
+    assert percentile(timings, 50) == 50
+    assert percentile(timings, 95) == 95
+    assert percentile([3, 1, 2], 95) == 3
+
+
+def test_compares_latency_over_wsgi_and_asgi(user):
+    with mock.patch(f"{COMMAND}.subprocess.Popen") as popen, mock.patch(
+        f"{COMMAND}.urlopen", side_effect=respond
+    ) as urlopen, StringIO() as status:
+        popen.return_value.poll.return_value = None
+        call_command("benchmark_serving", "--requests", "3", stdout=status)
+        res = status.getvalue()
+
+    assert [call.kwargs["env"]["SERVER_MODE"] for call in popen.call_args_list] == [
+        "wsgi",
+        "asgi",
+    ]
+    assert [call.args[0][3] for call in popen.call_args_list] == [
+        "config.wsgi:application",
+        "config.asgi:application",
+    ]
+    assert popen.return_value.terminate.call_count == 2
+
+    requests = [call.args[0] for call in urlopen.call_args_list]
+    pages = [request for request in requests if not isinstance(request, str)]
+    # five paths, warmed up and then requested three times, in each mode
+    assert len(pages) == 5 * 4 * 2
+    signed = [page for page in pages if page.full_url.endswith("/api/activity-stream/")]
+    assert all(page.get_header("Authorization").startswith("Hawk ") for page in signed)
+    assert all(
+        page.get_header("Cookie").startswith("sessionid=")
+        for page in pages
+        if page not in signed
+    )
+
+    assert "Serving over wsgi" in res
+    assert "Serving over asgi" in res
+    assert "/supply-chains/summary/: p50 " in res
+    assert "/detail/: p50 " in res and ", 3 errors" in res
+    assert "p95 latency" in res
+    assert "/api/activity-stream/: wsgi " in res
+
+
+def test_fails_when_the_server_exits(user):
+    with mock.patch(f"{COMMAND}.subprocess.Popen") as popen, mock.patch(
+        f"{COMMAND}.urlopen", side_effect=URLError("refused")
+    ):
+        popen.return_value.poll.return_value = 1
+        popen.return_value.returncode = 1
+        with pytest.raises(CommandError, match="gunicorn exited with 1"):
+            call_command("benchmark_serving", stdout=StringIO())
+
+    popen.return_value.terminate.assert_called_once_with()
+
+
+def test_needs_a_user_with_supply_chains():
+    UserFactory()
+
+    with pytest.raises(CommandError, match="No user with supply chains"):
+        call_command("benchmark_serving", stdout=StringIO())
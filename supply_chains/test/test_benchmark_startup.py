@@ -0,0 +1,43 @@
+from io import StringIO
+from unittest import mock
+from urllib.error import URLError
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+COMMAND = "supply_chains.management.commands.benchmark_startup"
+
+
+def test_reports_boot_steps_and_time_to_first_response():
+    with mock.patch(f"{COMMAND}.subprocess.run") as run, mock.patch(
+        f"{COMMAND}.subprocess.Popen"
+    ) as popen, mock.patch(
+        f"{COMMAND}.urlopen", side_effect=[URLError("refused"), mock.MagicMock()] * 2
+    ), StringIO() as status:
+        popen.return_value.poll.return_value = None
+        call_command("benchmark_startup", "--runs", "1", stdout=status)
+        res = status.getvalue()
+
+    assert run.call_count == 4
+    assert [
+        call.kwargs["env"]["GUNICORN_PRELOAD"] for call in popen.call_args_list
+    ] == [
+        "1",
+        "0",
+    ]
+    assert popen.return_value.terminate.call_count == 2
+    assert "migrate, createcachetable and collectstatic: median " in res
+    assert "prepare_boot: median " in res
+    assert "preloaded: median " in res
+    assert "not preloaded: median " in res
+
+
+def test_fails_when_the_server_exits():
+    with mock.patch(f"{COMMAND}.subprocess.run"), mock.patch(
+        f"{COMMAND}.subprocess.Popen"
+    ) as popen, mock.patch(f"{COMMAND}.urlopen", side_effect=URLError("refused")):
+        popen.return_value.poll.return_value = 1
+        popen.return_value.returncode = 1
+        with pytest.raises(CommandError, match="gunicorn exited with 1"):
+            call_command("benchmark_startup", "--runs", "1", stdout=StringIO())
@@ -0,0 +1,207 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+
+from supply_chains.models import (
+    RAGRating,
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+    SupplyChainUmbrella,
+)
+from supply_chains.submission import submit_monthly_updates
+from supply_chains.test.factories import (
+    StrategicActionFactory,
+    StrategicActionUpdateFactory,
+    SupplyChainFactory,
+    SupplyChainUmbrellaFactory,
+)
+from supply_chains.utils import (
+    get_last_working_day_of_previous_month,
+    get_reporting_period,
+)
+
+pytestmark = pytest.mark.django_db
+Status = StrategicActionUpdate.Status
+
+
+class TestCounters:
+    def setup_method(self):
+        self.umbrella = SupplyChainUmbrellaFactory()
+        self.supply_chain = SupplyChainFactory(
+            supply_chain_umbrella=self.umbrella,
+            gov_department=self.umbrella.gov_department,
+            last_submission_date=None,
+        )
+        self.period = get_reporting_period(date.today())
+
+    def refresh(self):
+        self.supply_chain.refresh_from_db()
+        self.umbrella.refresh_from_db()
+
+    def submitted_update(self, **kwargs):
+        return StrategicActionUpdateFactory(
+            status=Status.SUBMITTED,
+            submission_date=date.today(),
+            strategic_action=StrategicActionFactory(supply_chain=self.supply_chain),
+            supply_chain=self.supply_chain,
+            **kwargs,
+        )
+
+    def test_creating_actions_counts_active_ones(self):
+        StrategicActionFactory.create_batch(2, supply_chain=self.supply_chain)
+        StrategicActionFactory(
+            supply_chain=self.supply_chain, is_archived=True, archived_reason="Done"
+        )
+
+        self.refresh()
+        assert self.supply_chain.active_strategic_action_count == 2
+        assert self.umbrella.active_strategic_action_count == 2
+
+    def test_archiving_and_deleting_actions_uncounts_them(self):
+        archived, deleted, _ = StrategicActionFactory.create_batch(
+            3, supply_chain=self.supply_chain
+        )
+        archived = StrategicAction.objects.get(pk=archived.pk)
+        archived.is_archived = True
+        archived.archived_reason = "Done"
+        archived.save()
+        deleted.delete()
+
+        self.refresh()
+        assert self.supply_chain.active_strategic_action_count == 1
+        assert self.umbrella.active_strategic_action_count == 1
+
+    def test_moving_an_action_moves_its_count(self):
+        strategic_action = StrategicActionFactory(supply_chain=self.supply_chain)
+        other_supply_chain = SupplyChainFactory()
+
+        strategic_action = StrategicAction.objects.get(pk=strategic_action.pk)
+        strategic_action.supply_chain = other_supply_chain
+        strategic_action.save()
+
+        self.refresh()
+        other_supply_chain.refresh_from_db()
+        assert self.supply_chain.active_strategic_action_count == 0
+        assert self.umbrella.active_strategic_action_count == 0
+        assert other_supply_chain.active_strategic_action_count == 1
+
+    def test_submitting_an_update_counts_it_for_its_period(self):
+        update = StrategicActionUpdateFactory(
+            status=Status.IN_PROGRESS,
+            strategic_action=StrategicActionFactory(supply_chain=self.supply_chain),
+            supply_chain=self.supply_chain,
+        )
+        update = StrategicActionUpdate.objects.get(pk=update.pk)
+        update.status = Status.SUBMITTED
+        update.submission_date = date.today()
+        update.save()
+
+        self.refresh()
+        assert self.supply_chain.submitted_updates_in(self.period) == 1
+        assert self.supply_chain.last_submission_date == date.today()
+        assert self.umbrella.submitted_updates_in(self.period) == 1
+        assert self.umbrella.last_submission_date == date.today()
+
+    def test_deleting_a_submitted_update_uncounts_it(self):
+        self.submitted_update()
+        self.submitted_update().delete()
+
+        self.refresh()
+        assert self.supply_chain.submitted_updates_in(self.period) == 1
+        assert self.umbrella.submitted_updates_in(self.period) == 1
+
+    def test_a_later_period_restarts_the_count(self):
+        previous_period = self.period - relativedelta(months=1)
+        self.submitted_update(date_created=previous_period)
+        self.submitted_update(date_created=previous_period)
+        self.submitted_update()
+
+        self.refresh()
+        assert self.supply_chain.submitted_update_period == self.period
+        assert self.supply_chain.submitted_updates_in(self.period) == 1
+        assert self.supply_chain.submitted_updates_in(previous_period) == 0
+
+    def test_an_earlier_period_is_not_counted(self):
+        self.submitted_update()
+        self.submitted_update(date_created=self.period - relativedelta(months=1))
+
+        self.refresh()
+        assert self.supply_chain.submitted_updates_in(self.period) == 1
+
+    def test_saving_a_supply_chain_keeps_counters_made_since_loading(self):
+        supply_chain = SupplyChain.objects.get(pk=self.supply_chain.pk)
+        StrategicActionFactory(supply_chain=self.supply_chain)
+
+        supply_chain.name = "Renamed"
+        supply_chain.save()
+
+        self.refresh()
+        assert self.supply_chain.name == "Renamed"
+        assert self.supply_chain.active_strategic_action_count == 1
+
+    def test_bulk_submission_counts_updates(self):
+        for _ in range(2):
+            StrategicActionUpdateFactory(
+                status=Status.READY_TO_SUBMIT,
+                implementation_rag_rating=RAGRating.GREEN,
+                strategic_action=StrategicActionFactory(supply_chain=self.supply_chain),
+                supply_chain=self.supply_chain,
+            )
+
+        submit_monthly_updates(
+            [self.supply_chain], get_last_working_day_of_previous_month()
+        )
+
+        self.refresh()
+        assert self.supply_chain.submitted_updates_in(self.period) == 2
+        assert self.umbrella.submitted_updates_in(self.period) == 2
+        assert self.umbrella.last_submission_date == date.today()
+
+
+class TestReconcileCounters:
+    def invoke_reconcile(self):
+        with StringIO() as status:
+            call_command("reconcile_counters", stdout=status)
+            return status.getvalue()
+
+    def test_corrects_drifted_counters(self):
+        umbrella = SupplyChainUmbrellaFactory()
+        supply_chain = SupplyChainFactory(
+            supply_chain_umbrella=umbrella, gov_department=umbrella.gov_department
+        )
+        StrategicActionFactory.create_batch(2, supply_chain=supply_chain)
+        StrategicActionUpdateFactory(
+            status=Status.SUBMITTED,
+            submission_date=date.today(),
+            strategic_action=StrategicActionFactory(supply_chain=supply_chain),
+            supply_chain=supply_chain,
+        )
+        self.invoke_reconcile()
+        SupplyChain.objects.update(active_strategic_action_count=0)
+        SupplyChainUmbrella.objects.update(submitted_update_count=5)
+
+        res = self.invoke_reconcile()
+
+        assert "Supply chains corrected: 1" in res
+        assert "Supply chain umbrellas corrected: 1" in res
+        supply_chain.refresh_from_db()
+        umbrella.refresh_from_db()
+        period = get_reporting_period(date.today())
+        assert supply_chain.active_strategic_action_count == 3
+        assert supply_chain.submitted_updates_in(period) == 1
+        assert umbrella.active_strategic_action_count == 3
+        assert umbrella.submitted_updates_in(period) == 1
+        assert umbrella.last_submission_date == supply_chain.last_submission_date
+
+    def test_reports_nothing_to_correct(self):
+        supply_chain = SupplyChainFactory()
+        StrategicActionFactory(supply_chain=supply_chain)
+        self.invoke_reconcile()
+
+        res = self.invoke_reconcile()
+
+        assert "Supply chains corrected: 0" in res
@@ -10,8 +10,15 @@ from django.conf import settings
 
 from supply_chains.models import StrategicActionUpdate
 from supply_chains.management.commands.datafixup import Command
+from supply_chains.test.factories import (
+    StrategicActionFactory,
+    StrategicActionUpdateFactory,
+    SupplyChainFactory,
+    SupplyChainUmbrellaFactory,
+)
 
 pytestmark = pytest.mark.django_db
+Status = StrategicActionUpdate.Status
 
 
 class TestFixtureFixup:
@@ -178,3 +185,96 @@ class TestFixtureFixup:
             for pk, updated_date in updated_last_submission_dates.items():
                 if expected_submission_dates[pk]:
                     assert updated_date == expected_submission_dates[pk]
+
+    def test_query_count_does_not_grow_with_updates(
+        self, django_assert_max_num_queries
+    ):
+        StrategicActionUpdateFactory.create_batch(5)
+        StrategicActionUpdate.objects.update(status=Status.SUBMITTED)
+        base_date = Command.BASE_DATE + relativedelta(months=1)
+        with mock.patch(
+            "supply_chains.management.commands.datafixup.date",
+            mock.Mock(today=mock.Mock(return_value=base_date)),
+        ):
+            # the periods the shifted updates could collide with and the updates'
+            # dates, one update for the dates, the shifted dates' reporting periods
+            # found and updated, and one update for the supply chains, plus the
+            # savepoint, then the vulnerability assessments read to refresh their
+            # stage documents, and the counters reconciled in six more
+            with django_assert_max_num_queries(15):
+                self.call_command()
+
+    def test_month_end_dates_are_clamped(self):
+        supply_chain = SupplyChainFactory()
+        for day in (30, 31):
+            StrategicActionUpdateFactory(
+                supply_chain=supply_chain,
+                strategic_action=StrategicActionFactory(supply_chain=supply_chain),
+                submission_date=date(year=2021, month=1, day=day),
+                date_created=date(year=2021, month=1, day=day),
+            )
+        StrategicActionUpdate.objects.update(status=Status.SUBMITTED)
+
+        Command().update_submission_and_created_dates(
+            StrategicActionUpdate.objects.all(), relativedelta(months=1)
+        )
+
+        assert set(
+            StrategicActionUpdate.objects.values_list("submission_date", flat=True)
+        ) == {date(year=2021, month=2, day=28)}
+        supply_chain.refresh_from_db()
+        assert supply_chain.last_submission_date == date(year=2021, month=2, day=28)
+
+    def test_umbrella_last_submission_date_follows_its_supply_chains(self):
+        umbrella = SupplyChainUmbrellaFactory()
+        supply_chain = SupplyChainFactory(
+            supply_chain_umbrella=umbrella, gov_department=umbrella.gov_department
+        )
+        StrategicActionUpdateFactory(
+            supply_chain=supply_chain,
+            strategic_action=StrategicActionFactory(supply_chain=supply_chain),
+            submission_date=date(year=2021, month=4, day=20),
+            date_created=date(year=2021, month=4, day=10),
+        )
+        StrategicActionUpdate.objects.update(status=Status.SUBMITTED)
+        base_date = Command.BASE_DATE + relativedelta(months=1)
+        with mock.patch(
+            "supply_chains.management.commands.datafixup.date",
+            mock.Mock(today=mock.Mock(return_value=base_date)),
+        ):
+            self.call_command()
+
+        umbrella.refresh_from_db()
+        assert umbrella.last_submission_date == date(year=2021, month=5, day=20)
+
+    def test_updates_that_would_collide_are_left_and_reported(self):
+        strategic_action = StrategicActionFactory()
+        submitted = StrategicActionUpdateFactory(
+            strategic_action=strategic_action,
+            supply_chain=strategic_action.supply_chain,
+            submission_date=date(year=2021, month=4, day=20),
+            date_created=date(year=2021, month=4, day=10),
+        )
+        in_progress = StrategicActionUpdateFactory(
+            strategic_action=strategic_action,
+            supply_chain=strategic_action.supply_chain,
+            date_created=date(year=2021, month=5, day=10),
+        )
+        StrategicActionUpdate.objects.filter(pk=submitted.pk).update(
+            status=Status.SUBMITTED
+        )
+        StrategicActionUpdate.objects.filter(pk=in_progress.pk).update(
+            status=Status.IN_PROGRESS
+        )
+        base_date = Command.BASE_DATE + relativedelta(months=1)
+        with mock.patch(
+            "supply_chains.management.commands.datafixup.date",
+            mock.Mock(today=mock.Mock(return_value=base_date)),
+        ):
+            output = self.call_command()
+
+        submitted.refresh_from_db()
+        assert submitted.date_created == date(year=2021, month=4, day=10)
+        assert submitted.reporting_period == date(year=2021, month=4, day=1)
+        assert "Left 1 updates where they were" in output
+        assert str(submitted.pk) in output
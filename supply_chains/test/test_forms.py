@@ -765,7 +765,7 @@ class TestMonthlyUpdateTimingForm:
 
 
 class TestMonthlyUpdateModifiedTimingForm:
-    """Should log the reason for changing the date in reversion."""
+    """Should log the reason for changing the date in the change log."""
 
     def setup_method(self):
         supply_chain = SupplyChainFactory()
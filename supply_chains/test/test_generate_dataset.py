@@ -0,0 +1,128 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from supply_chains.models import (
+    CountryDependency,
+    MonthlySupplyChainSummary,
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+    VulnerabilityAssessment,
+)
+
+pytestmark = pytest.mark.django_db
+
+SMALL = [
+    "--departments",
+    "2",
+    "--umbrellas",
+    "1",
+    "--supply-chains",
+    "3",
+    "--actions",
+    "2",
+    "--months",
+    "3",
+    "--countries",
+    "5",
+    "--users",
+    "2",
+]
+
+
+def generate_dataset(*args):
+    with StringIO() as status:
+        call_command("generate_dataset", *SMALL, *args, stdout=status)
+        return status.getvalue()
+
+
+def snapshot():
+    return {
+        "supply chains": list(
+            SupplyChain.objects.order_by("name").values_list(
+                "name",
+                "vulnerability_status",
+                "is_archived",
+                "supply_chain_umbrella__name",
+            )
+        ),
+        "updates": list(
+            StrategicActionUpdate.objects.order_by(
+                "strategic_action__name", "reporting_period"
+            ).values_list("strategic_action__name", "status", "date_created")
+        ),
+        "dependencies": list(
+            CountryDependency.objects.order_by(
+                "supply_chain__name", "country__name"
+            ).values_list("supply_chain__name", "country__name", "dependency_level")
+        ),
+    }
+
+
+def generate_and_roll_back(*args):
+    with transaction.atomic():
+        generate_dataset(*args)
+        data = snapshot()
+        transaction.set_rollback(True)
+    return data
+
+
+class TestGenerateDataset:
+    def test_generates_every_model(self):
+        res = generate_dataset()
+
+        assert SupplyChain.objects.count() == 6
+        assert StrategicAction.objects.count() == 12
+        assert StrategicActionUpdate.objects.exists()
+        assert CountryDependency.objects.count() >= 6 * 3
+        assert "supply chains: 6" in res
+        assert "Counters reconciled" in res
+        assert "Monthly supply chain summaries rebuilt" in res
+
+    def test_updates_are_one_per_period(self):
+        generate_dataset()
+
+        for strategic_action in StrategicAction.objects.all():
+            periods = list(
+                strategic_action.monthly_updates.values_list(
+                    "reporting_period", flat=True
+                )
+            )
+            assert len(periods) == len(set(periods)) <= 3
+
+    def test_builds_stage_documents(self):
+        generate_dataset()
+
+        for assessment in VulnerabilityAssessment.objects.all():
+            assert assessment.stage_document == assessment.build_stage_document()
+
+    def test_rebuilds_counters_and_summaries(self):
+        generate_dataset()
+
+        supply_chain = SupplyChain.objects.filter(is_archived=False).first()
+        assert supply_chain.active_strategic_action_count == (
+            supply_chain.strategic_actions.filter(is_archived=False).count()
+        )
+        assert MonthlySupplyChainSummary.objects.filter(
+            supply_chain=supply_chain
+        ).exists()
+
+    def test_same_seed_gives_same_data(self):
+        assert generate_and_roll_back("--seed", "7") == generate_and_roll_back(
+            "--seed", "7"
+        )
+
+    def test_different_seeds_give_different_data(self):
+        assert generate_and_roll_back("--seed", "7") != generate_and_roll_back(
+            "--seed", "8"
+        )
+
+    def test_refuses_to_reuse_a_prefix(self):
+        generate_dataset()
+
+        with pytest.raises(CommandError, match="choose another --prefix"):
+            generate_dataset()
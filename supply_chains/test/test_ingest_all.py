@@ -0,0 +1,203 @@
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from accounts.models import GovDepartment
+from supply_chains.management.commands import ingest_all as sut
+from supply_chains.models import StrategicAction, StrategicActionUpdate, SupplyChain
+
+
+pytestmark = pytest.mark.django_db
+DATA_FILES_LOC = os.path.abspath("supply_chains/test/data")
+
+
+def write_manifest(tmp_path, manifest):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(manifest))
+    return str(manifest_path)
+
+
+class TestExecutionOrder:
+    def test_loads_follow_foreign_key_dependencies(self):
+        manifest = {load: [] for load in sut.LOADS}
+
+        stages = sut.execution_order(manifest)
+
+        assert stages == [
+            ["govdepartment"],
+            ["supplychain"],
+            [
+                "countrydata",
+                "scenarioassessments",
+                "stages",
+                "strategicaction",
+                "vulnerabilities",
+            ],
+            ["strategicactionupdate"],
+        ]
+
+    def test_loads_missing_from_manifest_are_not_waited_for(self):
+        manifest = {"strategicaction": [], "stages": []}
+
+        assert sut.execution_order(manifest) == [["stages", "strategicaction"]]
+
+
+class TestIngestAll:
+    def invoke_load(self, *args):
+        with StringIO() as status:
+            call_command("ingest_all", *args, stdout=status, stderr=status)
+            return status.getvalue()
+
+    def test_ingests_all_models_in_order(self, tmp_path):
+        manifest_path = write_manifest(
+            tmp_path,
+            {
+                "strategicactionupdate": os.path.join(
+                    DATA_FILES_LOC, "action_update_sample.csv"
+                ),
+                "strategicaction": os.path.join(
+                    DATA_FILES_LOC, "strat_action_sample.csv"
+                ),
+                "supplychain": os.path.join(DATA_FILES_LOC, "supply_chain_sample.csv"),
+                "govdepartment": os.path.join(DATA_FILES_LOC, "accounts_sample.csv"),
+            },
+        )
+
+        res = self.invoke_load(manifest_path, "--jobs", "1")
+
+        assert "Successfully ingested" in res
+        assert GovDepartment.objects.count() == 8
+        assert SupplyChain.objects.exists()
+        assert StrategicAction.objects.exists()
+        assert StrategicActionUpdate.objects.exists()
+
+    def test_counters_are_reconciled_after_every_load(self, tmp_path):
+        manifest_path = write_manifest(
+            tmp_path,
+            {
+                "strategicaction": os.path.join(
+                    DATA_FILES_LOC, "strat_action_sample.csv"
+                ),
+                "supplychain": os.path.join(DATA_FILES_LOC, "supply_chain_sample.csv"),
+                "govdepartment": os.path.join(DATA_FILES_LOC, "accounts_sample.csv"),
+            },
+        )
+
+        res = self.invoke_load(manifest_path, "--jobs", "1")
+
+        assert res.count("Counters reconciled") == 1
+        medicines = SupplyChain.objects.get(name="Medicines")
+        assert medicines.active_strategic_action_count == (
+            medicines.strategic_actions.filter(is_archived=False).count()
+        )
+        assert medicines.active_strategic_action_count > 0
+
+    def test_unknown_load_is_rejected(self, tmp_path):
+        manifest_path = write_manifest(tmp_path, {"widgets": "widgets.csv"})
+
+        with pytest.raises(CommandError, match="widgets"):
+            self.invoke_load(manifest_path, "--jobs", "1")
+
+    def test_dependent_loads_are_skipped_after_failure(self, tmp_path):
+        manifest_path = write_manifest(
+            tmp_path,
+            {
+                "govdepartment": os.path.join(DATA_FILES_LOC, "accounts_sample.csv"),
+                "supplychain": "missing.csv",
+                "strategicaction": os.path.join(
+                    DATA_FILES_LOC, "strat_action_sample.csv"
+                ),
+            },
+        )
+
+        with pytest.raises(CommandError, match="strategicaction"):
+            self.invoke_load(manifest_path, "--jobs", "1")
+
+        assert GovDepartment.objects.count() == 8
+        assert not StrategicAction.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestIngestAllInPool:
+    """Pool workers have their own connections, so they only see committed rows
+
+    The flush after a transactional test also removes the DIT department a migration adds.
+    """
+
+    def invoke_load(self, *args):
+        with StringIO() as status:
+            call_command("ingest_all", *args, "--jobs", "2", stdout=status)
+            return status.getvalue()
+
+    def test_ingests_all_models_in_order(self, tmp_path):
+        manifest_path = write_manifest(
+            tmp_path,
+            {
+                "strategicactionupdate": os.path.join(
+                    DATA_FILES_LOC, "action_update_sample.csv"
+                ),
+                "strategicaction": os.path.join(
+                    DATA_FILES_LOC, "strat_action_sample.csv"
+                ),
+                "supplychain": os.path.join(DATA_FILES_LOC, "supply_chain_sample.csv"),
+                "govdepartment": os.path.join(DATA_FILES_LOC, "accounts_sample.csv"),
+            },
+        )
+
+        res = self.invoke_load(manifest_path)
+
+        assert "Successfully ingested" in res
+        assert GovDepartment.objects.exclude(name="DIT").count() == 7
+        assert SupplyChain.objects.exists()
+        assert StrategicAction.objects.exists()
+        assert StrategicActionUpdate.objects.exists()
+
+    def test_dependent_loads_are_skipped_after_failure(self, tmp_path):
+        manifest_path = write_manifest(
+            tmp_path,
+            {
+                "govdepartment": os.path.join(DATA_FILES_LOC, "accounts_sample.csv"),
+                "supplychain": "missing.csv",
+                "strategicaction": os.path.join(
+                    DATA_FILES_LOC, "strat_action_sample.csv"
+                ),
+                "stages": "missing.csv",
+            },
+        )
+
+        with pytest.raises(CommandError) as error:
+            self.invoke_load(manifest_path)
+
+        assert str(error.value) == (
+            "Failed to ingest ['stages', 'strategicaction', 'supplychain']"
+        )
+        assert GovDepartment.objects.exclude(name="DIT").count() == 7
+        assert not StrategicAction.objects.exists()
+
+    def test_loads_depending_on_a_skipped_load_are_skipped(self, tmp_path):
+        manifest_path = write_manifest(
+            tmp_path,
+            {
+                "govdepartment": "missing.csv",
+                "supplychain": os.path.join(DATA_FILES_LOC, "supply_chain_sample.csv"),
+                "strategicaction": os.path.join(
+                    DATA_FILES_LOC, "strat_action_sample.csv"
+                ),
+                "strategicactionupdate": os.path.join(
+                    DATA_FILES_LOC, "action_update_sample.csv"
+                ),
+            },
+        )
+
+        with pytest.raises(CommandError) as error:
+            self.invoke_load(manifest_path)
+
+        assert str(error.value) == (
+            "Failed to ingest ['govdepartment', 'strategicaction', "
+            "'strategicactionupdate', 'supplychain']"
+        )
+        assert not SupplyChain.objects.exists()
@@ -0,0 +1,80 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from supply_chains.models import Country, CountryDependency
+from supply_chains.test.data import country_dependencies
+from supply_chains.test.factories import SupplyChainFactory
+
+pytestmark = pytest.mark.django_db
+
+DependencyLevel = CountryDependency.DependencyLevel
+
+
+@mock.patch(
+    "supply_chains.management.commands.ingestcountrydata.open",
+    mock.mock_open(read_data=country_dependencies.country_dependencies_csv),
+)
+class TestIngestCountryData:
+    def call_command(self):
+        command_output = StringIO()
+        call_command(
+            "ingestcountrydata",
+            "no_value_needed_due_to_mock_open",
+            stdout=command_output,
+        )
+        return command_output.getvalue()
+
+    def test_countries_are_created_once(self):
+        Country.objects.create(name="France")
+        self.call_command()
+        assert sorted(Country.objects.values_list("name", flat=True)) == [
+            "France",
+            "Germany",
+            "Japan",
+        ]
+
+    def test_matrix_is_pivoted_to_dependencies(self):
+        supply_chain_one = SupplyChainFactory(name="Supply Chain One")
+        supply_chain_two = SupplyChainFactory(name="Supply Chain Two")
+        output = self.call_command()
+
+        assert "Supply chains found: 2" in output
+        assert "Dependencies ingested: 6" in output
+        levels = {
+            (
+                dependency.supply_chain,
+                dependency.country.name,
+            ): dependency.dependency_level
+            for dependency in CountryDependency.objects.select_related("country")
+        }
+        assert levels == {
+            (supply_chain_one, "France"): DependencyLevel.HIGH,
+            (supply_chain_one, "Germany"): DependencyLevel.NONE,
+            (supply_chain_one, "Japan"): DependencyLevel.VERY_HIGH,
+            (supply_chain_two, "France"): DependencyLevel.LOW,
+            (supply_chain_two, "Germany"): DependencyLevel.MEDIUM,
+            (supply_chain_two, "Japan"): DependencyLevel.NONE,
+        }
+
+    def test_unrecognised_supply_chains_are_reported(self):
+        SupplyChainFactory(name="Supply Chain One")
+        output = self.call_command()
+        assert "Unrecognised supply chains: 2" in output
+        assert "Unknown Supply Chain" in output
+
+    def test_reimport_does_not_duplicate_dependencies(self):
+        SupplyChainFactory(name="Supply Chain One")
+        self.call_command()
+        self.call_command()
+        assert CountryDependency.objects.count() == 3
+
+    def test_query_count_does_not_grow_with_matrix_size(
+        self, django_assert_max_num_queries
+    ):
+        SupplyChainFactory(name="Supply Chain One")
+        SupplyChainFactory(name="Supply Chain Two")
+        with django_assert_max_num_queries(8):
+            self.call_command()
@@ -1,14 +1,22 @@
 from io import StringIO
 import re
 import os
+from unittest import mock
 
 import pytest
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.db.models import Count, Q
 
 from supply_chains.management.commands import ingest_csv as sut
 from accounts.models import GovDepartment
-from supply_chains.models import StrategicAction, StrategicActionUpdate, SupplyChain
+from supply_chains.models import (
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+    IngestedFile,
+    IngestedRow,
+)
 
 
 pytestmark = pytest.mark.django_db
@@ -101,6 +109,29 @@ class TestDataLoader:
             == 4
         )
 
+    def test_counters_match_the_ingested_data(self):
+        for model, csv_file in [
+            (sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE),
+            (sut.MODEL_SUPPLY_CHAIN, self.SC_FILE),
+            (sut.MODEL_STRAT_ACTION, self.SA_FILE),
+        ]:
+            self.invoke_load(model, csv_file)
+
+        counts = active_strategic_action_counts()
+        assert counts["Medicines"][1] > 0
+        for counter, count in counts.values():
+            assert counter == count
+
+    def test_counters_are_left_to_the_caller_with_no_reconcile(self):
+        for model, csv_file in [
+            (sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE),
+            (sut.MODEL_SUPPLY_CHAIN, self.SC_FILE),
+            (sut.MODEL_STRAT_ACTION, self.SA_FILE),
+        ]:
+            self.invoke_load("--no-reconcile", model, csv_file)
+
+        assert active_strategic_action_counts()["Medicines"][0] == 0
+
     def test_load_sau_data(self):
         # Arrange
         self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
@@ -114,3 +145,87 @@ class TestDataLoader:
         assert re.match(f".*(Successfully) .* {sut.MODEL_STRAT_ACTION_UPDATE}.*", res)
         assert StrategicActionUpdate.objects.count() == 4
         assert StrategicActionUpdate.objects.filter(status="submitted").count() == 4
+
+
+def active_strategic_action_counts():
+    """Each supply chain's counter and the count it should hold, by supply chain name"""
+    return {
+        supply_chain.name: (
+            supply_chain.active_strategic_action_count,
+            supply_chain.active_strategic_actions,
+        )
+        for supply_chain in SupplyChain.objects.annotate(
+            active_strategic_actions=Count(
+                "strategic_actions", filter=Q(strategic_actions__is_archived=False)
+            )
+        )
+    }
+
+
+class TestIncrementalDataLoader:
+    LOAD_CMD = "ingest_csv"
+    ACCOUNTS_FILE = os.path.join(DATA_FILES_LOC, "accounts_sample.csv")
+    SC_FILE = os.path.join(DATA_FILES_LOC, "supply_chain_sample.csv")
+
+    def invoke_load(self, *args):
+        with StringIO() as status:
+            call_command(
+                self.LOAD_CMD, *args, "--incremental", stdout=status, stderr=status
+            )
+            return status.getvalue()
+
+    def test_load_accounts_data(self):
+        res = self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
+
+        assert "Successfully ingested 7 changed rows of 7" in res
+        assert GovDepartment.objects.count() == 8
+        assert IngestedRow.objects.filter(model=sut.MODEL_GOV_DEPT).count() == 7
+        assert IngestedFile.objects.get().completed
+
+    def test_unchanged_file_is_skipped(self, django_assert_max_num_queries):
+        self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
+
+        with django_assert_max_num_queries(1):
+            res = self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
+
+        assert "file unchanged" in res
+
+    def test_only_changed_rows_are_applied(self, tmp_path):
+        self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
+        self.invoke_load(sut.MODEL_SUPPLY_CHAIN, self.SC_FILE)
+        with open(self.SC_FILE) as f:
+            lines = f.readlines()
+        lines[1] = lines[1].replace("Medicines", "Renamed medicines", 1)
+        changed_file = tmp_path / "supply_chain_sample.csv"
+        changed_file.write_text("".join(lines))
+
+        res = self.invoke_load(sut.MODEL_SUPPLY_CHAIN, str(changed_file))
+
+        assert "Successfully ingested 1 changed rows of 3" in res
+        assert SupplyChain.objects.count() == 3
+        assert SupplyChain.objects.filter(name__startswith="Renamed").count() == 1
+
+    def test_failed_load_resumes_from_last_batch(self, monkeypatch):
+        monkeypatch.setattr(sut.Command, "BATCH_SIZE", 3)
+        existing_departments = GovDepartment.objects.count()
+        load_rows = sut.Command._load_rows
+        calls = []
+
+        def fail_on_second_batch(command, model, rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError("Connection lost")
+            return load_rows(command, model, rows)
+
+        with mock.patch.object(sut.Command, "_load_rows", fail_on_second_batch):
+            with pytest.raises(RuntimeError):
+                self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
+
+        # the first batch stays committed rather than everything being deleted
+        assert GovDepartment.objects.count() == existing_departments + 3
+        assert IngestedRow.objects.count() == 3
+
+        res = self.invoke_load(sut.MODEL_GOV_DEPT, self.ACCOUNTS_FILE)
+
+        assert "Successfully ingested 4 changed rows of 7" in res
+        assert GovDepartment.objects.count() == existing_departments + 7
@@ -1,3 +1,4 @@
+import json
 from io import StringIO
 from unittest import mock
 
@@ -111,3 +112,138 @@ class TestIngestScenarioAssessment:
         assert "Unrecognised supply chains: 2" in output
         assert "Supply Chain One" in output
         assert "Supply Chain Two" in output
+
+
+class TestBulkIngestScenarioAssessment:
+    @mock.patch(
+        "supply_chains.management.commands.ingestscenarioassessments.open",
+        mock.mock_open(
+            read_data=scenario_assessments.two_full_scenario_assessments_csv
+        ),
+    )
+    def test_bulk_import_creates_scenario_assessments(self):
+        supply_chain_one: SupplyChain = SupplyChainFactory(name="Supply Chain One")
+        supply_chain_two: SupplyChain = SupplyChainFactory(name="Supply Chain Two")
+        command_output = StringIO()
+        call_command(
+            "ingestscenarioassessments",
+            "no_value_needed_due_to_mock_open",
+            "--bulk",
+            stdout=command_output,
+        )
+
+        assert "created: 2, updated: 0" in command_output.getvalue()
+        scenario_assessment_one = ScenarioAssessment.objects.get(
+            supply_chain=supply_chain_one
+        )
+        assert (
+            scenario_assessment_one.ports_blocked_rag_rating == NullableRAGRating.NONE
+        )
+        assert scenario_assessment_one.labour_shortage_is_critical == False
+        scenario_assessment_two = ScenarioAssessment.objects.get(
+            supply_chain=supply_chain_two
+        )
+        assert scenario_assessment_two.labour_shortage_is_critical == True
+        assert (
+            scenario_assessment_two.demand_spike_critical_scenario
+            == "Two demand spike critical scenario"
+        )
+
+    @mock.patch(
+        "supply_chains.management.commands.ingestscenarioassessments.open",
+        mock.mock_open(
+            read_data=scenario_assessments.two_full_scenario_assessments_csv
+        ),
+    )
+    def test_bulk_import_updates_existing_scenario_assessments(self):
+        supply_chain_one: SupplyChain = SupplyChainFactory(name="Supply Chain One")
+        SupplyChainFactory(name="Supply Chain Two")
+        ScenarioAssessment.objects.create(
+            supply_chain=supply_chain_one,
+            storage_full_impact="Out of date implication",
+        )
+        command_output = StringIO()
+        call_command(
+            "ingestscenarioassessments",
+            "no_value_needed_due_to_mock_open",
+            "--bulk",
+            stdout=command_output,
+        )
+
+        assert "created: 1, updated: 1" in command_output.getvalue()
+        assert ScenarioAssessment.objects.count() == 2
+        assert (
+            ScenarioAssessment.objects.get(
+                supply_chain=supply_chain_one
+            ).storage_full_impact
+            == "One storage full implication"
+        )
+
+    @mock.patch(
+        "supply_chains.management.commands.ingestscenarioassessments.open",
+        mock.mock_open(
+            read_data=scenario_assessments.two_full_scenario_assessments_csv
+        ),
+    )
+    def test_bulk_import_query_count_does_not_grow_with_rows(
+        self, django_assert_max_num_queries
+    ):
+        SupplyChainFactory(name="Supply Chain One")
+        SupplyChainFactory(name="Supply Chain Two")
+        # supply chains, existing assessments, the insert and the revision bookkeeping
+        with django_assert_max_num_queries(12):
+            call_command(
+                "ingestscenarioassessments",
+                "no_value_needed_due_to_mock_open",
+                "--bulk",
+                stdout=StringIO(),
+            )
+
+    def test_bulk_import_writes_nothing_when_rows_are_invalid(self, tmp_path):
+        SupplyChainFactory(name="Supply Chain One")
+        SupplyChainFactory(name="Supply Chain Two")
+        invalid_csv = scenario_assessments.two_full_scenario_assessments_csv.replace(
+            "storage full,red", "storage full,purple"
+        ).replace("demand spike,amber", "demand surge,amber")
+        report_path = tmp_path / "report.json"
+        source_path = tmp_path / "assessments.csv"
+        source_path.write_text(invalid_csv)
+
+        with pytest.raises(CommandError):
+            call_command(
+                "ingestscenarioassessments",
+                str(source_path),
+                "--bulk",
+                "--report",
+                str(report_path),
+                stdout=StringIO(),
+            )
+
+        assert ScenarioAssessment.objects.count() == 0
+        report = json.loads(report_path.read_text())
+        assert [error["supply_chain_name"] for error in report["errors"]] == [
+            "Supply Chain One",
+            "Supply Chain Two",
+        ]
+        assert "purple" in report["errors"][0]["message"]
+        assert "demand surge" in report["errors"][1]["message"]
+
+    @mock.patch(
+        "supply_chains.management.commands.ingestscenarioassessments.open",
+        mock.mock_open(
+            read_data=scenario_assessments.two_full_scenario_assessments_csv
+        ),
+    )
+    def test_bulk_import_reports_unrecognised_supply_chains(self):
+        SupplyChainFactory(name="Supply Chain One")
+        command_output = StringIO()
+        call_command(
+            "ingestscenarioassessments",
+            "no_value_needed_due_to_mock_open",
+            "--bulk",
+            stdout=command_output,
+        )
+        assert (
+            "Unrecognised supply chain: Supply Chain Two" in command_output.getvalue()
+        )
+        assert ScenarioAssessment.objects.count() == 1
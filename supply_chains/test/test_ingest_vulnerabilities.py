@@ -0,0 +1,90 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from supply_chains.models import (
+    NullableRAGRating,
+    VulnerabilityAssessment,
+    VulAssessmentMakeStage,
+)
+from supply_chains.test.factories import SupplyChainFactory
+
+pytestmark = pytest.mark.django_db
+
+STAGES = ["Supply", "Receive", "Make", "Store", "Deliver"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    def make(*sc_names):
+        vulnerabilities = [
+            {
+                "supply_chain_reporting_name": sc_name,
+                "sc_vulnerability_stage": str(char_id),
+                "vulnerability_stage_rating": "red" if char_id == 7 else "green",
+                "vulnerability_stage_summary": f"Summary {char_id}",
+                "vulnerability_stage_rationale": f"Rationale {char_id}",
+            }
+            for sc_name in sc_names
+            for char_id in range(1, 15)
+        ]
+        overall_rags = [
+            {
+                "supply_chain_reporting_name": sc_name,
+                "sc_stage": stage,
+                "overall_vulnerability_assessement_rating": "amber",
+            }
+            for sc_name in sc_names
+            for stage in STAGES
+        ]
+        return (
+            write_csv(tmp_path / "vulnerabilities.csv", vulnerabilities),
+            write_csv(tmp_path / "overall_rags.csv", overall_rags),
+        )
+
+    yield make
+
+
+class TestIngestVulnerabilities:
+    def call_command(self, *files):
+        command_output = StringIO()
+        call_command("ingest_vulnerabilities", *files, stdout=command_output)
+        return command_output.getvalue()
+
+    def test_stages_and_document_ingested(self, data_files):
+        sc = SupplyChainFactory(name="Supply Chain One")
+
+        output = self.call_command(*data_files(sc.name))
+
+        assert "Vulnerability data for 1 supply chains ingested" in output
+        vul = VulnerabilityAssessment.objects.get(supply_chain=sc)
+        make = VulAssessmentMakeStage.objects.get(vulnerability=vul)
+        assert make.make_stage_rag_rating == NullableRAGRating.AMBER
+        assert make.make_rag_rating_7 == NullableRAGRating.RED
+        assert make.make_stage_summary_10 == "Summary 10"
+        assert set(vul.stage_document) == {stage.lower() for stage in STAGES}
+        assert vul.stage("make").make_stage_rationale_8 == "Rationale 8"
+        assert vul.stage_document["make"] == make.to_document()
+
+    def test_query_count_does_not_grow_with_supply_chains(
+        self, data_files, django_assert_max_num_queries
+    ):
+        names = [SupplyChainFactory().name for _ in range(3)]
+        files = data_files(*names)
+
+        # the supply chains read, the assessments and each stage model inserted
+        # once, plus the savepoint
+        with django_assert_max_num_queries(9):
+            self.call_command(*files)
+
+        assert VulnerabilityAssessment.objects.count() == 3
@@ -267,3 +267,51 @@ class TestVulAssessmentModel:
             receive.save()
 
         assert VulAssessmentReceiveStage.objects.count() == 0
+
+    def test_stage_document_follows_stage_saves(self):
+        vul_obj = VulnerabilityAssessmentFactory.create()
+        supply = VulAssessmentSupplyStageFactory.create(vulnerability=vul_obj)
+        VulAssessmentDeliverStageFactory.create(vulnerability=vul_obj)
+
+        supply.supply_stage_summary_2 = "Changed summary"
+        supply.save()
+
+        vul_obj.refresh_from_db()
+        assert set(vul_obj.stage_document) == {"supply", "deliver"}
+        assert vul_obj.stage("supply").supply_stage_summary_2 == "Changed summary"
+        assert vul_obj.stage("supply").supply_rag_rating_1 == supply.supply_rag_rating_1
+        assert vul_obj.stage("make") is None
+
+    def test_saving_the_assessment_keeps_the_stage_document(self):
+        vul_obj = VulnerabilityAssessmentFactory.create()
+        stale = VulnerabilityAssessment.objects.get(pk=vul_obj.pk)
+        VulAssessmentSupplyStageFactory.create(vulnerability=vul_obj)
+
+        stale.gsc_last_changed_by = "Someone else"
+        stale.save()
+
+        vul_obj.refresh_from_db()
+        assert vul_obj.gsc_last_changed_by == "Someone else"
+        assert set(vul_obj.stage_document) == {"supply"}
+
+    def test_stage_document_follows_stage_deletes(self):
+        vul_obj = VulnerabilityAssessmentFactory.create()
+        supply = VulAssessmentSupplyStageFactory.create(vulnerability=vul_obj)
+        VulAssessmentDeliverStageFactory.create(vulnerability=vul_obj)
+
+        supply.delete()
+
+        vul_obj.refresh_from_db()
+        assert set(vul_obj.stage_document) == {"deliver"}
+
+    def test_refresh_stage_documents(self, django_assert_num_queries):
+        vul_obj = VulnerabilityAssessmentFactory.create()
+        make = VulAssessmentMakeStageFactory.create(vulnerability=vul_obj)
+        VulnerabilityAssessment.objects.update(stage_document={})
+
+        with django_assert_num_queries(2):
+            refreshed = VulnerabilityAssessment.objects.refresh_stage_documents()
+
+        vul_obj.refresh_from_db()
+        assert refreshed == 1
+        assert vul_obj.stage_document == {"make": make.to_document()}
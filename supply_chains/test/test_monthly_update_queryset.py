@@ -19,6 +19,7 @@ def test_last_monthly_update():
     march_strategic_action_update: StrategicActionUpdate = StrategicActionUpdateFactory(
         strategic_action=strategic_action,
         supply_chain=strategic_action.supply_chain,
+        date_created=date(year=2021, month=3, day=31),
         submission_date=date(year=2021, month=3, day=31),
         status=StrategicActionUpdate.Status.SUBMITTED,
     )
@@ -26,6 +27,7 @@ def test_last_monthly_update():
         StrategicActionUpdateFactory(
             strategic_action=strategic_action,
             supply_chain=strategic_action.supply_chain,
+            date_created=date(year=2021, month=2, day=17),
             submission_date=date(year=2021, month=2, day=17),
             status=StrategicActionUpdate.Status.SUBMITTED,
         )
@@ -34,6 +36,7 @@ def test_last_monthly_update():
         StrategicActionUpdateFactory(
             strategic_action=strategic_action,
             supply_chain=strategic_action.supply_chain,
+            date_created=date(year=2021, month=1, day=1),
             submission_date=date(year=2021, month=1, day=1),
             status=StrategicActionUpdate.Status.SUBMITTED,
         )
@@ -42,3 +45,55 @@ def test_last_monthly_update():
     assert (
         last_submitted.submission_date == march_strategic_action_update.submission_date
     )
+
+
+@pytest.mark.django_db()
+def test_since_a_deadline_uses_reporting_periods():
+    strategic_action = StrategicActionFactory()
+    for day in [date(2021, 5, 28), date(2021, 6, 30), date(2021, 7, 1)]:
+        StrategicActionUpdateFactory(
+            strategic_action=strategic_action,
+            supply_chain=strategic_action.supply_chain,
+            date_created=day,
+        )
+    # the last working day of June 2021
+    updates = StrategicActionUpdate.objects.since(date(2021, 6, 30))
+
+    assert "reporting_period" in str(updates.query)
+    assert [update.date_created for update in updates] == [date(2021, 7, 1)]
+
+
+@pytest.mark.django_db()
+def test_since_any_other_day_uses_date_created():
+    for day in [date(2021, 6, 14), date(2021, 6, 15), date(2021, 7, 1)]:
+        strategic_action = StrategicActionFactory()
+        StrategicActionUpdateFactory(
+            strategic_action=strategic_action,
+            supply_chain=strategic_action.supply_chain,
+            date_created=day,
+        )
+
+    updates = StrategicActionUpdate.objects.since(date(2021, 6, 14)).order_by(
+        "date_created"
+    )
+
+    assert [update.date_created for update in updates] == [
+        date(2021, 6, 15),
+        date(2021, 7, 1),
+    ]
+
+
+@pytest.mark.django_db()
+def test_given_month_is_the_reporting_period():
+    strategic_action = StrategicActionFactory()
+    for day in [date(2021, 4, 30), date(2021, 5, 28), date(2021, 5, 31)]:
+        StrategicActionUpdateFactory(
+            strategic_action=strategic_action,
+            supply_chain=strategic_action.supply_chain,
+            date_created=day,
+        )
+
+    # 31 May 2021 was a bank holiday, so it is in June's round
+    updates = StrategicActionUpdate.objects.given_month(date(2021, 5, 17))
+
+    assert [update.date_created for update in updates] == [date(2021, 5, 28)]
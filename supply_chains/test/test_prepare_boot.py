@@ -0,0 +1,94 @@
+import os
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from config import boot
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def static_settings(settings, tmp_path):
+    source = tmp_path / "assets"
+    source.mkdir()
+    (source / "main.js").write_text("console.log('hello')")
+    settings.STATICFILES_DIRS = [str(source)]
+    settings.STATICFILES_FINDERS = [
+        "django.contrib.staticfiles.finders.FileSystemFinder"
+    ]
+    settings.STATIC_ROOT = str(tmp_path / "static")
+    yield source
+
+
+def fake_call_command(name, **options):
+    if name == "collectstatic":
+        # stands in for the manifest the storage writes
+        os.makedirs(settings.STATIC_ROOT, exist_ok=True)
+        manifest_path = os.path.join(settings.STATIC_ROOT, boot.STATIC_MANIFEST_FILE)
+        with open(manifest_path, "w") as manifest:
+            manifest.write("{}")
+
+
+def prepare_boot(*args):
+    with mock.patch(
+        "supply_chains.management.commands.prepare_boot.call_command",
+        side_effect=fake_call_command,
+    ) as called, StringIO() as status:
+        call_command("prepare_boot", *args, stdout=status)
+        return [call.args[0] for call in called.call_args_list], status.getvalue()
+
+
+class TestPrepareBoot:
+    def test_collects_static_files_first_time(self, static_settings):
+        commands, res = prepare_boot()
+
+        assert commands == ["createcachetable", "collectstatic"]
+        assert "Migrations are up to date, skipping migrate" in res
+        assert "Collecting static files" in res
+
+    def test_skips_everything_when_nothing_changed(self, static_settings):
+        prepare_boot()
+
+        commands, res = prepare_boot()
+
+        assert commands == ["createcachetable"]
+        assert "Static files are up to date, skipping collectstatic" in res
+
+    def test_collects_static_files_when_they_change(self, static_settings):
+        prepare_boot()
+        (static_settings / "main.js").write_text("console.log('changed')")
+
+        commands, _ = prepare_boot()
+
+        assert commands == ["createcachetable", "collectstatic"]
+
+    def test_migrates_when_a_migration_is_unapplied(self, static_settings):
+        on_disk = boot.migrations_on_disk() | {("supply_chains", "9999_new")}
+        with mock.patch("config.boot.migrations_on_disk", return_value=on_disk):
+            commands, res = prepare_boot()
+
+        assert commands[0] == "migrate"
+        assert "Applying 1 migrations" in res
+
+    def test_force_runs_everything(self, static_settings):
+        prepare_boot()
+
+        commands, _ = prepare_boot("--force")
+
+        assert commands == ["migrate", "createcachetable", "collectstatic"]
+
+
+class TestBoot:
+    def test_every_migration_on_disk_is_applied(self):
+        assert ("supply_chains", "0001_initial") in boot.migrations_on_disk()
+        assert boot.unapplied_migrations() == []
+
+    def test_warm_up_closes_connections(self):
+        with mock.patch("config.boot.connections") as connections:
+            boot.warm_up()
+
+        connections.close_all.assert_called_once_with()
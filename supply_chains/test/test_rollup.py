@@ -0,0 +1,448 @@
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.test.factories import UserFactory
+from supply_chains.models import (
+    MonthlySupplyChainSummary,
+    NullableRAGRating,
+    RAGRating,
+    StrategicActionUpdate,
+    SupplyChainCriticality,
+)
+from supply_chains.rollup import refresh_summaries
+from supply_chains.submission import submit_monthly_updates
+from supply_chains.test.factories import (
+    StrategicActionFactory,
+    StrategicActionUpdateFactory,
+    SupplyChainFactory,
+    VulAssessmentSupplyStageFactory,
+    VulnerabilityAssessmentFactory,
+)
+from supply_chains.utils import (
+    get_last_working_day_of_previous_month,
+    get_reporting_period,
+)
+
+pytestmark = pytest.mark.django_db
+Status = StrategicActionUpdate.Status
+
+
+def committing():
+    """Run on-commit callbacks at the end of the block, as the test's transaction never commits"""
+    return TestCase.captureOnCommitCallbacks(execute=True)
+
+
+def submitted_update(supply_chain, rating, **kwargs):
+    return StrategicActionUpdateFactory(
+        status=Status.SUBMITTED,
+        implementation_rag_rating=rating,
+        strategic_action=StrategicActionFactory(supply_chain=supply_chain),
+        supply_chain=supply_chain,
+        **kwargs,
+    )
+
+
+class TestRefreshSummaries:
+    def setup_method(self):
+        self.period = get_reporting_period(date.today())
+        self.supply_chain = SupplyChainFactory(vulnerability_status=RAGRating.RED)
+
+    def test_denormalises_ratings(self):
+        SupplyChainCriticality.objects.create(supply_chain=self.supply_chain, rating=4)
+        VulAssessmentSupplyStageFactory(
+            supply_stage_rag_rating=NullableRAGRating.AMBER,
+            vulnerability=VulnerabilityAssessmentFactory(
+                supply_chain=self.supply_chain
+            ),
+        )
+
+        assert refresh_summaries([self.supply_chain.pk], self.period) == 1
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=self.supply_chain)
+        assert summary.period == self.period
+        assert summary.gov_department == self.supply_chain.gov_department
+        assert summary.vulnerability_status == RAGRating.RED
+        assert summary.criticality_rating == 4
+        assert summary.maturity_rating is None
+        assert summary.supply_stage_rag_rating == NullableRAGRating.AMBER
+        assert summary.deliver_stage_rag_rating is None
+
+    def test_counts_actions_and_submitted_updates(self):
+        for rating in [RAGRating.RED, RAGRating.RED, RAGRating.GREEN]:
+            submitted_update(self.supply_chain, rating)
+        StrategicActionUpdateFactory(
+            status=Status.IN_PROGRESS,
+            strategic_action=StrategicActionFactory(supply_chain=self.supply_chain),
+            supply_chain=self.supply_chain,
+        )
+        due_date = date.today() - timedelta(days=1)
+        StrategicActionFactory(
+            supply_chain=self.supply_chain,
+            is_ongoing=False,
+            target_completion_date=due_date,
+        )
+        StrategicActionFactory(
+            supply_chain=self.supply_chain,
+            is_archived=True,
+            archived_reason="Done",
+        )
+
+        refresh_summaries([self.supply_chain.pk], self.period)
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=self.supply_chain)
+        assert summary.strategic_action_count == 5
+        assert due_date in summary.strategic_action_due_dates
+        # the factories' actions are due on random dates
+        assert summary.overdue_strategic_action_count() == (
+            summary.overdue_strategic_action_count(due_date)
+            + summary.strategic_action_due_dates.count(due_date)
+        )
+        assert summary.submitted_update_count == 3
+        assert summary.red_update_count == 2
+        assert summary.amber_update_count == 0
+        assert summary.green_update_count == 1
+
+    def test_only_counts_updates_in_the_period(self):
+        submitted_update(self.supply_chain, RAGRating.RED)
+        submitted_update(
+            self.supply_chain,
+            RAGRating.GREEN,
+            date_created=self.period - relativedelta(months=2),
+        )
+
+        refresh_summaries([self.supply_chain.pk], self.period)
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=self.supply_chain)
+        assert summary.submitted_update_count == 1
+        assert summary.red_update_count == 1
+
+    def test_replaces_existing_summary(self):
+        refresh_summaries([self.supply_chain.pk], self.period)
+        submitted_update(self.supply_chain, RAGRating.AMBER)
+
+        refresh_summaries([self.supply_chain.pk], self.period)
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=self.supply_chain)
+        assert summary.amber_update_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_writes_over_a_summary_inserted_by_a_concurrent_refresh(self):
+        submitted_update(self.supply_chain, RAGRating.RED)
+        inserted, committed = threading.Event(), threading.Event()
+
+        def concurrent_refresh():
+            try:
+                with transaction.atomic():
+                    MonthlySupplyChainSummary.objects.create(
+                        supply_chain=self.supply_chain,
+                        gov_department=self.supply_chain.gov_department,
+                        period=self.period,
+                    )
+                    inserted.set()
+                    # long enough for the refresh below to try its insert
+                    committed.wait(0.5)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=concurrent_refresh)
+        thread.start()
+        inserted.wait()
+        MonthlySupplyChainSummary.objects.all().delete()
+
+        refresh_summaries([self.supply_chain.pk], self.period)
+        committed.set()
+        thread.join()
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=self.supply_chain)
+        assert summary.red_update_count == 1
+
+    def test_query_count_does_not_grow_with_supply_chains(
+        self, django_assert_num_queries
+    ):
+        supply_chains = SupplyChainFactory.create_batch(5)
+        for supply_chain in supply_chains:
+            submitted_update(supply_chain, RAGRating.GREEN)
+
+        # chains, actions, updates, savepoint, insert, existing summaries locked, release
+        with django_assert_num_queries(7):
+            refresh_summaries([sc.pk for sc in supply_chains], self.period)
+
+        assert MonthlySupplyChainSummary.objects.count() == 5
+
+
+class TestIncrementalRefresh:
+    def test_saving_an_update_refreshes_its_summary_on_commit(self):
+        supply_chain = SupplyChainFactory()
+
+        with committing():
+            submitted_update(supply_chain, RAGRating.RED)
+            assert not MonthlySupplyChainSummary.objects.exists()
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=supply_chain)
+        assert summary.red_update_count == 1
+
+    def test_saving_a_stage_refreshes_its_supply_chain(self):
+        supply_chain = SupplyChainFactory()
+
+        with committing():
+            VulAssessmentSupplyStageFactory(
+                supply_stage_rag_rating=NullableRAGRating.GREEN,
+                vulnerability=VulnerabilityAssessmentFactory(supply_chain=supply_chain),
+            )
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=supply_chain)
+        assert summary.supply_stage_rag_rating == NullableRAGRating.GREEN
+
+    def test_saving_a_stage_doesnt_look_up_its_supply_chain(self):
+        stage = VulAssessmentSupplyStageFactory()
+        stage = type(stage).objects.get(pk=stage.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            stage.save()
+
+        assert not [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+        ]
+
+    def test_changes_are_refreshed_together(self):
+        supply_chains = SupplyChainFactory.create_batch(3)
+        strategic_actions = [
+            StrategicActionFactory(supply_chain=supply_chain)
+            for supply_chain in supply_chains
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            with committing():
+                for strategic_action in strategic_actions:
+                    strategic_action.save()
+
+        summary_inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith(
+                'INSERT INTO "supply_chains_monthlysupplychainsummary"'
+            )
+        ]
+        assert len(summary_inserts) == 1
+        assert MonthlySupplyChainSummary.objects.count() == 3
+
+    def test_bulk_submission_refreshes_summaries(self):
+        supply_chain = SupplyChainFactory()
+        StrategicActionUpdateFactory(
+            status=Status.READY_TO_SUBMIT,
+            implementation_rag_rating=RAGRating.GREEN,
+            strategic_action=StrategicActionFactory(supply_chain=supply_chain),
+            supply_chain=supply_chain,
+        )
+
+        with committing():
+            submit_monthly_updates(
+                [supply_chain], get_last_working_day_of_previous_month()
+            )
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=supply_chain)
+        assert summary.green_update_count == 1
+
+    def test_moving_a_strategic_action_refreshes_both_supply_chains(self):
+        old, new = SupplyChainFactory.create_batch(2)
+        with committing():
+            strategic_action = StrategicActionFactory(supply_chain=old)
+
+        with committing():
+            strategic_action.supply_chain = new
+            strategic_action.save()
+
+        assert (
+            MonthlySupplyChainSummary.objects.get(
+                supply_chain=old
+            ).strategic_action_count
+            == 0
+        )
+        assert (
+            MonthlySupplyChainSummary.objects.get(
+                supply_chain=new
+            ).strategic_action_count
+            == 1
+        )
+
+    def test_a_rolled_back_savepoint_keeps_earlier_changes_stale(self):
+        kept, rolled_back = SupplyChainFactory.create_batch(2)
+
+        with committing():
+            StrategicActionFactory(supply_chain=kept)
+            try:
+                with transaction.atomic():
+                    StrategicActionFactory(supply_chain=rolled_back)
+                    raise ValueError
+            except ValueError:
+                pass
+
+        summary = MonthlySupplyChainSummary.objects.get(supply_chain=kept)
+        assert summary.strategic_action_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_a_rolled_back_transaction_leaves_nothing_stale(self):
+        rolled_back, committed = SupplyChainFactory.create_batch(2)
+        with pytest.raises(ValueError), transaction.atomic():
+            StrategicActionFactory(supply_chain=rolled_back)
+            raise ValueError
+
+        with mock.patch(
+            "supply_chains.rollup.refresh_summaries", wraps=refresh_summaries
+        ) as refresh:
+            with transaction.atomic():
+                StrategicActionFactory(supply_chain=committed)
+
+        (refresh_call,) = refresh.call_args_list
+        assert set(refresh_call.args[0]) == {committed.pk}
+
+
+class TestDepartmentSummary:
+    def test_totals_active_supply_chains_by_department(self):
+        period = get_reporting_period(date.today())
+        red = SupplyChainFactory(vulnerability_status=RAGRating.RED)
+        green = SupplyChainFactory(
+            vulnerability_status=RAGRating.GREEN, gov_department=red.gov_department
+        )
+        archived = SupplyChainFactory(
+            gov_department=red.gov_department,
+            is_archived=True,
+            archived_reason="Gone",
+        )
+        submitted_update(red, RAGRating.RED)
+        refresh_summaries([red.pk, green.pk, archived.pk], period)
+
+        (summary,) = MonthlySupplyChainSummary.objects.department_summary(period)
+
+        assert summary["gov_department"] == red.gov_department.pk
+        assert summary["supply_chains"] == 2
+        assert summary["red_supply_chains"] == 1
+        assert summary["strategic_actions"] == 1
+        assert summary["red_updates"] == 1
+
+    def test_carries_forward_supply_chains_without_a_summary_for_the_period(self):
+        period = get_reporting_period(date.today())
+        earlier = period - relativedelta(months=2)
+        unchanged = SupplyChainFactory(vulnerability_status=RAGRating.RED)
+        changed = SupplyChainFactory(
+            gov_department=unchanged.gov_department,
+            vulnerability_status=RAGRating.GREEN,
+        )
+        submitted_update(unchanged, RAGRating.AMBER, date_created=earlier)
+        refresh_summaries([unchanged.pk], earlier)
+        refresh_summaries([changed.pk], period)
+
+        (summary,) = MonthlySupplyChainSummary.objects.department_summary(period)
+
+        assert summary["supply_chains"] == 2
+        assert summary["red_supply_chains"] == 1
+        assert summary["strategic_actions"] == 1
+        # its update was submitted in an earlier period
+        assert summary["amber_updates"] == 0
+
+    def test_counts_actions_overdue_by_the_period_being_summarised(self):
+        period = get_reporting_period(date.today())
+        earlier = period - relativedelta(months=2)
+        supply_chain = SupplyChainFactory()
+        StrategicActionFactory(
+            supply_chain=supply_chain,
+            is_ongoing=False,
+            target_completion_date=earlier + relativedelta(months=1, days=1),
+        )
+        refresh_summaries([supply_chain.pk], earlier)
+
+        summaries = MonthlySupplyChainSummary.objects
+        (in_earlier,) = summaries.department_summary(earlier)
+        (now,) = summaries.department_summary(period)
+
+        assert in_earlier["overdue_strategic_actions"] == 0
+        assert now["overdue_strategic_actions"] == 1
+
+    def test_leaves_out_supply_chains_summarised_after_the_period(self):
+        period = get_reporting_period(date.today())
+        refresh_summaries([SupplyChainFactory().pk], period)
+
+        assert not MonthlySupplyChainSummary.objects.department_summary(
+            period - relativedelta(months=1)
+        )
+
+
+class TestDepartmentSummaryView:
+    url = "/supply-chains/department-summary/"
+
+    def get(self, user, **params):
+        client = Client()
+        client.force_login(user)
+        return client.get(self.url, params)
+
+    def test_shows_the_users_department(self):
+        user = UserFactory()
+        refresh_summaries(
+            [
+                SupplyChainFactory(gov_department=user.gov_department).pk,
+                SupplyChainFactory().pk,
+            ],
+            date.today(),
+        )
+
+        response = self.get(user)
+
+        assert response.status_code == 200
+        (summary,) = response.context["summaries"]
+        assert summary["gov_department"] == user.gov_department
+        assert summary["supply_chains"] == 1
+        assert response.context["period"] == get_reporting_period(date.today())
+        assert "next_period" not in response.context
+
+    def test_shows_admins_every_department(self):
+        refresh_summaries(
+            [sc.pk for sc in SupplyChainFactory.create_batch(2)], date.today()
+        )
+
+        response = self.get(UserFactory(is_staff=True))
+
+        assert len(response.context["summaries"]) == 2
+
+    def test_shows_the_month_asked_for(self):
+        user = UserFactory()
+        period = get_reporting_period(date.today()) - relativedelta(months=3)
+
+        response = self.get(user, month=period.strftime("%Y-%m"))
+
+        assert response.context["period"] == period
+        assert response.context["next_period"] == period + relativedelta(months=1)
+        assert response.context["summaries"] == []
+
+    def test_needs_a_login(self):
+        response = Client().get(self.url)
+
+        assert response.status_code == 302
+
+
+class TestRefreshCommand:
+    def test_rebuilds_each_month_since(self):
+        SupplyChainFactory.create_batch(2)
+        since = get_reporting_period(date.today()) - relativedelta(months=2)
+
+        with StringIO() as status:
+            call_command(
+                "refresh_monthly_summaries",
+                "--since",
+                since.strftime("%Y-%m"),
+                stdout=status,
+            )
+            res = status.getvalue()
+
+        assert f"{since:%Y-%m}: 2 summaries" in res
+        assert MonthlySupplyChainSummary.objects.count() == 6
@@ -1,9 +1,11 @@
 from datetime import date
+from unittest import mock
 from dateutil.relativedelta import relativedelta
 from typing import Dict, Final
 
 import pytest
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
 
 from supply_chains.test.factories import (
     SupplyChainFactory,
@@ -356,3 +358,108 @@ class TestSAUModel:
             ).count()
             == 1
         )
+
+
+class TestSAUReportingPeriod:
+    def test_reporting_period_set_on_save(self, sau_stub):
+        sau = StrategicActionUpdateFactory(
+            strategic_action=sau_stub["sa"],
+            supply_chain=sau_stub["sc"],
+            date_created=date(2021, 6, 10),
+        )
+
+        sau.refresh_from_db()
+        assert sau.reporting_period == date(2021, 6, 1)
+
+    def test_reporting_period_set_by_bulk_create(self, sau_stub):
+        StrategicActionUpdate.objects.bulk_create(
+            [
+                StrategicActionUpdateFactory.build(
+                    user=sau_stub["user"],
+                    strategic_action=sau_stub["sa"],
+                    supply_chain=sau_stub["sc"],
+                    date_created=date(2021, 6, 10),
+                )
+            ]
+        )
+
+        assert StrategicActionUpdate.objects.get().reporting_period == date(2021, 6, 1)
+
+    def test_database_rejects_second_update_in_period(self, sau_stub):
+        StrategicActionUpdateFactory(
+            strategic_action=sau_stub["sa"],
+            supply_chain=sau_stub["sc"],
+            date_created=date(2021, 6, 3),
+        )
+
+        StrategicActionUpdate.objects.bulk_create(
+            [
+                StrategicActionUpdateFactory.build(
+                    strategic_action=sau_stub["sa"],
+                    supply_chain=sau_stub["sc"],
+                    date_created=date(2021, 6, 20),
+                )
+            ]
+        )
+
+        # the constraint is deferred, so check it as the commit would
+        with pytest.raises(IntegrityError):
+            connection.check_constraints()
+
+    def test_validate_unique_rejects_second_update_in_period(self, sau_stub):
+        StrategicActionUpdateFactory(
+            strategic_action=sau_stub["sa"],
+            supply_chain=sau_stub["sc"],
+            date_created=date(2021, 6, 3),
+        )
+        sau = StrategicActionUpdateFactory.build(
+            strategic_action=sau_stub["sa"],
+            supply_chain=sau_stub["sc"],
+            date_created=date(2021, 6, 20),
+        )
+
+        with pytest.raises(ValidationError):
+            sau.validate_unique()
+
+    def test_validate_unique_skipped_for_unchanged_update(
+        self, sau_stub, django_assert_num_queries
+    ):
+        StrategicActionUpdateFactory(
+            strategic_action=sau_stub["sa"], supply_chain=sau_stub["sc"]
+        )
+        sau = StrategicActionUpdate.objects.get()
+        sau.content = "changed"
+
+        with django_assert_num_queries(0):
+            sau.validate_unique(exclude=["slug"])
+
+    def test_validate_unique_checks_period_once(
+        self, sau_stub, django_assert_num_queries
+    ):
+        sau = StrategicActionUpdateFactory.build(
+            strategic_action=sau_stub["sa"], supply_chain=sau_stub["sc"]
+        )
+        sau.validate_unique(exclude=["id", "slug"])
+
+        with django_assert_num_queries(0):
+            sau.validate_unique(exclude=["id", "slug"])
+
+    def test_clean_result_reused_until_a_field_changes(self, sau_stub):
+        sau = StrategicActionUpdateFactory.build(
+            strategic_action=sau_stub["sa"],
+            supply_chain=sau_stub["sc"],
+            status=Staus.SUBMITTED,
+            submission_date=None,
+        )
+        with mock.patch.object(
+            sau, "_clean_submission", wraps=sau._clean_submission
+        ) as clean_submission:
+            for _ in range(2):
+                with pytest.raises(ValidationError):
+                    sau.clean()
+            assert clean_submission.call_count == 1
+
+            sau.submission_date = date.today()
+            sau.implementation_rag_rating = RAGRating.GREEN
+            sau.clean()
+            assert clean_submission.call_count == 2
@@ -1,40 +1,47 @@
 import pytest
+from django.test import TestCase
 
 pytestmark = pytest.mark.django_db
 
-from reversion.models import Version
-
+from change_log.models import ChangeLogEntry
+from change_log.reader import entries_for
 from supply_chains.models import ScenarioAssessment, NullableRAGRating
 from supply_chains.test.factories import ScenarioAssessmentFactory
 
 
+def committing():
+    """Run on-commit callbacks at the end of the block, as the test's transaction never commits"""
+    return TestCase.captureOnCommitCallbacks(execute=True)
+
+
 class TestScenarioAssessmentVersioning:
-    def test_creation_registered_with_reversion(self):
-        scenario_assessment: ScenarioAssessment = ScenarioAssessmentFactory()
-        version = None
-        try:
-            version = Version.objects.get(object_id=scenario_assessment.pk)
-        except Version.DoesNotExist:
-            pass
-        assert version is not None
-        comment = version.revision.comment
-        assert comment.startswith("Created:")
-        assert comment.endswith(scenario_assessment.supply_chain.name)
-
-    def test_modification_registered_with_reversion(self):
-        scenario_assessment: ScenarioAssessment = ScenarioAssessmentFactory(
-            borders_closed_rag_rating=NullableRAGRating.NONE
-        )
-        versions = None
-        scenario_assessment.borders_closed_rag_rating = NullableRAGRating.AMBER
-        scenario_assessment.save()
-        try:
-            versions = Version.objects.filter(object_id=scenario_assessment.pk)
-        except Version.DoesNotExist:
-            pass
-        assert versions.exists()
-        assert versions.count() == 2
-        latest_version = versions.order_by("revision__date_created").last()
-        comment = latest_version.revision.comment
-        assert comment.startswith("Edited:")
-        assert comment.endswith(scenario_assessment.supply_chain.name)
+    def test_creation_recorded_in_the_change_log(self):
+        with committing():
+            scenario_assessment: ScenarioAssessment = ScenarioAssessmentFactory()
+
+        (entry,) = entries_for(ScenarioAssessment, scenario_assessment.pk)
+        assert entry.action == ChangeLogEntry.Action.CREATE
+        assert entry.changes["supply_chain_id"] == [
+            None,
+            str(scenario_assessment.supply_chain_id),
+        ]
+
+    def test_modification_recorded_in_the_change_log(self, test_user):
+        with committing():
+            scenario_assessment: ScenarioAssessment = ScenarioAssessmentFactory(
+                borders_closed_rag_rating=NullableRAGRating.NONE
+            )
+            scenario_assessment.borders_closed_rag_rating = NullableRAGRating.AMBER
+            scenario_assessment.save(user=test_user)
+
+        entries = entries_for(ScenarioAssessment, scenario_assessment.pk)
+        assert entries.count() == 2
+        latest_entry = entries.last()
+        assert latest_entry.action == ChangeLogEntry.Action.UPDATE
+        assert latest_entry.changes == {
+            "borders_closed_rag_rating": [
+                NullableRAGRating.NONE,
+                NullableRAGRating.AMBER,
+            ]
+        }
+        assert latest_entry.user == test_user
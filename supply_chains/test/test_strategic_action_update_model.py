@@ -2,8 +2,8 @@ from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 
 import pytest
-from reversion.models import Version
 from django.core.exceptions import ValidationError
+from django.test import TestCase
 
 from supply_chains.models import (
     StrategicAction,
@@ -16,10 +16,16 @@ from supply_chains.test.factories import (
     StrategicActionUpdateFactory,
 )
 from accounts.models import GovDepartment
+from change_log.reader import entries_for
 
 pytestmark = pytest.mark.django_db
 
 
+def committing():
+    """Run on-commit callbacks at the end of the block, as the test's transaction never commits"""
+    return TestCase.captureOnCommitCallbacks(execute=True)
+
+
 class TestStrategicActionUpdate:
     def setup_method(self):
         supply_chain: SupplyChain = SupplyChainFactory()
@@ -460,7 +466,7 @@ class TestStrategicActionUpdate:
         )
         assert self.strategic_action_update.strategic_action.is_ongoing is False
 
-    def test_saving_as_submitted_when_strategic_action_changes_from_target_completion_date_to_ongoing_is_recorded_by_reversion(
+    def test_saving_as_submitted_when_strategic_action_changes_from_target_completion_date_to_ongoing_is_recorded_in_the_change_log(
         self,
     ):
         # Guard
@@ -476,19 +482,16 @@ class TestStrategicActionUpdate:
             "test please delete"
         )
         self.strategic_action_update.status = StrategicActionUpdate.Status.SUBMITTED
-        self.strategic_action_update.save()
+        with committing():
+            self.strategic_action_update.save()
 
-        version: Version = (
-            Version.objects.get_for_object(
-                self.strategic_action_update.strategic_action
-            )
-            .order_by("revision__date_created")
-            .last()
-        )
+        entry = entries_for(
+            StrategicAction, self.strategic_action_update.strategic_action.pk
+        ).last()
         expected_message = "TIMING: Becoming 'Ongoing': test please delete"
-        assert version.revision.comment == expected_message
+        assert entry.comment == expected_message
 
-    def test_saving_as_submitted_when_strategic_action_changes_from_ongoing_to_target_completion_is_recorded_by_reversion(
+    def test_saving_as_submitted_when_strategic_action_changes_from_ongoing_to_target_completion_is_recorded_in_the_change_log(
         self,
     ):
         original_date = (
@@ -513,19 +516,16 @@ class TestStrategicActionUpdate:
             "test please delete"
         )
         self.strategic_action_update.status = StrategicActionUpdate.Status.SUBMITTED
-        self.strategic_action_update.save()
+        with committing():
+            self.strategic_action_update.save()
 
-        version: Version = (
-            Version.objects.get_for_object(
-                self.strategic_action_update.strategic_action
-            )
-            .order_by("revision__date_created")
-            .last()
-        )
+        entry = entries_for(
+            StrategicAction, self.strategic_action_update.strategic_action.pk
+        ).last()
         expected_message = "TIMING: Stopped being 'Ongoing': test please delete"
-        assert version.revision.comment == expected_message
+        assert entry.comment == expected_message
 
-    def test_saving_as_submitted_when_strategic_action_changes_target_completion_date_is_recorded_by_reversion(
+    def test_saving_as_submitted_when_strategic_action_changes_target_completion_date_is_recorded_in_the_change_log(
         self,
     ):
         # Guard
@@ -547,19 +547,16 @@ class TestStrategicActionUpdate:
             "test please delete"
         )
         self.strategic_action_update.status = StrategicActionUpdate.Status.SUBMITTED
-        self.strategic_action_update.save()
+        with committing():
+            self.strategic_action_update.save()
 
-        version: Version = (
-            Version.objects.get_for_object(
-                self.strategic_action_update.strategic_action
-            )
-            .order_by("revision__date_created")
-            .last()
-        )
+        entry = entries_for(
+            StrategicAction, self.strategic_action_update.strategic_action.pk
+        ).last()
         expected_message = "TIMING: Target completion date changed: test please delete"
-        assert version.revision.comment == expected_message
+        assert entry.comment == expected_message
 
-    def test_user_changing_target_completion_date_is_recorded_by_reversion(
+    def test_user_changing_target_completion_date_is_recorded_in_the_change_log(
         self, django_user_model
     ):
         # Guard
@@ -588,16 +585,13 @@ class TestStrategicActionUpdate:
         )
         self.strategic_action_update.status = StrategicActionUpdate.Status.SUBMITTED
         self.strategic_action_update.user = expected_user
-        self.strategic_action_update.save()
+        with committing():
+            self.strategic_action_update.save()
 
-        version: Version = (
-            Version.objects.get_for_object(
-                self.strategic_action_update.strategic_action
-            )
-            .order_by("revision__date_created")
-            .last()
-        )
-        assert version.revision.user.email == expected_user_email
+        entry = entries_for(
+            StrategicAction, self.strategic_action_update.strategic_action.pk
+        ).last()
+        assert entry.user.email == expected_user_email
 
     def test_has_action_status_true_if_has_implementation_rag_rating_green(self):
         self.strategic_action_update.implementation_rag_rating = RAGRating.GREEN
@@ -1003,3 +997,97 @@ class TestStrategicActionUpdate:
         self.strategic_action_update.save()
         self.strategic_action_update.refresh_from_db()
         assert self.strategic_action_update.complete
+
+
+class TestSavePathQueries:
+    def setup_method(self):
+        self.supply_chain: SupplyChain = SupplyChainFactory()
+        self.strategic_action: StrategicAction = StrategicActionFactory(
+            supply_chain=self.supply_chain,
+            target_completion_date=date(year=2022, month=1, day=1),
+            is_ongoing=False,
+        )
+
+    def test_new_update_is_a_single_insert_with_slug(self, django_assert_num_queries):
+        update = StrategicActionUpdate(
+            strategic_action=self.strategic_action,
+            supply_chain=self.supply_chain,
+            date_created=date(year=2021, month=5, day=12),
+        )
+
+        with django_assert_num_queries(1):
+            update.save()
+
+        update.refresh_from_db()
+        assert update.slug == "05-2021"
+
+    def test_timing_change_does_not_refetch_strategic_action(
+        self, django_assert_num_queries
+    ):
+        strategic_action = StrategicAction.objects.select_related("supply_chain").get(
+            pk=self.strategic_action.pk
+        )
+        strategic_action.target_completion_date = date(year=2023, month=1, day=1)
+
+        # foreign key validation and the update, the change log entry waits for the commit
+        with committing(), django_assert_num_queries(2) as captured:
+            strategic_action.save(reason_for_completion_date_change="Delayed")
+
+        refetches = [
+            query["sql"]
+            for query in captured.captured_queries
+            if query["sql"].startswith("SELECT")
+            and '"supply_chains_strategicaction"."target_completion_date"'
+            in query["sql"]
+        ]
+        assert refetches == []
+        entry = entries_for(StrategicAction, strategic_action.pk).last()
+        assert entry.comment == "TIMING: Target completion date changed: Delayed"
+
+    def test_successive_saves_compare_against_last_save(self):
+        strategic_action = StrategicAction.objects.get(pk=self.strategic_action.pk)
+        with committing():
+            strategic_action.is_ongoing = True
+            strategic_action.target_completion_date = None
+            strategic_action.save()
+            strategic_action.name = "Renamed"
+            strategic_action.save()
+
+        comments = [
+            entry.comment for entry in entries_for(StrategicAction, strategic_action.pk)
+        ]
+        # the change of timing, then the rename
+        assert comments[-2:] == ["TIMING: Becoming 'Ongoing': ", ""]
+
+    def test_submitting_update_with_new_date_writes_each_row_once(
+        self, django_assert_num_queries
+    ):
+        update: StrategicActionUpdate = StrategicActionUpdateFactory(
+            strategic_action=self.strategic_action,
+            supply_chain=self.supply_chain,
+        )
+        update = StrategicActionUpdate.objects.select_related(
+            "strategic_action__supply_chain", "user"
+        ).get(pk=update.pk)
+        update.status = StrategicActionUpdate.Status.SUBMITTED
+        update.changed_value_for_target_completion_date = date(
+            year=2023, month=1, day=1
+        )
+        update.reason_for_completion_date_change = "Delayed"
+
+        # the strategic action's save as above, the update itself,
+        # then the submitted update counts of its supply chain and umbrella
+        with django_assert_num_queries(5) as captured:
+            update.save()
+
+        update_writes = [
+            query["sql"]
+            for query in captured.captured_queries
+            if '"supply_chains_strategicactionupdate"' in query["sql"]
+        ]
+        assert len(update_writes) == 1
+
+        self.strategic_action.refresh_from_db()
+        assert self.strategic_action.target_completion_date == date(
+            year=2023, month=1, day=1
+        )
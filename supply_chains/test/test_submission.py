@@ -0,0 +1,141 @@
+from datetime import date
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from change_log.reader import entries_for
+from supply_chains.models import (
+    RAGRating,
+    StrategicAction,
+    StrategicActionUpdate,
+    SupplyChain,
+)
+from supply_chains.submission import submit_monthly_updates
+from supply_chains.test.factories import (
+    StrategicActionFactory,
+    StrategicActionUpdateFactory,
+    SupplyChainFactory,
+)
+from supply_chains.utils import get_last_working_day_of_previous_month
+
+pytestmark = pytest.mark.django_db
+Status = StrategicActionUpdate.Status
+
+
+def committing():
+    """Run on-commit callbacks at the end of the block, as the test's transaction never commits"""
+    return TestCase.captureOnCommitCallbacks(execute=True)
+
+
+def ready_updates(supply_chain, count, **kwargs):
+    return [
+        StrategicActionUpdateFactory(
+            status=Status.READY_TO_SUBMIT,
+            implementation_rag_rating=RAGRating.GREEN,
+            strategic_action=StrategicActionFactory(
+                supply_chain=supply_chain,
+                is_ongoing=False,
+                target_completion_date=date(year=2022, month=1, day=1),
+            ),
+            supply_chain=supply_chain,
+            **kwargs,
+        )
+        for _ in range(count)
+    ]
+
+
+class TestSubmitMonthlyUpdates:
+    def setup_method(self):
+        self.supply_chain: SupplyChain = SupplyChainFactory(last_submission_date=None)
+        self.last_deadline = get_last_working_day_of_previous_month()
+
+    def test_submits_ready_updates(self):
+        ready_updates(self.supply_chain, 3)
+
+        with committing():
+            submitted = submit_monthly_updates([self.supply_chain], self.last_deadline)
+
+        assert submitted == 3
+        assert (
+            StrategicActionUpdate.objects.filter(
+                status=Status.SUBMITTED, submission_date=date.today()
+            ).count()
+            == 3
+        )
+        self.supply_chain.refresh_from_db()
+        assert self.supply_chain.last_submission_date == date.today()
+        entry = entries_for(SupplyChain, self.supply_chain.pk).last()
+        assert entry.changes["last_submission_date"] == [None, str(date.today())]
+
+    def test_query_count_does_not_grow_with_updates(
+        self, django_assert_max_num_queries
+    ):
+        ready_updates(self.supply_chain, 10)
+        ready_updates(
+            self.supply_chain,
+            10,
+            changed_value_for_target_completion_date=date(year=2023, month=1, day=1),
+            reason_for_completion_date_change="Delayed",
+        )
+
+        # updates, content type, two bulk updates, the supply chain,
+        # the change log entries, plus the savepoint
+        with django_assert_max_num_queries(10):
+            submit_monthly_updates([self.supply_chain], self.last_deadline)
+
+        assert not StrategicActionUpdate.objects.exclude(
+            status=Status.SUBMITTED
+        ).exists()
+
+    def test_timing_change_is_applied_and_recorded(self):
+        (update,) = ready_updates(
+            self.supply_chain,
+            1,
+            changed_value_for_target_completion_date=date(year=2023, month=1, day=1),
+            reason_for_completion_date_change="Delayed",
+        )
+
+        with committing():
+            submit_monthly_updates([self.supply_chain], self.last_deadline)
+
+        strategic_action = StrategicAction.objects.get(pk=update.strategic_action.pk)
+        assert strategic_action.target_completion_date == date(
+            year=2023, month=1, day=1
+        )
+        update.refresh_from_db()
+        assert update.changed_value_for_target_completion_date is None
+        entry = entries_for(StrategicAction, strategic_action.pk).last()
+        assert entry.comment == "TIMING: Target completion date changed: Delayed"
+        assert entry.user == update.user
+        assert entry.changes["target_completion_date"] == ["2022-01-01", "2023-01-01"]
+
+    def test_becoming_ongoing_is_applied_and_recorded(self):
+        (update,) = ready_updates(
+            self.supply_chain,
+            1,
+            changed_value_for_is_ongoing=True,
+            reason_for_completion_date_change="No end date",
+        )
+
+        with committing():
+            submit_monthly_updates([self.supply_chain], self.last_deadline)
+
+        strategic_action = StrategicAction.objects.get(pk=update.strategic_action.pk)
+        assert strategic_action.is_ongoing
+        assert strategic_action.target_completion_date is None
+        entry = entries_for(StrategicAction, strategic_action.pk).last()
+        assert entry.comment == "TIMING: Becoming 'Ongoing': No end date"
+
+    def test_invalid_update_prevents_any_submission(self):
+        ready_updates(self.supply_chain, 2)
+        ready_updates(self.supply_chain, 1, content="")
+
+        with pytest.raises(ValidationError, match="Missing content"):
+            submit_monthly_updates([self.supply_chain], self.last_deadline)
+
+        assert not StrategicActionUpdate.objects.filter(
+            status=Status.SUBMITTED
+        ).exists()
+        self.supply_chain.refresh_from_db()
+        assert self.supply_chain.last_submission_date is None
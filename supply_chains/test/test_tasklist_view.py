@@ -3,7 +3,7 @@ from django.test import Client
 from django.urls import reverse
 from django.template.defaultfilters import slugify
 
-from supply_chains.models import StrategicAction, StrategicActionUpdate
+from supply_chains.models import RAGRating, StrategicAction, StrategicActionUpdate
 from supply_chains.test.factories import (
     SupplyChainFactory,
     SupplyChainUmbrellaFactory,
@@ -322,3 +322,45 @@ class TestTaskListView:
 
         # Assert
         assert resp.context["view"].supply_chain_name == u_name
+
+    def test_submit_all_ready_updates(self, logged_in_client, tasklist_stub):
+        # Arrange
+        for sa in tasklist_stub["sa"]:
+            StrategicActionUpdateFactory(
+                status=Status.READY_TO_SUBMIT,
+                implementation_rag_rating=RAGRating.GREEN,
+                strategic_action=sa,
+                supply_chain=tasklist_stub["sc"],
+            )
+
+        # Act
+        resp = logged_in_client.post(tasklist_stub["url"])
+
+        # Assert
+        assert resp.status_code == 302
+        assert (
+            StrategicActionUpdate.objects.filter(status=Status.SUBMITTED).count() == 4
+        )
+
+    def test_submit_with_invalid_update_submits_nothing(
+        self, logged_in_client, tasklist_stub
+    ):
+        # Arrange
+        for sa in tasklist_stub["sa"]:
+            StrategicActionUpdateFactory(
+                status=Status.READY_TO_SUBMIT,
+                implementation_rag_rating=RAGRating.RED,
+                reason_for_delays="",
+                strategic_action=sa,
+                supply_chain=tasklist_stub["sc"],
+            )
+
+        # Act
+        resp = logged_in_client.post(tasklist_stub["url"])
+
+        # Assert
+        assert resp.status_code == 200
+        assert resp.context["view"].submit_error
+        assert not StrategicActionUpdate.objects.filter(
+            status=Status.SUBMITTED
+        ).exists()
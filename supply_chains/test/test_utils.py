@@ -6,6 +6,7 @@ from accounts.test.factories import GovDepartmentFactory, UserFactory
 from supply_chains.test.factories import SupplyChainFactory
 from supply_chains.utils import (
     get_last_working_day_of_a_month,
+    get_reporting_period,
 )
 from supply_chains.mixins import check_matching_gov_department
 
@@ -22,6 +23,20 @@ def test_get_last_working_day_of_a_month(input_date, expected_date):
     assert get_last_working_day_of_a_month(input_date) == expected_date
 
 
+@pytest.mark.parametrize(
+    ("input_date, expected_period"),
+    (
+        (date(2021, 2, 1), date(2021, 2, 1)),
+        (date(2021, 2, 26), date(2021, 2, 1)),
+        (date(2021, 2, 27), date(2021, 3, 1)),
+        (date(2021, 12, 31), date(2021, 12, 1)),
+        (date(2022, 4, 30), date(2022, 5, 1)),
+    ),
+)
+def test_get_reporting_period(input_date, expected_period):
+    assert get_reporting_period(input_date) == expected_period
+
+
 @pytest.mark.django_db()
 def test_check_matching_gov_department_fail():
     """Test False returned if supply chain and user have different gov departments."""
@@ -1,13 +1,16 @@
 import calendar
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 
 import holidays
 
 
+@lru_cache(maxsize=None)
 def get_last_working_day_of_a_month(last_day_of_month: date) -> date:
     """
     When provided with a date object representing the last day of a month,
     this function will return the last working day of that month.
+    Results are cached, as building the holiday calendar is slow and deadlines don't change.
     """
     uk_holidays = holidays.UnitedKingdom()
     if last_day_of_month in uk_holidays or last_day_of_month.weekday() > 4:
@@ -33,3 +36,16 @@ def get_last_working_day_of_previous_month() -> date:
         last_day_of_previous_month
     )
     return previous_month_deadline
+
+
+@lru_cache(maxsize=None)
+def get_reporting_period(day: date) -> date:
+    """
+    Returns the first day of the month whose round of monthly updates the given day
+    falls in. A round ends on the last working day of its month, so days after that
+    belong to the next month's round.
+    """
+    last_day_of_month = day.replace(day=calendar.monthrange(day.year, day.month)[1])
+    if day > get_last_working_day_of_a_month(last_day_of_month):
+        return last_day_of_month + timedelta(days=1)
+    return day.replace(day=1)
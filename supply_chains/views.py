@@ -1,7 +1,8 @@
-from datetime import date
+from datetime import date, datetime
 from typing import List, Dict, Tuple
 from itertools import groupby
 
+from django.core.exceptions import ValidationError
 from django.db.models import Sum
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models.expressions import Q, F
@@ -11,6 +12,7 @@ from django.db.models import Count, When, Case, Value
 from django.shortcuts import redirect, render
 from django.urls import reverse, reverse_lazy
 from django.template.defaultfilters import date as date_tag
+from dateutil.relativedelta import relativedelta
 from django.views.generic import (
     ListView,
     UpdateView,
@@ -27,19 +29,28 @@ from supply_chains.forms import (
     MonthlyUpdateTimingForm,
     MonthlyUpdateModifiedTimingForm,
 )
+from accounts.models import GovDepartment
 from supply_chains.models import (
+    MonthlySupplyChainSummary,
     SupplyChain,
     SupplyChainUmbrella,
     StrategicAction,
     StrategicActionUpdate,
     RAGRating,
 )
+from supply_chains.submission import submit_monthly_updates
 from supply_chains.utils import (
     get_last_day_of_this_month,
     get_last_working_day_of_a_month,
     get_last_working_day_of_previous_month,
+    get_reporting_period,
+)
+from supply_chains.mixins import (
+    ConcurrentContextMixin,
+    GovDepPermissionMixin,
+    PaginationMixin,
+    fetched,
 )
-from supply_chains.mixins import PaginationMixin, GovDepPermissionMixin
 from supply_chains.templatetags.supply_chain_tags import get_tasklist_link
 
 
@@ -52,15 +63,12 @@ class SCHomePageView(LoginRequiredMixin, PaginationMixin, ListView):
         supply_chains = self.request.user.gov_department.supply_chains.filter(
             is_archived=False
         )
-        return supply_chains.annotate(
-            strategic_action_count=Count(
-                Case(When(strategic_actions__is_archived=False, then=Value(1)))
-            )
-        ).order_by("name")
+        return supply_chains.order_by("name")
 
     def get_unique_umbrella_tuples(self) -> List:
-        # Due to annotate within get_queryset, distinct can't be used
-        i = self.object_list.filter(supply_chain_umbrella__isnull=False)
+        i = self.object_list.filter(supply_chain_umbrella__isnull=False).select_related(
+            "supply_chain_umbrella"
+        )
         tuples = [(x.supply_chain_umbrella, x.id) for x in i]
         unique_umbrellas = set(e[0] for e in tuples)
         unique_tuples = []
@@ -73,16 +81,6 @@ class SCHomePageView(LoginRequiredMixin, PaginationMixin, ListView):
 
         return unique_tuples
 
-    def _get_umbrella_sa_count(self, u: SupplyChainUmbrella) -> int:
-        sum = u.supply_chains.annotate(
-            strategic_action_count=Count(
-                Case(When(strategic_actions__is_archived=False, then=Value(1)))
-            )
-        )
-        return sum.aggregate(Sum("strategic_action_count"))[
-            "strategic_action_count__sum"
-        ]
-
     def _inject_sc_umbrellas(self):
         """Update supply chain list with umbrella details
 
@@ -106,19 +104,15 @@ class SCHomePageView(LoginRequiredMixin, PaginationMixin, ListView):
 
         chains = list()
 
-        for item in qs.iterator():
+        for item in qs.select_related("supply_chain_umbrella").iterator():
             if item.supply_chain_umbrella:
                 u = item.supply_chain_umbrella
-                sc = u.supply_chains.all().order_by("-last_submission_date").first()
-                last_updated = date_tag(sc.last_submission_date, "j M Y")
-                sa_count = self._get_umbrella_sa_count(u)
-
                 chains.append(
                     {
                         "name": u.name,
                         "slug": u.slug,
-                        "sa_count": sa_count,
-                        "last_updated": last_updated,
+                        "sa_count": u.active_strategic_action_count,
+                        "last_updated": date_tag(u.last_submission_date, "j M Y"),
                     }
                 )
             else:
@@ -126,7 +120,7 @@ class SCHomePageView(LoginRequiredMixin, PaginationMixin, ListView):
                     {
                         "name": item.name,
                         "slug": item.slug,
-                        "sa_count": item.strategic_action_count,
+                        "sa_count": item.active_strategic_action_count,
                         "last_updated": date_tag(item.last_submission_date, "j M Y"),
                     }
                 )
@@ -148,7 +142,7 @@ class SCHomePageView(LoginRequiredMixin, PaginationMixin, ListView):
         # Though SC with 0 active SA are listed, no action is required and hence not included
         # for to be completed
         total_sc_with_active_sa = self.object_list.filter(
-            strategic_actions__is_archived=False
+            active_strategic_action_count__gt=0
         ).count()
         context["update_complete"] = (
             context["num_updated_supply_chains"] == total_sc_with_active_sa
@@ -360,20 +354,12 @@ class SCTaskListView(
                 else:
                     raise
 
-            for sc in scs:
-                sc.last_submission_date = date.today()
-                sc.save()
-
-                updates = StrategicActionUpdate.objects.since(
-                    self.last_deadline,
-                    supply_chain=sc,
-                    status=StrategicActionUpdate.Status.READY_TO_SUBMIT,
-                )
-
-                for update in updates.iterator():
-                    update.submission_date = date.today()
-                    update.status = StrategicActionUpdate.Status.SUBMITTED
-                    update.save()
+            try:
+                submit_monthly_updates(scs, self.last_deadline, user=self.request.user)
+            except ValidationError:
+                self.submit_error = True
+                kwargs.setdefault("view", self)
+                return render(self.request, self.template_name, context=kwargs)
 
             return redirect(
                 "supply-chain-update-complete", supply_chain_slug=supply_chain_slug
@@ -842,54 +828,104 @@ class SASummaryView(
         return context
 
 
-class SCSummary(LoginRequiredMixin, PaginationMixin, TemplateView):
+class SCSummary(
+    LoginRequiredMixin, ConcurrentContextMixin, PaginationMixin, TemplateView
+):
     template_name = "sc_summary.html"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get_context_loaders(self):
+        return {"supply_chains": self.get_supply_chains}
 
-        context["supply_chains"] = self.paginate(
-            SupplyChain.objects.filter(
-                is_archived=False, gov_department=self.request.user.gov_department
-            ).order_by("name"),
-            5,
+    def get_supply_chains(self):
+        return fetched(
+            self.paginate(
+                SupplyChain.objects.filter(
+                    is_archived=False, gov_department=self.request.user.gov_department
+                ).order_by("name"),
+                5,
+            )
         )
 
-        return context
 
+class DepartmentSummaryView(LoginRequiredMixin, TemplateView):
+    """Totals of each department's supply chains for a month, from their monthly summaries
 
-class SAUReview(LoginRequiredMixin, GovDepPermissionMixin, TemplateView):
-    template_name = "sau_review.html"
-    last_deadline = None
+    Admins see every department, and others their own.
+    """
+
+    template_name = "department_summary.html"
+
+    def get_period(self) -> date:
+        current_period = get_reporting_period(date.today())
+        try:
+            period = datetime.strptime(
+                self.request.GET.get("month", ""), "%Y-%m"
+            ).date()
+        except ValueError:
+            return current_period
+        return min(period, current_period)
 
     def get_context_data(self, **kwargs):
-        self.last_deadline = get_last_working_day_of_previous_month()
         context = super().get_context_data(**kwargs)
-
-        self.supply_chain_slug, sa_slug, update_slug = (
-            kwargs.get("supply_chain_slug"),
-            kwargs.get("action_slug"),
-            kwargs.get("update_slug"),
+        period = self.get_period()
+        summaries = MonthlySupplyChainSummary.objects.department_summary(period)
+        if not self.request.user.is_admin:
+            summaries = summaries.filter(
+                gov_department=self.request.user.gov_department
+            )
+        summaries = list(summaries)
+        departments = GovDepartment.objects.in_bulk(
+            [summary["gov_department"] for summary in summaries]
         )
+        for summary in summaries:
+            summary["gov_department"] = departments[summary["gov_department"]]
+        summaries.sort(key=lambda summary: summary["gov_department"].name)
+
+        context["summaries"] = summaries
+        context["period"] = period
+        context["previous_period"] = period - relativedelta(months=1)
+        if period < get_reporting_period(date.today()):
+            context["next_period"] = period + relativedelta(months=1)
+        return context
+
+
+class SAUReview(
+    LoginRequiredMixin, GovDepPermissionMixin, ConcurrentContextMixin, TemplateView
+):
+    template_name = "sau_review.html"
+
+    def get_context_loaders(self):
+        return {
+            "update": self.get_update,
+            "supply_chain_name": self.get_supply_chain_name,
+        }
 
+    def get_update(self):
         # Now that umbrella can be passed in place of supply chain, better not look for
         # supply_chain_slug for this look up
-        sau = StrategicActionUpdate.objects.since(
-            deadline=self.last_deadline,
-            status=StrategicActionUpdate.Status.SUBMITTED,
-            slug=update_slug,
-            strategic_action__slug=sa_slug,
-        ).first()
+        return (
+            StrategicActionUpdate.objects.since(
+                deadline=get_last_working_day_of_previous_month(),
+                status=StrategicActionUpdate.Status.SUBMITTED,
+                slug=self.kwargs.get("update_slug"),
+                strategic_action__slug=self.kwargs.get("action_slug"),
+            )
+            .select_related("strategic_action")
+            .first()
+        )
 
+    def get_supply_chain_name(self):
+        supply_chain_slug = self.kwargs.get("supply_chain_slug")
         try:
-            sc = SupplyChain.objects.get(slug=self.supply_chain_slug)
-            context["supply_chain_name"] = sc.name
+            return SupplyChain.objects.get(slug=supply_chain_slug).name
         except SupplyChain.DoesNotExist:
-            u = SupplyChainUmbrella.objects.get(slug=self.supply_chain_slug)
-            context["supply_chain_name"] = u.name
+            return SupplyChainUmbrella.objects.get(slug=supply_chain_slug).name
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
 
+        sau = context["update"]
         context["strategic_action"] = sau.strategic_action
-        context["update"] = sau
 
         if sau.strategic_action.is_ongoing:
             context["completion_estimation"] = "Ongoing"